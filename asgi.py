@@ -0,0 +1,24 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" ASGI entry point for the Flask server
+File    : asgi.py
+Date    : Sunday 18 October 2026
+Desc.   : Serves the blog through pacing.DeferredReleaseApp, so padded responses such as logins are held on the event
+          loop rather than on a worker thread. Run with an ASGI server, e.g. `uvicorn asgi:app`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Production"  # or "Development"
+
+import os
+
+import blog
+import pacing
+
+app = pacing.DeferredReleaseApp(blog.app, workers=int(os.environ.get("UG_4_ASGI_WORKERS", 8)))
@@ -8,26 +8,33 @@ Desc.   : Handles functions for handling authorisation.
 History : 25/03/2021 - v1.0 - Load basic project file.
           31/03/2021 - v1.1 - Completed MD2 and UD4 hash implementations with helper functions and timer test harness
           31/03/2021 - v1.2 - Added function to generate salts
+          18/10/2026 - v1.3 - ug4_hash iterates in a loop over module level tables rather than by recursion
+          18/10/2026 - v1.4 - Added ug4_hash_many() to hash batches of passwords with numpy
+          18/10/2026 - v1.5 - Versioned password hash format with calibrated iterations
+          18/10/2026 - v1.6 - configure_app() reads secrets from config
+          18/10/2026 - v1.7 - numpy is only imported once a batch is hashed, fast start setting
+          18/10/2026 - v1.8 - Database pool size and pragma settings
+          18/10/2026 - v1.9 - Weak password list setting
+          18/10/2026 - v1.10 - Feed cache settings
+          18/10/2026 - v1.11 - A feed cache TTL of 0 turns the cache off rather than leaving the default
 """
 
 __author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
 __copyright__ = "Copyright 2021, CMP-UG4"
 __credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
-__version__ = "1.2"
+__version__ = "1.11"
 __email__ = "gny17hvu@uea.ac.uk"
 __status__ = "Production"  # or "Development"
 
 import binascii
 import datetime
+import functools
 import os
 import random
 import string
+import time
 
-from dotenv import load_dotenv
-
-import blowfish
-
-load_dotenv(override=True)  # load the env vars from file into OS
+import config
 
 
 def generate_salt():
@@ -123,80 +130,262 @@ def md2_hash(password):
     return binascii.hexlify(digest[:16]).decode('utf-8')
 
 
+# this s-box was generated by _gen_s_box() which is based on pi similarly to MD2 but gives a different result.
+UG4_S_BOX = (
+    139, 157, 90,  231, 13,  22,  145, 230, 44,  66,  93,  181, 23,  2,   200, 232,
+    20,  225, 176, 151, 32,  92,  104, 55,  134, 149, 167, 247, 80,  33,  63,  248,
+    61,  114, 209, 172, 226, 19,  102, 236, 78,  190, 241, 244, 68,  128, 162, 189,
+    108, 0,   174, 60,  8,   224, 160, 187, 238, 110, 72,  95,  69,  234, 25,  141,
+    96,  217, 213, 120, 188, 15,  218, 179, 161, 36,  1,   196, 121, 152, 182, 175,
+    47,  49,  243, 53,  86,  245, 38,  100, 228, 79,  215, 10,  239, 197, 221, 77,
+    203, 210, 135, 201, 30,  91,  220, 155, 98,  26,  186, 150, 81,  57,  253, 251,
+    112, 242, 105, 73,  27,  94,  122, 4,   17,  6,   198, 75,  39,  184, 40,  136,
+    153, 206, 14,  177, 99,  171, 246, 115, 84,  124, 164, 212, 137, 111, 109, 106,
+    233, 54,  254, 222, 50,  113, 59,  168, 31,  193, 129, 58,  11,  118, 148, 144,
+    169, 205, 97,  204, 250, 116, 88,  107, 62,  163, 9,   158, 130, 227, 71,  64,
+    43,  52,  211, 183, 154, 82,  37,  195, 192, 18,  12,  117, 194, 65,  138, 165,
+    51,  199, 202, 24,  131, 87,  89,  127, 237, 126, 35,  147, 41,  123, 142, 173,
+    42,  214, 249, 252, 185, 16,  125, 229, 178, 219, 119, 208, 67,  132, 140, 159,
+    223, 83,  207, 156, 170, 85,  45,  48,  240, 76,  5,   29,  216, 180, 133, 146,
+    235, 21,  56,  191, 3,   101, 70,  166, 74,  143, 28,  7,   46,  34,  103, 255
+)
+UG4_BLOCK_SIZE = 64  # 64 bytes or 512 bits
+UG4_ROUNDS = 77  # randomly chosen
+UG4_PADDING = tuple(bytes([i]) * i for i in range(UG4_BLOCK_SIZE + 1))  # "i" bytes of value "i", indexed by i
+
+PASSWORD_ALGORITHM = "ug4"
+DEFAULT_ITERATIONS = 50  # the cost every password hash used before the stored format recorded it
+MIN_ITERATIONS = 10
+MAX_ITERATIONS = 10000
+CALIBRATION_ITERATIONS = 10
+
+
 def ug4_hash(password, iterations=50):
     """ 512-bit hashing algorithm based on MD2. Iterates multiple times to ensure the hash is time-consuming.
     This will be secure enough for our needs, especially when salted and peppered.
 
-    :param iterations: Number of iterations of the algorithm remaining to run through. This should remain as default.
+    :param iterations: Number of extra iterations of the algorithm to run through. This should remain as default.
     :param password: The password to be hashed
     :return: A 512-bit UG4 hash of the given password
     """
-    s_box = [
-        139, 157, 90,  231, 13,  22,  145, 230, 44,  66,  93,  181, 23,  2,   200, 232,
-        20,  225, 176, 151, 32,  92,  104, 55,  134, 149, 167, 247, 80,  33,  63,  248,
-        61,  114, 209, 172, 226, 19,  102, 236, 78,  190, 241, 244, 68,  128, 162, 189,
-        108, 0,   174, 60,  8,   224, 160, 187, 238, 110, 72,  95,  69,  234, 25,  141,
-        96,  217, 213, 120, 188, 15,  218, 179, 161, 36,  1,   196, 121, 152, 182, 175,
-        47,  49,  243, 53,  86,  245, 38,  100, 228, 79,  215, 10,  239, 197, 221, 77,
-        203, 210, 135, 201, 30,  91,  220, 155, 98,  26,  186, 150, 81,  57,  253, 251,
-        112, 242, 105, 73,  27,  94,  122, 4,   17,  6,   198, 75,  39,  184, 40,  136,
-        153, 206, 14,  177, 99,  171, 246, 115, 84,  124, 164, 212, 137, 111, 109, 106,
-        233, 54,  254, 222, 50,  113, 59,  168, 31,  193, 129, 58,  11,  118, 148, 144,
-        169, 205, 97,  204, 250, 116, 88,  107, 62,  163, 9,   158, 130, 227, 71,  64,
-        43,  52,  211, 183, 154, 82,  37,  195, 192, 18,  12,  117, 194, 65,  138, 165,
-        51,  199, 202, 24,  131, 87,  89,  127, 237, 126, 35,  147, 41,  123, 142, 173,
-        42,  214, 249, 252, 185, 16,  125, 229, 178, 219, 119, 208, 67,  132, 140, 159,
-        223, 83,  207, 156, 170, 85,  45,  48,  240, 76,  5,   29,  216, 180, 133, 146,
-        235, 21,  56,  191, 3,   101, 70,  166, 74,  143, 28,  7,   46,  34,  103, 255
-    ]  # this s-box was generated by _gen_s_box() which is based on pi similarly to MD2 but gives a different result.
-
-    block_size = 64  # 64 bytes or 512 bits
-    password_bytes = bytearray(password, 'utf-8')  # turn the password into an array of bytes
+    found_hash = _ug4_hexdigest(password.encode('utf-8'))
+
+    # Step 4b: Continue to Iterate
+    # We now feed the found hash back into the algorithm to be iterated again, in order to increase the time to
+    # generate it, increasing its security.
+    for _ in range(iterations):
+        found_hash = _ug4_hexdigest(found_hash)
+
+    # Step 5: Output
+    return found_hash.decode('utf-8')
+
+
+def _ug4_hexdigest(message):
+    """ Private function to run a single pass of the UG4 algorithm over the given bytes.
+
+    :param bytes message: The bytes to be hashed
+    :return: hex encoded 512-bit digest, ready to be fed back in as the message of the next iteration
+    :rtype bytes:
+    """
+    s_box = UG4_S_BOX
+    block_size = UG4_BLOCK_SIZE
 
     # Step 1: Append Padding Bytes
-    padding = block_size - (len(password_bytes) % block_size)
-    password_bytes += bytearray(padding for _ in range(padding))
+    message = message + UG4_PADDING[block_size - (len(message) % block_size)]
 
     # Step 2: Append Checksum
     previous_check_byte = 0  # Keep track of the last byte written to checksum
-    checksum = bytearray(0 for _ in range(block_size))  # Clear checksum: bytearray must be initialised before use
-
-    for i in range(len(password_bytes) // block_size):  # Process each block
+    checksum = [0] * block_size
+    for i in range(0, len(message), block_size):  # Process each block
         for j in range(block_size):  # Checksum block i
-            byte = password_bytes[i * block_size + j]
-            checksum[j] ^= s_box[byte ^ previous_check_byte]
-            previous_check_byte = checksum[j]
+            previous_check_byte = checksum[j] = checksum[j] ^ s_box[message[i + j] ^ previous_check_byte]
 
-    password_bytes += checksum
+    message += bytes(checksum)
 
     # Step 3: Initialise MD Buffer
-    buffer_size = 192  # 1536 bits or 3 times the size of the blocks.
-    digest = bytearray([0 for _ in range(buffer_size)])
+    # The buffer is 192 bytes (3 times the size of the blocks) but only the first block is carried between blocks, the
+    # other two are rebuilt from each message block.
+    state = [0] * block_size
 
-    # Step 4: Process message in 16-Byte blocks
-    n_rounds = 77  # randomly chosen
-
-    for i in range(len(password_bytes) // block_size):  # Process each 16-word block.
-        for j in range(block_size):  # Copy block i into digest
-            digest[block_size + j] = password_bytes[i * block_size + j]
-            digest[2 * block_size + j] = digest[block_size + j] ^ digest[j]
+    # Step 4: Process message in blocks
+    for i in range(0, len(message), block_size):
+        block = message[i:i + block_size]
+        digest = state + list(block) + [byte ^ state_byte for byte, state_byte in zip(block, state)]
 
         previous_hash_byte = 0  # set t to 0
-        for j in range(n_rounds):
-            for k in range(buffer_size):
-                previous_hash_byte = digest[k] = digest[k] ^ s_box[previous_hash_byte]
+        for j in range(UG4_ROUNDS):
+            # each byte is XORed with the s-box entry of the byte written before it
+            digest = [previous_hash_byte := byte ^ s_box[previous_hash_byte] for byte in digest]
+            previous_hash_byte = (previous_hash_byte + j) % 256
 
-            previous_hash_byte = (previous_hash_byte + j) % len(s_box)
+        state = digest[:block_size]
 
-    # Step 4b: Continue to Iterate
-    # We now feed the found hash back into the algorithm to be iterated again, in order to increase the time to
-    # generate it, increasing its security.
-    found_hash = binascii.hexlify(digest[:64]).decode('utf-8')
-    if iterations > 0:
-        found_hash = ug4_hash(found_hash, iterations-1)
+    return binascii.hexlify(bytes(state))
 
-    # Step 5: Output
-    return found_hash
+
+def ug4_hash_many(passwords, iterations=50):
+    """ Hashes a batch of passwords with ug4_hash, giving the same hashes as hashing each of them in turn. Each
+    password is a lane (column) in a 2D array of digests so every step of the algorithm is carried out for the whole
+    batch by one numpy operation. Useful for seeding and migrating many passwords at once.
+
+    :param passwords: Iterable of passwords to be hashed
+    :param iterations: Number of extra iterations of the algorithm to run through. This should remain as default.
+    :return: A list of 512-bit UG4 hashes, in the same order as the given passwords
+    :rtype list[str]:
+    """
+    np = _numpy()[0]
+    messages = [password.encode('utf-8') for password in passwords]
+    hashes = [None] * len(messages)
+
+    # the first pass can have a different number of blocks for each password, so group the lanes by padded length
+    groups = {}
+    for index, message in enumerate(messages):
+        groups.setdefault(len(message) // UG4_BLOCK_SIZE, []).append(index)
+
+    for indexes in groups.values():
+        padded = b''.join(messages[i] + UG4_PADDING[UG4_BLOCK_SIZE - (len(messages[i]) % UG4_BLOCK_SIZE)]
+                          for i in indexes)
+        lanes = np.frombuffer(padded, dtype=np.uint8).reshape(len(indexes), -1).T
+        found_hashes = _ug4_hexdigest_lanes(np.ascontiguousarray(lanes))
+
+        # every following pass hashes a 128 character hex string, which is always padded by a full block
+        message = np.full((2 * UG4_BLOCK_SIZE + UG4_BLOCK_SIZE, len(indexes)), UG4_BLOCK_SIZE, dtype=np.uint8)
+        for _ in range(iterations):
+            message[:2 * UG4_BLOCK_SIZE] = found_hashes
+            found_hashes = _ug4_hexdigest_lanes(message)
+
+        found_hashes = found_hashes.T.tobytes().decode('utf-8')
+        for lane, index in enumerate(indexes):
+            hashes[index] = found_hashes[lane * 2 * UG4_BLOCK_SIZE:(lane + 1) * 2 * UG4_BLOCK_SIZE]
+
+    return hashes
+
+
+def _ug4_hexdigest_lanes(message):
+    """ Private function to run a single pass of the UG4 algorithm over a batch of padded messages of equal length.
+
+    :param numpy.ndarray message: uint8 array of shape (padded message length, lanes), one message per column
+    :return: uint8 array of shape (128, lanes) holding the hex encoded digest of each lane
+    :rtype numpy.ndarray:
+    """
+    np, s_box, hex_digits = _numpy()
+    take = s_box.take
+    xor = np.bitwise_xor
+    block_size = UG4_BLOCK_SIZE
+    length, lanes = message.shape
+    substituted = np.empty(lanes, dtype=np.uint8)  # scratch row for the s-box lookups
+
+    # Step 2: Append Checksum
+    checksum = np.zeros((block_size, lanes), dtype=np.uint8)
+    checksum_rows = list(checksum)  # row views, so the loop doesn't rebuild them on every step
+    previous_check_byte = np.zeros(lanes, dtype=np.uint8)
+    for i in range(0, length, block_size):
+        for j in range(block_size):
+            xor(message[i + j], previous_check_byte, out=substituted)
+            take(substituted, out=substituted, mode='clip')
+            xor(checksum_rows[j], substituted, out=checksum_rows[j])
+            previous_check_byte = checksum_rows[j]
+
+    message = np.concatenate((message, checksum))
+
+    # Step 3: Initialise MD Buffer
+    digest = np.zeros((3 * block_size, lanes), dtype=np.uint8)
+    digest_rows = list(digest)
+
+    # Step 4: Process message in blocks
+    for i in range(0, len(message), block_size):
+        block = message[i:i + block_size]
+        digest[block_size:2 * block_size] = block
+        np.bitwise_xor(block, digest[:block_size], out=digest[2 * block_size:])
+
+        previous_hash_byte = np.zeros(lanes, dtype=np.uint8)
+        for j in range(UG4_ROUNDS):
+            for row in digest_rows:
+                # every byte is a valid s-box index, so 'clip' just skips the slower bounds checking
+                take(previous_hash_byte, out=substituted, mode='clip')
+                xor(row, substituted, out=row)
+                previous_hash_byte = row
+            previous_hash_byte = previous_hash_byte + np.uint8(j)  # uint8 arithmetic wraps around at 256
+
+    # Step 5: Output as hex characters
+    state = digest[:block_size]
+    found_hashes = np.empty((2 * block_size, lanes), dtype=np.uint8)
+    found_hashes[0::2] = hex_digits[state >> 4]
+    found_hashes[1::2] = hex_digits[state & 0x0f]
+    return found_hashes
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    """ Private function to import numpy and build the tables for ug4_hash_many() the first time a batch is hashed,
+    so importing auth doesn't import numpy.
+
+    :return: the numpy module, the s-box as a uint8 array and the hex digits as a uint8 array
+    :rtype tuple:
+    """
+    import numpy as np
+    return np, np.array(UG4_S_BOX, dtype=np.uint8), np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+def format_password_hash(iterations, salt, digest, algorithm=PASSWORD_ALGORITHM):
+    """ Builds the self-describing form a password hash is stored in: $<algorithm>$<iterations>$<salt>$<digest>
+
+    :param iterations: Number of iterations the digest was made with
+    :param salt: Salt that was hashed with the password
+    :param digest: The UG4 hash
+    :param algorithm: Name of the hashing algorithm
+    :return: Password hash ready to be stored
+    :rtype str:
+    """
+    return f"${algorithm}${iterations}${salt}${digest}"
+
+
+def parse_password_hash(stored, salt=None):
+    """ Splits a stored password hash into its parts. Hashes stored before the format was versioned are bare UG4
+    digests made with the default number of iterations, and have their salt stored separately.
+
+    :param stored: The stored password hash
+    :param salt: Salt stored alongside the hash, used for bare digests
+    :return: tuple of algorithm, iterations, salt and digest
+    :rtype tuple[str, int, str, str]:
+    """
+    if not stored.startswith('$'):
+        return PASSWORD_ALGORITHM, DEFAULT_ITERATIONS, salt, stored
+
+    _, algorithm, iterations, salt, digest = stored.split('$')
+    if algorithm != PASSWORD_ALGORITHM:
+        raise ValueError(f"Unsupported password hash algorithm: {algorithm}")
+    return algorithm, int(iterations), salt, digest
+
+
+def needs_rehash(stored, iterations):
+    """ Checks whether a stored password hash should be replaced, either because it was made with a different number of
+    iterations to the one configured or because it is in the old unversioned format.
+
+    :param stored: The stored password hash
+    :param iterations: Number of iterations hashes should currently be made with
+    :rtype bool:
+    """
+    return not stored.startswith('$') or parse_password_hash(stored)[1] != iterations
+
+
+def calibrate_iterations(target_time, minimum=MIN_ITERATIONS, maximum=MAX_ITERATIONS):
+    """ Finds how many iterations of ug4_hash take around target_time seconds to verify on this machine.
+
+    :param target_time: Time a password verification should take, in seconds
+    :param minimum: Fewest iterations to return, however fast the machine is
+    :param maximum: Most iterations to return, however slow the machine is
+    :return: Number of iterations to hash passwords with
+    :rtype int:
+    """
+    sample = "calibration" + generate_salt()
+    start_time = time.perf_counter()
+    ug4_hash(sample, CALIBRATION_ITERATIONS)
+    pass_time = (time.perf_counter() - start_time) / (CALIBRATION_ITERATIONS + 1)
+
+    # ug4_hash makes one pass more than its iterations
+    iterations = round(target_time / pass_time) - 1
+    return max(minimum, min(maximum, iterations))
 
 
 # as given: https://crypto.stackexchange.com/questions/11935/how-is-the-md2-hash-function-s-table-constructed-from-pi
@@ -246,14 +435,40 @@ def _gen_s_box():
 
 
 def configure_app(app):
-    sek = blowfish.decrypt("dQw4w9WgXcQ", 0, os.environ.get("UG_4_SEK"))
-    dbn = blowfish.decrypt(sek, 0, os.environ.get("UG_4_DBN"))
-    app.config["ENV"] = blowfish.decrypt(sek, dbn, os.environ.get("UG_4_ENV"))
-    app.config["DEBUG"] = blowfish.decrypt(sek, dbn, os.environ.get("UG_4_DEBUG"))
-    app.config["TESTING"] = blowfish.decrypt(sek, dbn, os.environ.get("UG_4_TESTING"))
-    app.secret_key = blowfish.decrypt(sek, dbn, os.environ.get("UG_4_SECRET_KEY"))
+    config.load_env()
+    app.config["ENV"] = config.ENV
+    app.config["DEBUG"] = config.DEBUG
+    app.config["TESTING"] = config.TESTING
+    app.secret_key = config.SECRET_KEY
     app.permanent_session_lifetime = datetime.timedelta(days=1)  # CS: Session lasts a day
     app.config['SESSION_COOKIE_SAMESITE'] = "Lax"
+    # not secrets, so these are read unencrypted. 0 or unset leaves the choice to hasher.HashingService
+    app.config["HASH_WORKERS"] = int(os.environ.get("UG_4_HASH_WORKERS", 0)) or None
+    app.config["HASH_QUEUE_SIZE"] = int(os.environ.get("UG_4_HASH_QUEUE_SIZE", 0)) or None
+    # cost of new password hashes. Setting a target verify time in seconds calibrates it for this machine instead
+    app.config["HASH_ITERATIONS"] = int(os.environ.get("UG_4_HASH_ITERATIONS", DEFAULT_ITERATIONS))
+    app.config["HASH_TARGET_TIME"] = float(os.environ.get("UG_4_HASH_TARGET_TIME", 0)) or None
+    app.config["HASH_CALIBRATED"] = not app.config["HASH_TARGET_TIME"]
+    # minimum response time for routes that hide whether an account exists, see pacing.py. Set RESPONSE_FLOORS to
+    # override it for an endpoint, e.g. {"login": 1.5}
+    app.config["RESPONSE_FLOOR"] = 1.0
+    app.config["RESPONSE_FLOORS"] = {}
+    # set UG_4_ENCRYPT_POSTS=1 to encrypt the content of new posts. Posts already stored stay readable either way
+    app.config["ENCRYPT_POSTS"] = bool(int(os.environ.get("UG_4_ENCRYPT_POSTS", 0)))
+    # set UG_4_FAST_START=1 to leave starting the hashing pool and calibrating until after the app is serving
+    app.config["FAST_START"] = bool(int(os.environ.get("UG_4_FAST_START", 0)))
+    # most database connections kept open at once, 0 or unset for connections.DEFAULT_POOL_SIZE. SQLITE_PRAGMAS of None
+    # uses connections.DEFAULT_PRAGMAS, or set a dict of pragma name to value
+    app.config["DB_POOL_SIZE"] = int(os.environ.get("UG_4_DB_POOL_SIZE", 0)) or None
+    app.config["SQLITE_PRAGMAS"] = None
+    # list of weak passwords refused at signup and reset, plain text or compiled with `python -m weakpasswords build`.
+    # Unset for bad_passwords.txt
+    app.config["WEAK_PASSWORDS"] = os.environ.get("UG_4_WEAK_PASSWORDS") or None
+    # seconds the home feed is cached for, 0 to not cache it, and a directory to share the cache with other app
+    # processes through. Unset for feedcache.TTL and a cache kept to each process
+    feed_cache_ttl = os.environ.get("UG_4_FEED_CACHE_TTL")
+    app.config["FEED_CACHE_TTL"] = float(feed_cache_ttl) if feed_cache_ttl else None
+    app.config["FEED_CACHE_DIR"] = os.environ.get("UG_4_FEED_CACHE_DIR") or None
 
 
 def generate_code():
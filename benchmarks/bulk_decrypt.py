@@ -0,0 +1,50 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for decrypting whole columns
+File    : bulk_decrypt.py
+Date    : Sunday 18 October 2026
+Desc.   : Times decrypting an export's worth of encrypted emails one value at a time with blowfish.decrypt() against
+          all at once with blowfish.decrypt_many(), with and without the keystream cache.
+          Run from the project root with `python -m benchmarks.bulk_decrypt [rows ...]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import sys
+import time
+
+import blowfish
+import db
+
+
+def timed(function):
+    start_time = time.perf_counter()
+    function()
+    return (time.perf_counter() - start_time) * 1000
+
+
+def main(sizes):
+    print(f"{'rows':>8} {'keystream':>10} {'decrypt ms':>12} {'decrypt_many ms':>16} {'speedup':>8}")
+    for rows in sizes:
+        emails = blowfish.encrypt_many(db.DBK, db.DBN, [f"user.{i}@fakeemailservice.abcde" for i in range(rows)])
+        for cached in (False, True):
+            if cached:
+                blowfish.register_keystream(db.DBK, db.DBN)
+            else:
+                blowfish.unregister_keystream(db.DBK, db.DBN)
+            one_at_a_time = timed(lambda: [blowfish.decrypt(db.DBK, db.DBN, email) for email in emails])
+            all_at_once = timed(lambda: blowfish.decrypt_many(db.DBK, db.DBN, emails))
+            print(f"{rows:>8} {'cached' if cached else 'generated':>10} {one_at_a_time:>12.1f} {all_at_once:>16.1f} "
+                  f"{one_at_a_time / all_at_once:>7.1f}x")
+    blowfish.register_keystream(db.DBK, db.DBN)
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or [100, 1000, 10000])
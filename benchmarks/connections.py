@@ -0,0 +1,71 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for pooled database connections
+File    : connections.py
+Date    : Sunday 18 October 2026
+Desc.   : Serves the home page and a user's page through the Flask test client and reports requests per second with a
+          new connection opened and closed for every request in the default rollback journal mode, as before pooling,
+          against the connection pool with its pragma profile. Each is run from 1 thread and from 4 threads at once.
+          Run from the project root with `python -m benchmarks.connections [requests]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import sys
+import threading
+import time
+
+import connections
+import db
+from blog import app
+
+PATHS = ['/', '/aking/']
+THREADS = [1, 4]
+
+
+def requests_per_second(path, requests, threads):
+    def serve():
+        client = app.test_client()
+        for _ in range(requests // threads):
+            client.get(path)
+
+    workers = [threading.Thread(target=serve) for _ in range(threads)]
+    start_time = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return requests // threads * threads / (time.perf_counter() - start_time)
+
+
+def main(requests):
+    pools = {
+        "per request": connections.ConnectionPool(db.DATABASE_PATH, persistent=False,
+                                                  pragmas={"journal_mode": "DELETE"}, row_factory=db.make_dicts),
+        "pooled": connections.ConnectionPool(db.DATABASE_PATH, row_factory=db.make_dicts),
+    }
+    results = {}
+    for name, pool in pools.items():
+        db.pool.close()  # the journal mode can only be changed with no other connections open
+        db.pool = pool
+        for path in PATHS:
+            app.test_client().get(path)  # warm up templates and caches
+            for threads in THREADS:
+                results[name, path, threads] = requests_per_second(path, requests, threads)
+
+    print(f"{'path':<10} {'threads':>8} {'per request req/s':>18} {'pooled req/s':>13} {'speedup':>8}")
+    for path in PATHS:
+        for threads in THREADS:
+            before, after = results["per request", path, threads], results["pooled", path, threads]
+            print(f"{path:<10} {threads:>8} {before:>18.1f} {after:>13.1f} {after / before:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
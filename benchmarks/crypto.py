@@ -0,0 +1,188 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Micro-benchmarks for the auth and blowfish primitives
+File    : crypto.py
+Date    : Sunday 18 October 2026
+Desc.   : Times the hashing, cipher and code generation functions across input sizes, reporting ops/sec and latency
+          percentiles. Results can be saved as JSON and two saved runs compared to flag regressions.
+          Run from the project root:
+              python -m benchmarks.crypto run [--output results.json] [--samples N] [--only name ...]
+              python -m benchmarks.crypto compare baseline.json results.json [--threshold 0.10]
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import string
+import sys
+import time
+
+import auth
+import blowfish
+
+KEY = "thisisasecretkey"
+NONCE = 4162467955
+MESSAGE_SIZES = [8, 64, 256, 1024, 10000]  # bytes; 10000 is the longest post allowed by validation
+PASSWORD_SIZES = [8, 64, 200]
+MIN_SAMPLE_TIME = 0.005  # seconds, fast functions are looped until a sample takes at least this long
+
+
+def _text(size, seed):
+    rng = random.Random(seed)  # fixed seeds so every run times the same inputs
+    return ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(size))
+
+
+def build_cases():
+    """ Lists every case to time as (name, input size, function to time). """
+    cases = []
+    for size in PASSWORD_SIZES:
+        password = _text(size, size)
+        cases.append(("ug4_hash", size, lambda p=password: auth.ug4_hash(p)))
+        cases.append(("md2_hash", size, lambda p=password: auth.md2_hash(p)))
+
+    cases.append(("BlowyFishy.__init__", len(KEY), lambda: blowfish.BlowyFishy(KEY)))
+
+    mode_ctr = blowfish.CTR(blowfish.BlowyFishy(KEY), NONCE)
+    for size in MESSAGE_SIZES:
+        message = _text(size, size)
+        cases.append(("CTR.ctr_encryption", size, lambda m=message: mode_ctr.ctr_encryption(m)))
+        cases.append(("blowfish.encrypt", size, lambda m=message: blowfish.encrypt(KEY, NONCE, m)))
+
+    cases.append(("generate_salt", 32, auth.generate_salt))
+    cases.append(("generate_code", 6, auth.generate_code))
+    return cases
+
+
+def time_case(function, samples):
+    """ Times a function, looping fast ones so each sample is long enough to measure.
+
+    :return: seconds per call for each sample
+    :rtype list[float]:
+    """
+    function()  # warm up
+    loops = 1
+    while True:
+        start_time = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start_time
+        if elapsed >= MIN_SAMPLE_TIME:
+            break
+        loops *= 2
+
+    timings = [elapsed / loops]
+    for _ in range(samples - 1):
+        start_time = time.perf_counter()
+        for _ in range(loops):
+            function()
+        timings.append((time.perf_counter() - start_time) / loops)
+    return timings
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = (len(ordered) - 1) * percent / 100
+    lower = int(index)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (index - lower)
+
+
+def run(samples, only=None):
+    results = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "samples": samples,
+        "cases": {},
+    }
+    print(f"{'case':<32} {'size':>6} {'ops/s':>12} {'p50 us':>12} {'p90 us':>12} {'p99 us':>12}")
+    for name, size, function in build_cases():
+        if only and name not in only:
+            continue
+        timings = time_case(function, samples)
+        p50 = percentile(timings, 50)
+        result = {
+            "name": name,
+            "size": size,
+            "ops_per_sec": 1 / p50,
+            "p50_us": p50 * 1e6,
+            "p90_us": percentile(timings, 90) * 1e6,
+            "p99_us": percentile(timings, 99) * 1e6,
+            "mean_us": statistics.fmean(timings) * 1e6,
+        }
+        results["cases"][f"{name}[{size}]"] = result
+        print(f"{name:<32} {size:>6} {result['ops_per_sec']:>12.1f} {result['p50_us']:>12.1f} "
+              f"{result['p90_us']:>12.1f} {result['p99_us']:>12.1f}")
+    return results
+
+
+def compare(baseline, current, threshold):
+    """ Compares two saved runs by their median time per call.
+
+    :param threshold: fractional slowdown to flag, e.g. 0.1 for 10% slower
+    :return: names of the cases that regressed
+    :rtype list[str]:
+    """
+    regressions = []
+    print(f"{'case':<40} {'before us':>12} {'after us':>12} {'change':>8}")
+    for key, after in current["cases"].items():
+        before = baseline["cases"].get(key)
+        if before is None:
+            print(f"{key:<40} {'-':>12} {after['p50_us']:>12.1f} {'new':>8}")
+            continue
+        change = after["p50_us"] / before["p50_us"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<40} {before['p50_us']:>12.1f} {after['p50_us']:>12.1f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="time every case")
+    run_parser.add_argument("--output", help="file to save the results to as JSON")
+    run_parser.add_argument("--samples", type=int, default=20)
+    run_parser.add_argument("--only", nargs="+", help="names of the cases to run, e.g. ug4_hash")
+
+    compare_parser = commands.add_parser("compare", help="compare two saved runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="fractional slowdown counted as a regression (default 0.10)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = run(args.samples, args.only)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(results, file, indent=2)
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
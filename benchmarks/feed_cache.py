@@ -0,0 +1,63 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for the home feed cache
+File    : feed_cache.py
+Date    : Sunday 18 October 2026
+Desc.   : Serves the home page to anonymous clients through the test client, with the feed loaded for every request as
+          before, from db.feed_cache, and from the cache with an invalidation, as a new post would make, every 50
+          requests. Reports requests per second, how many times the feed was loaded from the database and the hit
+          ratio for each.
+          Run from the project root with `python -m benchmarks.feed_cache [requests]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import sys
+import threading
+import time
+
+import db
+from blog import app
+
+THREADS = [1, 4]
+INVALIDATE_EVERY = 50  # requests between invalidations in the "with writes" case
+
+
+def serve(requests, threads, invalidate_every=None):
+    def client_requests():
+        client = app.test_client()
+        for i in range(requests // threads):
+            client.get('/')
+            if invalidate_every and i % invalidate_every == invalidate_every - 1:
+                db.feed_cache.invalidate()
+
+    workers = [threading.Thread(target=client_requests) for _ in range(threads)]
+    start_time = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return requests // threads * threads / (time.perf_counter() - start_time)
+
+
+def main(requests):
+    cases = [("uncached", 0, None), ("cached", None, None), ("with writes", None, INVALIDATE_EVERY)]
+    app.test_client().get('/')  # warm up templates and connections
+    print(f"{'case':<12} {'threads':>8} {'req/s':>10} {'loads':>7} {'hit ratio':>10}")
+    for name, ttl, invalidate_every in cases:
+        for threads in THREADS:
+            db.configure_feed_cache(ttl)  # a ttl of 0 keeps nothing, so every request loads the feed
+            rate = serve(requests, threads, invalidate_every)
+            stats = db.feed_cache.stats()
+            print(f"{name:<12} {threads:>8} {rate:>10.1f} {stats['loads']:>7} {stats['hit_ratio']:>10.1%}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,55 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmarks for password hashing
+File    : hashing.py
+Date    : Sunday 18 October 2026
+Desc.   : Compares hashing a batch of salted passwords with ug4_hash() in a loop against ug4_hash_many().
+          Run from the project root with `python -m benchmarks.hashing [batch sizes...]`.
+History : 18/10/2026 - v1.0 - Scalar vs batch ug4 hashing.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import sys
+import time
+
+import auth
+
+
+def bench_scalar(passwords):
+    start_time = time.perf_counter()
+    hashes = [auth.ug4_hash(password) for password in passwords]
+    return hashes, time.perf_counter() - start_time
+
+
+def bench_batch(passwords):
+    start_time = time.perf_counter()
+    hashes = auth.ug4_hash_many(passwords)
+    return hashes, time.perf_counter() - start_time
+
+
+def main(batch_sizes):
+    print(f"{'batch':>8} {'scalar h/s':>12} {'batch h/s':>12} {'speedup':>8}")
+    for batch_size in batch_sizes:
+        passwords = ['apassword_1' + auth.generate_salt() for _ in range(batch_size)]
+
+        # the scalar path costs the same per hash at any size, so time a sample of it rather than the whole batch
+        sample = passwords[:min(batch_size, 10)]
+        scalar_hashes, scalar_time = bench_scalar(sample)
+        batch_hashes, batch_time = bench_batch(passwords)
+        if batch_hashes[:len(sample)] != scalar_hashes:
+            raise AssertionError("ug4_hash_many() gave a different result to ug4_hash()")
+
+        scalar_rate = len(sample) / scalar_time
+        batch_rate = batch_size / batch_time
+        print(f"{batch_size:>8} {scalar_rate:>12.1f} {batch_rate:>12.1f} {batch_rate / scalar_rate:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1, 10, 100, 1000])
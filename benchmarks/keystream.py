@@ -0,0 +1,56 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for the keystream cache
+File    : keystream.py
+Date    : Sunday 18 October 2026
+Desc.   : Times encrypting emails with the database key and nonce, and full db.get_user_id_from_email() lookups,
+          with the keystream for the pair generated every time and kept in blowfish.keystreams.
+          Run from the project root with `python -m benchmarks.keystream [lookups]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import sys
+import time
+
+import blowfish
+import db
+from blog import app
+from create_db import USERS
+
+
+def emails():
+    names = [name.lower() for name in USERS]
+    return ['%s.%s@fakeemailservice.abcde' % (name[0], name[name.index(' ') + 1:]) for name in names]
+
+
+def bench(function, addresses, lookups):
+    start_time = time.perf_counter()
+    for i in range(lookups):
+        function(addresses[i % len(addresses)])
+    return lookups / (time.perf_counter() - start_time)
+
+
+def main(lookups):
+    addresses = emails()
+    encrypt = lambda email: blowfish.encrypt(db.DBK, db.DBN, email)
+    print(f"{'workload':<28} {'generated/s':>12} {'cached/s':>12} {'speedup':>8}")
+    with app.app_context():
+        for name, function in (("encrypt email", encrypt), ("get_user_id_from_email", db.get_user_id_from_email)):
+            blowfish.unregister_keystream(db.DBK, db.DBN)
+            generated = bench(function, addresses, lookups)
+            blowfish.register_keystream(db.DBK, db.DBN)
+            cached = bench(function, addresses, lookups)
+            print(f"{name:<28} {generated:>12.1f} {cached:>12.1f} {cached / generated:>7.1f}x")
+    print(f"{blowfish.keystreams.size} bytes of keystream kept for {len(blowfish.keystreams)} key/nonce pair(s)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,102 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for counting failed logins
+File    : login_limiter.py
+Date    : Sunday 18 October 2026
+Desc.   : Replays a credential stuffing burst, failed logins spread over many IP addresses, through the lockout check
+          and attempt counting of the login route. Compares the loginattempts table, as the route used before (read the
+          lockout time, then insert, read and update the attempts in one transaction), against
+          ratelimit.LoginLimiter, and reports failed attempts per second for each.
+          Run from the project root with `python -m benchmarks.login_limiter [attempts] [ips]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import connections
+import ratelimit
+
+TARGET = 50000  # failed attempts per second the limiter should keep up with
+
+
+def database_attempt(conn, ip):
+    row = conn.execute('SELECT lockouttime FROM loginattempts WHERE ip =?', (ip,)).fetchone()
+    if row is not None and row[0] is not None:
+        lockout = datetime.datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S.%f')
+        if datetime.datetime.now() - datetime.timedelta(minutes=15) <= lockout:
+            return
+    with connections.transaction(conn):
+        conn.execute('INSERT INTO loginattempts (ip) VALUES (?) ON CONFLICT (ip) DO NOTHING', (ip,))
+        attempts = conn.execute('SELECT attempts FROM loginattempts WHERE ip =?', (ip,)).fetchone()[0] + 1
+        if attempts < 5:
+            conn.execute('UPDATE loginattempts SET attempts =? WHERE ip =?', (attempts, ip))
+        else:
+            conn.execute('UPDATE loginattempts SET lockouttime =? WHERE ip =?', (datetime.datetime.now(), ip))
+
+
+def limiter_attempt(limiter, ip):
+    if not limiter.locked_out(ip):
+        limiter.failed(ip)
+
+
+def save(conn, lockouts):
+    with connections.transaction(conn):
+        conn.executemany('INSERT INTO loginattempts (ip, attempts, lockouttime) VALUES (?, ?, ?) ON CONFLICT (ip) '
+                         'DO UPDATE SET attempts=excluded.attempts, lockouttime=excluded.lockouttime',
+                         [(ip, attempts, datetime.datetime.fromtimestamp(locked_at))
+                          for ip, (attempts, locked_at) in lockouts.items()])
+
+
+def main(attempts, ips):
+    addresses = [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(ips)]
+    burst = [addresses[i % ips] for i in range(attempts)]
+
+    directory = tempfile.mkdtemp()
+    try:
+        pool = connections.ConnectionPool(os.path.join(directory, "bench.sqlite"))
+        conn = pool.checkout()
+        conn.execute("CREATE TABLE loginattempts (ip integer UNIQUE, attempts INTEGER default 0, lockouttime TEXT)")
+        conn.commit()
+        database_burst = burst[:attempts // 10]  # a tenth of the burst, it takes long enough
+        start_time = time.perf_counter()
+        for ip in database_burst:
+            database_attempt(conn, ip)
+        database_rate = len(database_burst) / (time.perf_counter() - start_time)
+
+        limiter = ratelimit.LoginLimiter()
+        start_time = time.perf_counter()
+        for ip in burst:
+            limiter_attempt(limiter, ip)
+        limiter_rate = attempts / (time.perf_counter() - start_time)
+
+        # the lockouts saved by one flush of the background thread
+        start_time = time.perf_counter()
+        limiter.flush(lambda lockouts: save(conn, lockouts))
+        flush_ms = (time.perf_counter() - start_time) * 1000
+        pool.release(conn)
+        pool.close()
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{attempts} failed attempts from {ips} IPs")
+    print(f"{'loginattempts table':<24} {database_rate:>12.0f} attempts/s")
+    print(f"{'LoginLimiter':<24} {limiter_rate:>12.0f} attempts/s ({limiter_rate / database_rate:.0f}x, "
+          f"target {TARGET} {'met' if limiter_rate >= TARGET else 'missed'})")
+    print(f"{'':<24} {limiter.stats()['locked']:>12} IPs locked out, saved in one flush of {flush_ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500000, int(sys.argv[2]) if len(sys.argv) > 2 else 20000)
@@ -0,0 +1,63 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for login hashing throughput
+File    : logins.py
+Date    : Sunday 18 October 2026
+Desc.   : Measures how many login password hashes per second the hasher service completes for concurrent request
+          threads at different worker counts. The one second floor that db.get_login() pads itself to is left out,
+          since it would hide the CPU cost being measured.
+          Run from the project root with `python -m benchmarks.logins [worker counts...]`.
+History : 18/10/2026 - v1.0 - Logins/sec at 1, 2, 4 and 8 workers.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import os
+import sys
+import threading
+import time
+
+import auth
+import hasher
+
+LOGINS_PER_THREAD = 8
+
+
+def bench(workers):
+    service = hasher.HashingService(workers).start()
+    threads_count = workers * 2  # enough request threads to keep every worker busy
+    salt = auth.generate_salt()
+
+    def login():
+        for _ in range(LOGINS_PER_THREAD):
+            service.submit('apassword_1' + salt).result()
+
+    try:
+        service.submit('warm up the pool').result()
+        threads = [threading.Thread(target=login) for _ in range(threads_count)]
+        start_time = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start_time
+    finally:
+        service.shutdown()
+    return threads_count * LOGINS_PER_THREAD / elapsed
+
+
+def main(worker_counts):
+    print(f"{os.cpu_count()} CPU cores available")
+    print(f"{'workers':>8} {'logins/s':>10}")
+    for workers in worker_counts:
+        print(f"{workers:>8} {bench(workers):>10.1f}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1, 2, 4, 8])
@@ -0,0 +1,69 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for concurrent padded logins
+File    : padded_logins.py
+Date    : Sunday 18 October 2026
+Desc.   : Sends many failed logins at once through pacing.DeferredReleaseApp with a pool of 8 worker threads. Every
+          response is padded to the one second floor, but since the hold doesn't take a worker the whole burst
+          completes in little more than one floor. Each login comes from its own address so none are locked out.
+          Run from the project root with `python -m benchmarks.padded_logins [concurrent logins...]`.
+History : 18/10/2026 - v1.0 - Concurrent padded logins on 8 workers.
+          18/10/2026 - v1.1 - Failed attempts are cleared from the login limiter rather than the database
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.1"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import asyncio
+import sys
+import time
+from urllib.parse import urlencode
+
+import pacing
+from blog import app, login_limiter
+
+WORKERS = 8
+
+
+async def login(asgi_app, ip):
+    body = urlencode({'email': 'not.a.user@fakeemailservice.abcde', 'password': 'apassword_1'}).encode()
+    scope = {'type': 'http', 'method': 'POST', 'path': '/login/', 'query_string': b'', 'client': (ip, 5000),
+             'headers': [(b'content-type', b'application/x-www-form-urlencoded')]}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    start_time = time.perf_counter()
+    await asgi_app(scope, receive, send)
+    return time.perf_counter() - start_time
+
+
+async def burst(asgi_app, concurrent):
+    ips = [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(concurrent)]
+    start_time = time.perf_counter()
+    latencies = await asyncio.gather(*(login(asgi_app, ip) for ip in ips))
+    return time.perf_counter() - start_time, min(latencies), ips
+
+
+def main(concurrency_levels):
+    asgi_app = pacing.DeferredReleaseApp(app, workers=WORKERS)
+    print(f"{WORKERS} worker threads")
+    print(f"{'logins':>8} {'elapsed s':>10} {'min latency s':>14} {'logins/s':>9}")
+    for concurrent in concurrency_levels:
+        elapsed, fastest, ips = asyncio.run(burst(asgi_app, concurrent))
+        print(f"{concurrent:>8} {elapsed:>10.2f} {fastest:>14.2f} {concurrent / elapsed:>9.1f}")
+        for ip in ips:
+            login_limiter.succeeded(ip)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [8, 100, 500])
@@ -0,0 +1,83 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for paging through posts
+File    : pagination.py
+Date    : Sunday 18 October 2026
+Desc.   : Fills a scratch database with one prolific user's posts and times reading a page of their posts at increasing
+          depths with LIMIT/OFFSET against db.get_posts() with an older= cursor, alongside reading their whole
+          history as the user page did before it was paged.
+          Run from the project root with `python -m benchmarks.pagination [posts]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import connections
+import db
+from blog import app
+
+RUNS = 20
+
+
+def timed(function):
+    start_time = time.perf_counter()
+    for _ in range(RUNS):
+        function()
+    return (time.perf_counter() - start_time) / RUNS * 1000
+
+
+def main(posts):
+    directory = tempfile.mkdtemp()
+    original_pool = db.pool
+    try:
+        db.pool = connections.ConnectionPool(os.path.join(directory, "bench.sqlite"), row_factory=db.make_dicts)
+        conn = db.pool.checkout()
+        conn.execute("CREATE TABLE posts (creator integer, date INTEGER, title TEXT, content TEXT)")
+        conn.executemany("INSERT INTO posts VALUES (0, ?, ?, 'some content')",
+                         ((1600000000 + i * 60.5, f"post {i}") for i in range(posts)))
+        conn.execute("CREATE INDEX user_posts on posts (creator,date)")
+        conn.commit()
+        db.pool.release(conn)
+
+        with app.app_context():
+            whole_history = timed(lambda: db.query_db('SELECT date, title, content FROM posts WHERE creator=? '
+                                                      'ORDER BY date DESC', (0,)))
+            print(f"whole history of {posts} posts: {whole_history:.2f} ms\n")
+            print(f"{'depth':>8} {'offset ms':>10} {'cursor ms':>10}")
+            first_page = db.get_posts(0)
+            depth = 0
+            while depth < posts:
+                if depth:
+                    # the cursor of the post just before the page, as the older link on the page before would give
+                    newer_post = db.query_db('SELECT rowid AS id, date FROM posts WHERE creator=? '
+                                             'ORDER BY date DESC, rowid DESC LIMIT 1 OFFSET ?', (0, depth - 1), one=True)
+                    cursor = db.page_cursor(newer_post)
+                else:
+                    cursor = None
+                offset = timed(lambda: db.query_db('SELECT rowid AS id, date, title, content FROM posts WHERE creator=? '
+                                                   'ORDER BY date DESC, rowid DESC LIMIT ? OFFSET ?',
+                                                   (0, db.POSTS_PER_PAGE, depth)))
+                keyset = timed(lambda: db.get_posts(0, older=cursor))
+                assert cursor is None or first_page != db.get_posts(0, older=cursor)
+                print(f"{depth:>8} {offset:>10.3f} {keyset:>10.3f}")
+                depth = depth * 10 if depth else 100
+    finally:
+        db.pool.close()
+        db.pool = original_pool
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
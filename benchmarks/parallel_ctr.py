@@ -0,0 +1,53 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for parallel counter mode
+File    : parallel_ctr.py
+Date    : Sunday 18 October 2026
+Desc.   : Reports counter mode encryption throughput in MB/s for large payloads, generating the keystream serially and
+          on the keystream pool with 1, 2 and 4 workers and one per CPU core.
+          Run from the project root with `python -m benchmarks.parallel_ctr [megabytes ...]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import os
+import sys
+import time
+
+import blowfish
+
+KEY = "thisisasecretkey"
+NONCE = 4162467955
+
+
+def throughput(data):
+    start_time = time.perf_counter()
+    blowfish.encrypt_bytes(KEY, NONCE, data)
+    return len(data) / (time.perf_counter() - start_time) / 1e6
+
+
+def main(sizes):
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    print(f"{os.cpu_count()} CPU core(s)")
+    print(f"{'size MB':>8} {'serial MB/s':>12}" + ''.join(f"{f'{n} worker MB/s':>16}" for n in worker_counts))
+    for size in sizes:
+        data = os.urandom(int(size * 1024 * 1024))
+        blowfish.stop_keystream_pool()
+        row = f"{size:>8} {throughput(data):>12.2f}"
+        for workers in worker_counts:
+            blowfish.start_keystream_pool(workers).generate(blowfish.CTR(blowfish.get_cipher(KEY), NONCE),
+                                                            blowfish.PARALLEL_MIN_BYTES)  # warm up the workers
+            row += f"{throughput(data):>16.2f}"
+        print(row)
+    blowfish.stop_keystream_pool()
+
+
+if __name__ == '__main__':
+    main([float(size) for size in sys.argv[1:]] or [0.25, 1, 4])
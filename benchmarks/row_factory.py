@@ -0,0 +1,72 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for building result rows
+File    : row_factory.py
+Date    : Sunday 18 October 2026
+Desc.   : Times reading a large result set into row dicts with the row factory that looked up each column's name from
+          cursor.description for every value, the current db.make_dicts() and sqlite3.Row for comparison, then the
+          same query read with db.query_db() against db.iter_db().
+          Run from the project root with `python -m benchmarks.row_factory [rows]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+import db
+from blog import app
+
+QUERY = "WITH RECURSIVE series(value) AS (SELECT 1 UNION ALL SELECT value + 1 FROM series WHERE value < ?) " \
+        "SELECT value AS id, 'title ' || value AS title, 'content' AS content, value * 60 AS date, 0 AS creator " \
+        "FROM series"
+
+
+def make_dicts_per_value(cursor, row):
+    return dict((cursor.description[idx][0], value)
+                for idx, value in enumerate(row))
+
+
+def timed(function):
+    start_time = time.perf_counter()
+    function()
+    return (time.perf_counter() - start_time) * 1000
+
+
+def peak_memory(function):
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main(rows):
+    conn = sqlite3.connect(":memory:")
+    print(f"{'row factory':<24} {'ms for ' + str(rows) + ' rows':>16}")
+    for name, factory in (("per value lookup", make_dicts_per_value), ("db.make_dicts", db.make_dicts),
+                          ("sqlite3.Row", sqlite3.Row)):
+        conn.row_factory = factory
+        print(f"{name:<24} {timed(lambda: conn.execute(QUERY, (rows,)).fetchall()):>16.1f}")
+
+    def count(results):
+        return sum(1 for _ in results)
+
+    print(f"\n{'reading with':<24} {'ms':>8} {'peak KiB':>10}")
+    with app.app_context():
+        for name, read in (("db.query_db", lambda: count(db.query_db(QUERY, (rows,)))),
+                           ("db.iter_db", lambda: count(db.iter_db(QUERY, (rows,))))):
+            print(f"{name:<24} {timed(read):>8.1f} {peak_memory(read):>10.0f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,104 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for the search page
+File    : search.py
+Date    : Sunday 18 October 2026
+Desc.   : Fills a scratch database, with the search indexes of db.SEARCH_SCHEMA, with generated users and posts. Times
+          db.get_users() against the username LIKE scan it replaced, and db.search_posts(), for rare and common terms.
+          Run from the project root with `python -m benchmarks.search [users] [posts]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import connections
+import db
+from blog import app
+
+RUNS = 20
+SYLLABLES = ["ka", "ri", "mo", "ten", "sa", "lo", "vin", "du", "pe", "ha", "zu", "nor", "el", "bi", "qua", "sty"]
+
+
+def word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randrange(2, 5)))
+
+
+def timed(function):
+    start_time = time.perf_counter()
+    for _ in range(RUNS):
+        function()
+    return (time.perf_counter() - start_time) / RUNS * 1000
+
+
+def build(conn, users, posts, rng):
+    conn.execute("CREATE TABLE users (userid integer PRIMARY KEY, username VARCHAR(32))")
+    conn.execute("CREATE TABLE posts (creator integer, date INTEGER, title TEXT, content TEXT)")
+    conn.execute("CREATE INDEX user_username on users (username)")
+    for statement in db.SEARCH_SCHEMA:
+        conn.execute(statement)
+    conn.executemany("INSERT INTO users VALUES (?, ?)", ((i, f"{word(rng)}{i}") for i in range(users)))
+    vocabulary = [word(rng) for _ in range(20000)]
+    # a few common words, many rare ones
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    for start in range(0, posts, 100000):
+        rows = []
+        for rowid in range(start + 1, min(posts, start + 100000) + 1):
+            title = ' '.join(rng.choices(vocabulary, cum_weights=weights, k=3))
+            content = ' '.join(rng.choices(vocabulary, cum_weights=weights, k=30))
+            rows.append((rowid, rng.randrange(users), 1600000000 + rowid, title, content))
+        conn.executemany("INSERT INTO posts (rowid, creator, date, title, content) VALUES (?, ?, ?, ?, ?)",
+                         rows)
+        conn.executemany("INSERT INTO post_search (rowid, title, content) VALUES (?, ?, ?)",
+                         ((row[0],) + row[3:] for row in rows))
+        conn.commit()
+    return vocabulary
+
+
+def main(users, posts):
+    rng = random.Random(22)
+    directory = tempfile.mkdtemp()
+    original_pool = db.pool
+    try:
+        db.pool = connections.ConnectionPool(os.path.join(directory, "bench.sqlite"), row_factory=db.make_dicts)
+        conn = db.pool.checkout()
+        start_time = time.perf_counter()
+        vocabulary = build(conn, users, posts, rng)
+        db.pool.release(conn)
+        print(f"built {users} users and {posts} posts in {time.perf_counter() - start_time:.0f} s\n")
+
+        usernames = [("rare", "qua" + SYLLABLES[7] + "99"), ("common", "ka"), ("common", "rimo"), ("missing", "xyz")]
+        words = [("rare", vocabulary[-1]), ("common", vocabulary[0]), ("two common", f"{vocabulary[0]} {vocabulary[1]}"),
+                 ("two words", f"{vocabulary[1]} {vocabulary[40]}")]
+        with app.app_context():
+            print(f"{'users':<10} {'term':<16} {'LIKE ms':>10} {'fts ms':>10}")
+            for kind, term in usernames:
+                like = timed(lambda: db.query_db("SELECT username FROM users WHERE username LIKE ? LIMIT 20",
+                                                 ('%' + term + '%',)))
+                print(f"{kind:<10} {term:<16} {like:>10.2f} {timed(lambda: db.get_users(term)):>10.2f}")
+
+            print(f"\n{'posts':<10} {'term':<24} {'fts ms':>10} {'results':>8}")
+            for kind, term in words:
+                found = len(db.search_posts(term)[0])
+                print(f"{kind:<10} {term:<24} {timed(lambda: db.search_posts(term)):>10.2f} {found:>8}")
+    finally:
+        db.pool.close()
+        db.pool = original_pool
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000, int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
@@ -0,0 +1,69 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for grouping a request's writes into one transaction
+File    : transactions.py
+Date    : Sunday 18 October 2026
+Desc.   : Times the database work of a failed login (insert the IP, read its attempts, update them) with a commit
+          after each statement against one connections.transaction(), on a scratch database with the pool's pragma
+          profile, at synchronous=NORMAL and synchronous=FULL. With FULL every commit waits for an fsync.
+          Run from the project root with `python -m benchmarks.transactions [logins]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import connections
+
+
+def failed_login(conn, ip, commit):
+    conn.execute('INSERT INTO loginattempts (ip) VALUES (?) ON CONFLICT (ip) DO NOTHING', (ip,))
+    commit()
+    attempts = conn.execute('SELECT attempts FROM loginattempts WHERE ip =?', (ip,)).fetchone()[0]
+    conn.execute('UPDATE loginattempts SET attempts =? WHERE ip =?', ((attempts + 1) % 5, ip))
+    commit()
+
+
+def main(logins):
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "bench.sqlite")
+        print(f"{'synchronous':<12} {'commit per statement ms':>24} {'transaction ms':>15} {'speedup':>8}")
+        for synchronous in ("NORMAL", "FULL"):
+            pool = connections.ConnectionPool(path, pragmas=dict(connections.DEFAULT_PRAGMAS, synchronous=synchronous))
+            conn = pool.checkout()
+            conn.execute("DROP TABLE IF EXISTS loginattempts")
+            conn.execute("CREATE TABLE loginattempts (ip integer UNIQUE, attempts INTEGER default 0, lockouttime TEXT)")
+            conn.commit()
+
+            start_time = time.perf_counter()
+            for i in range(logins):
+                failed_login(conn, i % 50, conn.commit)
+            per_statement = (time.perf_counter() - start_time) * 1000
+
+            start_time = time.perf_counter()
+            for i in range(logins):
+                with connections.transaction(conn):
+                    failed_login(conn, i % 50, lambda: None)
+            grouped = (time.perf_counter() - start_time) * 1000
+
+            print(f"{synchronous:<12} {per_statement:>24.1f} {grouped:>15.1f} {per_statement / grouped:>7.2f}x")
+            pool.release(conn)
+            pool.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,90 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Benchmark for weak password lookups
+File    : weak_passwords.py
+Date    : Sunday 18 October 2026
+Desc.   : Writes a generated list of weak passwords and times checking a password against it by reading the file line
+          by line, as db.is_weak_password() did before, against the weakpasswords set and the compiled, memory mapped,
+          hash prefix file. Also reports how long the list takes to compile and to load.
+          Run from the project root with `python -m benchmarks.weak_passwords [entries]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Development"
+
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+
+import weakpasswords
+
+LOOKUPS = 10000
+
+
+def line_scan(path, password):
+    with open(path, 'r') as file:
+        for line in file:
+            if password == line.strip("\n"):
+                return True
+    return False
+
+
+def per_lookup_us(function, passwords):
+    start_time = time.perf_counter()
+    for password in passwords:
+        function(password)
+    return (time.perf_counter() - start_time) / len(passwords) * 1000000
+
+
+def main(entries):
+    rng = random.Random(24)
+    listed = [''.join(rng.choices(string.ascii_letters + string.digits, k=rng.randrange(8, 16)))
+              for _ in range(entries)]
+    lookups = [rng.choice(listed) if i % 2 else f"not listed {i}" for i in range(LOOKUPS)]  # half hits
+
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, "passwords.txt")
+        target = os.path.join(directory, "passwords.bin")
+        with open(source, 'w') as file:
+            file.writelines(password + "\n" for password in listed)
+
+        start_time = time.perf_counter()
+        weakpasswords.build(source, target)
+        build_s = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        password_set = weakpasswords.load(source)
+        set_load_ms = (time.perf_counter() - start_time) * 1000
+        start_time = time.perf_counter()
+        prefix_file = weakpasswords.load(target)
+        file_load_ms = (time.perf_counter() - start_time) * 1000
+
+        scan_us = per_lookup_us(lambda password: line_scan(source, password), lookups[:20])
+        set_us = per_lookup_us(password_set.__contains__, lookups)
+        file_us = per_lookup_us(prefix_file.__contains__, lookups)
+        assert all(password in prefix_file for password in lookups[1::2])
+        prefix_file.close()
+
+        print(f"{entries} passwords, {os.path.getsize(source) / 1e6:.1f} MB as text, "
+              f"{os.path.getsize(target) / 1e6:.1f} MB compiled in {build_s:.1f} s\n")
+        print(f"{'lookup':<24} {'load ms':>10} {'us per check':>14}")
+        print(f"{'line by line':<24} {'-':>10} {scan_us:>14.1f}")
+        print(f"{'PasswordSet':<24} {set_load_ms:>10.1f} {set_us:>14.2f}")
+        print(f"{'HashPrefixFile':<24} {file_load_ms:>10.1f} {file_us:>14.2f}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -9,12 +9,24 @@ History : 25/03/2021 - v1.0 - Load basic project file.
           01/04/2021 - v1.1 - Added 2fa system
           04/04/2021 - v1.2 - Added lockout system for login
           06/04/2021 - v1.3 - Adjustments made for validation, moved secret key to EnvVar
+          18/10/2026 - v1.4 - Start the password hashing process pool with the app
+          18/10/2026 - v1.5 - Padded responses are held by pacing.ReleaseMiddleware
+          18/10/2026 - v1.6 - Init steps are timed by startup, fast start defers calibration and the hashing service
+          18/10/2026 - v1.7 - Database connections are given back to the pool after each request
+          18/10/2026 - v1.8 - Login, two factor and reset code checks write in one transaction each
+          18/10/2026 - v1.9 - Failed logins are counted by ratelimit rather than in the database
+          18/10/2026 - v1.10 - Home feed and user pages are paged with older/newer links
+          18/10/2026 - v1.11 - Search finds posts as well as users
+          18/10/2026 - v1.12 - The weak password list is loaded at startup
+          18/10/2026 - v1.13 - The home feed is served from db.feed_cache
+          18/10/2026 - v1.14 - Adds the post_nonces table at startup if the database has none
+          18/10/2026 - v1.15 - Two factor checks log and render after their transaction commits
 """
 
 __author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
 __copyright__ = "Copyright 2021, CMP-UG4"
 __credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
-__version__ = "1.3"
+__version__ = "1.15"
 __email__ = "gny17hvu@uea.ac.uk"
 __status__ = "Production"  # or "Development"
 
@@ -22,13 +34,17 @@ import datetime
 import re
 from functools import wraps
 
-from dotenv import load_dotenv
-from flask import Flask, g, render_template, redirect, request, session, url_for, flash
+from flask import Flask, render_template, redirect, request, session, url_for, flash
 
 import auth
 import blowfish
+import config
 import db
 import emailer
+import hasher
+import pacing
+import ratelimit
+import startup
 from db import get_email
 import blogging
 
@@ -37,8 +53,29 @@ app = Flask(__name__)
 host = "127.0.0.1"
 port = "5000"
 
-load_dotenv(override=True)
-auth.configure_app(app)
+with startup.step("configure app"):
+    auth.configure_app(app)
+app.logger.info("Decrypted %(decrypted)d secrets in %(seconds).4fs at startup", config.stats())
+
+# with fast start, db.hash_iterations() calibrates the first time a password is hashed instead
+if app.config["HASH_TARGET_TIME"] and not app.config["FAST_START"]:
+    with startup.step("calibrate hash iterations"):
+        db.calibrate_hash_iterations(app.config)
+with startup.step("open database pool"):
+    db.configure_pool(app.config["DB_POOL_SIZE"], app.config["SQLITE_PRAGMAS"])
+    db.create_indexes()
+    db.create_search_index()
+    db.create_post_nonces()
+    db.configure_feed_cache(app.config["FEED_CACHE_TTL"], app.config["FEED_CACHE_DIR"])
+with startup.step("load weak passwords"):
+    db.load_weak_passwords(app.config["WEAK_PASSWORDS"])
+with startup.step("start hashing service"):
+    hasher.start(app.config["HASH_WORKERS"], app.config["HASH_QUEUE_SIZE"], lazy=app.config["FAST_START"])
+with startup.step("load login lockouts"):
+    login_limiter = ratelimit.LoginLimiter()
+    login_limiter.load(db.load_lockouts(login_limiter.clock() - login_limiter.window))
+    login_limiter.start(db.save_lockouts)
+app.wsgi_app = pacing.ReleaseMiddleware(app.wsgi_app)  # hold padded responses when not served by asgi.py
 
 
 def std_context(f):
@@ -59,23 +96,29 @@ def std_context(f):
 # I believe this remains here for Flask reasons -MS
 @app.teardown_appcontext
 def close_connection(exception):
-    database = getattr(g, '_database', None)
-    if database is not None:
-        database.close()
+    db.release_db()  # kept open for the next request rather than closed
+    db.lookup_keys.purge()  # drop any looked up emails that have been kept for too long
 
 
 @app.route('/')
 @std_context
 def index():
-    posts = db.get_all_posts()
+    older, newer = request.args.get('older'), request.args.get('newer')
 
     def fix(item):
         item['date'] = datetime.datetime.fromtimestamp(item['date']).strftime('%Y-%m-%d %H:%M')
         item['content'] = '%s...' % (item['content'][:200])
         return item
 
+    def load_page():
+        posts = db.get_all_posts(excerpt_length=200, older=older, newer=newer)
+        return {'posts': [fix(post) for post in posts], 'older': posts.older, 'newer': posts.newer}
+
+    # keyed on the parsed cursors, so a cursor that isn't one shares the first page's entry
+    page = db.feed_cache.get((db.parse_page_cursor(older), db.parse_page_cursor(newer)), load_page)
     context = request.context
-    context['posts'] = map(fix, posts)
+    context['posts'] = page['posts']
+    context['older'], context['newer'] = page['older'], page['newer']
     return render_template('blog/index.html', **context)
 
 
@@ -91,8 +134,10 @@ def users_posts(uname=None):
             item['date'] = datetime.datetime.fromtimestamp(item['date']).strftime('%Y-%m-%d %H:%M')
             return item
 
+        posts = db.get_posts(cid, older=request.args.get('older'), newer=request.args.get('newer'))
         context = request.context
-        context['posts'] = map(fix, db.get_posts(cid))
+        context['posts'] = map(fix, posts)
+        context['older'], context['newer'] = posts.older, posts.newer
         # CS: if the currently logged in user is viewing their own posts
         if session:
             if session['userid'] == cid:
@@ -151,15 +196,10 @@ def login():
     ip_address = request.remote_addr
 
     # check if they are locked out
-    lockout = db.get_lockout_time(ip_address)
-    if lockout is not None:
-        current_time = datetime.datetime.now()
-        delta = datetime.timedelta(minutes=15)
-
-        if (current_time - delta) <= lockout:
-            blogging.log_user_activity_unhappy("None", request.remote_addr,
-                                               "Login failure (IP locked out)")
-            return redirect(url_for('login_fail', error='You are still locked out.'))
+    if login_limiter.locked_out(ip_address):
+        blogging.log_user_activity_unhappy("None", request.remote_addr,
+                                           "Login failure (IP locked out)")
+        return redirect(url_for('login_fail', error='You are still locked out.'))
 
     email = request.form.get('email', '')
     password = request.form.get('password', '')
@@ -167,7 +207,7 @@ def login():
 
     if user_id is not None and username is not None:
         # valid session
-        db.del_from_db("DELETE FROM loginattempts WHERE ip=?", (ip_address, ))  # no need to continue tracking this
+        login_limiter.succeeded(ip_address)  # no need to continue tracking this
 
         session['userid'] = user_id
         session['username'] = username
@@ -185,37 +225,16 @@ def login():
                                                "Login success")
         return redirect(url_for(url))
 
-    # CS: Insert IP into db if it doesn't exist
-    db.insert_db('INSERT INTO loginattempts (ip) VALUES (?) ON CONFLICT (ip) DO NOTHING', (ip_address,))
-
-    # CS: Update loginattempts for this IP
-    login_attempts = db.query_db('SELECT attempts FROM loginattempts WHERE ip =?', (ip_address,), one=True)['attempts']
-    login_attempts += 1
-
-    if login_attempts < 5:
-        db.update_db('UPDATE loginattempts SET attempts =? WHERE ip =?', (login_attempts, ip_address))
-        remaining_logins = 5 - login_attempts
+    # CS: Count the failed attempt for this IP, locking it out for 15 minutes on the 5th
+    remaining_logins = login_limiter.failed(ip_address)
+    if remaining_logins:
         blogging.log_user_activity_unhappy(user_id, request.remote_addr,
                                            "Login failure (incorrect details)")
         return redirect(url_for('login_fail', error=f'Incorrect Login Details, {remaining_logins} attempts remaining.'))
 
-    # CS: Check lockout time for this IP
-    lockout_time = db.get_lockout_time(ip_address)
-    current_time = datetime.datetime.now()
-    delta = datetime.timedelta(minutes=15)
-
-    if lockout_time is None or (current_time - delta) <= lockout_time:
-        # CS: Set lockout time to current time
-        db.update_db('UPDATE loginattempts SET lockouttime =? WHERE ip =?', (current_time, ip_address))
-        blogging.log_user_activity_unhappy(user_id, request.remote_addr,
-                                           "Login lockout (too many attempts)")
-        return redirect(url_for('login_fail', error='Too many login attempts. Login disabled for 15 minutes.'))
-    else:
-        # CS: Reset the attempts for this IP if it's been more than 15 mins
-        db.update_db('UPDATE loginattempts SET attempts =? WHERE ip =?', (1, ip_address))
-        blogging.log_user_activity_unhappy(user_id, request.remote_addr,
-                                           "Login failure (incorrect details)")
-        return redirect(url_for('login_fail', error='Incorrect Login Details, 4 attempts remaining.'))
+    blogging.log_user_activity_unhappy(user_id, request.remote_addr,
+                                       "Login lockout (too many attempts)")
+    return redirect(url_for('login_fail', error='Too many login attempts. Login disabled for 15 minutes.'))
 
 
 @app.route("/confirmation/", methods=['GET', 'POST'])
@@ -235,35 +254,39 @@ def verify_code():
                                            "Two factor entry failure (code invalid)")
         return render_template('auth/two_factor.html', error='Code is invalid, please try again.')
 
-    # find the two-factor code in the database for this user
-    two_factor = db.get_two_factor(uid)
-
-    # if we're out of time, kick them back to the login screen
-    original_time = two_factor['timestamp']
-    if not db.within_time_limit(original_time):
-        blogging.log_user_activity_unhappy(uid, request.remote_addr,
-                                           "Two factor entry failure (code expired)")
-        return render_template('auth/login_fail.html', error='Code has expired. Please login again')
-
-    # check the given code and fail them if it doesn't match
-    attempts_remaining = two_factor['attempts']
-    db_code = two_factor['code']
+    # the code is checked and its attempts counted or it is used up in one transaction, so guesses sent at once are
+    # counted one after another. Only the database work is in it, the failure is logged and rendered once it commits
+    failure = None  # (log reason or None, template, error) if the code isn't accepted
+    with db.transaction():
+        # find the two-factor code in the database for this user
+        two_factor = db.get_two_factor(uid)
+        attempts_remaining = two_factor['attempts']
+
+        # if we're out of time, kick them back to the login screen
+        if not db.within_time_limit(two_factor['timestamp']):
+            failure = ("code expired", 'auth/login_fail.html', 'Code has expired. Please login again')
+
+        # check the given code and fail them if it doesn't match
+        elif user_code.string != two_factor['code']:
+            # if they're on the last attempt and got it wrong, kick them back to the login. Lockout too, perhaps?
+            if attempts_remaining == 1:
+                db.del_two_factor(uid)  # remove this 2fa from the db to prevent possible attacks
+                failure = ("too many attempts", 'auth/login_fail.html', 'Too many failed attempts')
+            else:
+                db.tick_down_two_factor_attempts(uid)
+                failure = (None, 'auth/two_factor.html', f'Incorrect code. Attempts remaining {attempts_remaining - 1}')
 
-    if user_code.string != db_code:
-        # if they're on the last attempt and got it wrong, kick them back to the login. Lockout too, perhaps?
-        if attempts_remaining == 1:
-            db.del_two_factor(uid)  # remove this 2fa from the db to prevent possible attacks
-            blogging.log_user_activity_unhappy(uid, request.remote_addr,
-                                               "Two factor entry failure (too many attempts)")
-            return render_template('auth/login_fail.html', error='Too many failed attempts')
+        else:
+            db.del_two_factor(uid)  # remove that code from the db since it's been used
 
-        db.tick_down_two_factor_attempts(uid)
-        error = f'Incorrect code. Attempts remaining {attempts_remaining - 1}'
-        return render_template('auth/two_factor.html', error=error)
+    if failure is not None:
+        reason, template, error = failure
+        if reason is not None:
+            blogging.log_user_activity_unhappy(uid, request.remote_addr, f"Two factor entry failure ({reason})")
+        return render_template(template, error=error)
 
     # success
     session['validated'] = True
-    db.del_two_factor(uid)  # remove that code from the db since it's been used
     session['nonce'] = blowfish.get_nonce()
     cipher = blowfish.decrypt(app.secret_key, session['nonce'], uid)
     session['CSRFtoken'] = cipher
@@ -383,10 +406,14 @@ def enter_reset():
     if not code:
         code = request.form.get('code', '')
 
-    success = db.validate_reset_code(email, code)
-    within_time = False
-    if email:
-        within_time = db.user_reset_code_within_time_limit(db.get_user_id_from_email(email))
+    # an expired code is deleted in the same transaction it was checked in, so a new code requested meanwhile is kept
+    with db.transaction():
+        success = db.validate_reset_code(email, code)
+        within_time = False
+        if email:
+            within_time = db.user_reset_code_within_time_limit(db.get_user_id_from_email(email))
+        if success and not within_time:
+            db.delete_reset_code(email)
     message = ""
     if success:
         if within_time:
@@ -399,7 +426,6 @@ def enter_reset():
                                              "User reset stage2 (code) failure (code expired)")
 
             message = "That code has expired please start a new reset request!"
-        db.delete_reset_code(email)
     if not (email or code):
         blogging.log_user_activity_unhappy(db.get_user_id_from_email(email), request.remote_addr,
                                            "User reset stage2 (code) failure (code invalid)")
@@ -449,8 +475,10 @@ def search_page():
     search = request.args.get('s', '')
 
     users, validated_search = db.get_users(search)
+    posts, _ = db.search_posts(search)
     # for user in users:
     context['users'] = users
+    context['posts'] = posts
     context['query'] = validated_search
     return render_template('blog/search_results.html', **context)
 
@@ -15,19 +15,46 @@ History : 09/04/2021 - v1.0 - Create project file.
           27/04/2021 - v1.5 - Removed generation of P and S boxes using encryption method, only sub-keys from P-boxes
                               are generated.
           27/04/2021 - v1.6 - Added helper / wrapper functions for encrypt and decrypt
+          18/10/2026 - v1.7 - Key schedule is stored per instance, helpers reuse ciphers from a bounded cache
+          18/10/2026 - v1.8 - Bytes API for counter mode working on whole 64 bit blocks, flat S-boxes in the rounds
+          18/10/2026 - v1.9 - Keystream cache for keys and nonces used for many messages
+          18/10/2026 - v1.10 - EncryptionMemo to reuse ciphertexts of values that are looked up repeatedly
+          18/10/2026 - v1.11 - Long keystreams can be generated in parallel on a process pool
+          18/10/2026 - v1.12 - Streaming encryption of file-like objects, with decryption from any offset
+          18/10/2026 - v1.13 - encrypt_many() and decrypt_many() share one keystream across many messages
+          18/10/2026 - v1.14 - The process pool executor is only imported when a keystream pool is started
+          18/10/2026 - v1.15 - KeystreamPool's life cycle comes from workerpool.WorkerPool
 """
 
 __author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
 __copyright__ = "Copyright 2021, CMP-UG4"
 __credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
-__version__ = "1.6"
+__version__ = "1.15"
 __email__ = "yea18qyu@uea.ac.uk"
 __status__ = "Production"  # or "Development"
 
+import collections
+import functools
+import threading
+import time
 import uuid
+
 import constants
+import workerpool
+
+CIPHER_CACHE_SIZE = 32  # most distinct keys to keep ready-made ciphers for, see get_cipher()
+BLOCK_SIZE = 8  # bytes
+KEYSTREAM_BLOCKS = 32  # keystream generated for a registered key and nonce, 256 bytes covers most fields
+KEYSTREAM_MAX_BYTES = 64 * 1024  # most keystream kept for one key and nonce
+KEYSTREAM_MAX_PAIRS = 8
+ENCRYPTION_MEMO_SIZE = 1024  # most ciphertexts an EncryptionMemo remembers
+ENCRYPTION_MEMO_TTL = 60  # seconds an EncryptionMemo keeps a plain text value
+PARALLEL_MIN_BYTES = 256 * 1024  # shorter keystreams are generated serially, the pool overhead isn't worth it
+PARALLEL_SEGMENT_BYTES = 64 * 1024  # keystream generated by a worker process per task
+STREAM_CHUNK_SIZE = 64 * 1024  # bytes read at a time by the streaming functions
 
-new_p_box = [None] * 18
+# each S-box as its own flat tuple so the rounds only index once per lookup
+S_BOX_0, S_BOX_1, S_BOX_2, S_BOX_3 = (tuple(s_box) for s_box in constants.s_box)
 
 
 class BlowyFishy:
@@ -38,13 +65,18 @@ class BlowyFishy:
             raise Exception("Key length must be between 32 - 448 bits long.")
         element = 0
         key_length = len(self.key)
+        p_box = []
         for i in range(len(constants.p_box)):
             input_key = (ord(self.key[element % key_length]) << 24) + (ord(self.key[(element + 1) % key_length]) << 16)\
                         + (ord(self.key[(element + 2) % key_length]) << 8) + ord(self.key[(element + 3) % key_length])
 
-            new_p_box[i] = constants.p_box[i] ^ input_key
+            p_box.append(constants.p_box[i] ^ input_key)
             element += 4
 
+        # the key schedule belongs to this instance and never changes, so one cipher can be shared between threads
+        self.p_box = tuple(p_box)
+        self._round_pairs = tuple(zip(self.p_box[0:16:2], self.p_box[1:16:2]))
+
     def encrypt(self, lhs, rhs):
         """Encrypts a block size of 64 bit plain text using Blowfish
         :param int lhs: 32 Bits of left hand side
@@ -52,14 +84,16 @@ class BlowyFishy:
 
         :returns: int tuple of left and right hand side
         """
-        for i in range(16):
-            lhs ^= new_p_box[i]
-            rhs ^= self.f_func(lhs)
-            lhs, rhs = rhs, lhs
-        lhs ^= new_p_box[16]
-        rhs ^= new_p_box[17]
-        lhs, rhs = rhs, lhs
-        return lhs, rhs
+        s0, s1, s2, s3 = S_BOX_0, S_BOX_1, S_BOX_2, S_BOX_3
+        # two rounds at a time so the halves don't need swapping between rounds. F-function inlined, see f_func()
+        for p_even, p_odd in self._round_pairs:
+            lhs ^= p_even
+            f_out = (s0[(lhs >> 24) & 0xff] + s1[(lhs >> 16) & 0xff]) & 0xffffffff
+            rhs ^= ((f_out ^ s2[(lhs >> 8) & 0xff]) + s3[lhs & 0xff]) & 0xffffffff
+            rhs ^= p_odd
+            f_out = (s0[(rhs >> 24) & 0xff] + s1[(rhs >> 16) & 0xff]) & 0xffffffff
+            lhs ^= ((f_out ^ s2[(rhs >> 8) & 0xff]) + s3[rhs & 0xff]) & 0xffffffff
+        return rhs ^ self.p_box[17], lhs ^ self.p_box[16]
 
     def f_func(self, xor_data):
         """F-function splits 32 bit input into 4 parts
@@ -73,9 +107,9 @@ class BlowyFishy:
         cp2 = (xor_data & 0x0000ff00) >> 8
         cp3 = xor_data & 0x000000ff
 
-        f_out = (constants.s_box[0][cp0] + constants.s_box[1][cp1]) % constants.modulo
-        f_out = constants.s_box[2][cp2] ^ f_out
-        f_out = (constants.s_box[3][cp3] + f_out) % constants.modulo
+        f_out = (S_BOX_0[cp0] + S_BOX_1[cp1]) % constants.modulo
+        f_out = S_BOX_2[cp2] ^ f_out
+        f_out = (S_BOX_3[cp3] + f_out) % constants.modulo
         return f_out
 
 
@@ -94,12 +128,124 @@ class CTR(BlowyFishy):
         rhs = counter
         return self.cipher.encrypt(lhs, rhs)
 
+    def keystream(self, length, counter=0):
+        """Gets the keystream that is XORed with the message, from the keystream cache if this key and nonce have been
+        registered with register_keystream(), or in parallel if it is long and the keystream pool has been started
+        :param int length: Number of bytes of keystream needed
+        :param int counter: Block to start from, for starting part way through a message
+
+        :returns: bytes of keystream
+        """
+        stream = keystreams.get(self, length, counter)
+        return stream if stream is not None else _generate_keystream(self, length, counter)
+
+    def generate_keystream(self, length, counter=0):
+        """Generates the keystream that is XORed with the message
+        :param int length: Number of bytes of keystream needed
+        :param int counter: Block to start from, for starting part way through a message
+
+        :returns: bytes of keystream
+        """
+        encrypt = self.cipher.encrypt
+        nonce = self.nonce
+        blocks = (length + BLOCK_SIZE - 1) // BLOCK_SIZE
+        stream = b''.join(((lhs << 32) | rhs).to_bytes(BLOCK_SIZE, 'big')
+                          for lhs, rhs in (encrypt(nonce, i) for i in range(counter, counter + blocks)))
+        return stream[:length]
+
+    def ctr_encrypt_bytes(self, data, counter=0):
+        """Encrypts bytes a whole 64 bit block at a time. Unlike ctr_encryption() nothing is padded, the ciphertext is
+        the same length as the plain text
+        :param bytes data: Plain text bytes or bytearray
+        :param int counter: Block to start from, for starting part way through a message
+
+        :returns: bytes of ciphertext
+        """
+        if not data:
+            return b''
+        stream = self.keystream(len(data), counter)
+        return (int.from_bytes(data, 'big') ^ int.from_bytes(stream, 'big')).to_bytes(len(data), 'big')
+
+    def ctr_encrypt_at(self, data, position):
+        """Encrypts bytes that start at any byte position of a longer message, so a message can be worked on a chunk at
+        a time, or from part way through, without the chunks lining up with blocks
+        :param bytes data: Plain text bytes or bytearray
+        :param int position: Byte offset of data in the whole message
+
+        :returns: bytes of ciphertext
+        """
+        if not data:
+            return b''
+        skip = position % BLOCK_SIZE
+        stream = self.keystream(skip + len(data), position // BLOCK_SIZE)
+        if skip:
+            stream = stream[skip:]
+        return (int.from_bytes(data, 'big') ^ int.from_bytes(stream, 'big')).to_bytes(len(data), 'big')
+
+    def ctr_decrypt_bytes(self, data, counter=0):
+        """Decrypts bytes, which is the same operation as encrypting them in counter mode
+        :param bytes data: Ciphertext bytes or bytearray
+        :param int counter: Block to start from, for starting part way through a message
+
+        :returns: bytes of plain text
+        """
+        return self.ctr_encrypt_bytes(data, counter)
+
     def ctr_encryption(self, message):
         """Divides plaintext into 64 bits
         :param str message: Plain text message
 
         :return: New string that is enciphered
         """
+        if not message:
+            return ""
+        try:
+            data = message.encode('latin-1')
+        except UnicodeEncodeError:
+            return self._ctr_encryption_bits(message)
+        if not 0 <= self.nonce < 1 << 32:
+            return self._ctr_encryption_bits(message)
+
+        # Pad final block with zeros if it is not 64 bits
+        data += bytes(-len(data) % BLOCK_SIZE)
+        return self.ctr_encrypt_bytes(data).decode('latin-1')
+
+    def ctr_encryption_many(self, messages):
+        """Enciphers many messages, giving the same as calling ctr_encryption() on each. The keystream for the longest
+        message is got once and every message is XORed with the start of it
+        :param list messages: Plain text messages, None is passed through as None
+
+        :return: list of enciphered strings
+        """
+        padded = [None] * len(messages)
+        if 0 <= self.nonce < 1 << 32:
+            for i, message in enumerate(messages):
+                if message is None:
+                    continue
+                try:
+                    data = message.encode('latin-1')
+                except UnicodeEncodeError:
+                    continue
+                padded[i] = data + bytes(-len(data) % BLOCK_SIZE)
+        stream = self.keystream(max((len(data) for data in padded if data is not None), default=0))
+
+        from_bytes = int.from_bytes
+        results = []
+        for message, data in zip(messages, padded):
+            if data is None:
+                results.append(None if message is None else self.ctr_encryption(message))
+            elif not data:
+                results.append("")
+            else:
+                length = len(data)
+                ciphertext = (from_bytes(data, 'big') ^ from_bytes(stream[:length], 'big')).to_bytes(length, 'big')
+                results.append(ciphertext.decode('latin-1'))
+        return results
+
+    def _ctr_encryption_bits(self, message):
+        """Original bit string implementation of ctr_encryption(). Characters past 0xff don't fit in a byte and nonces
+        past 32 bits don't fit half a block, so these messages are still enciphered this way to give the same result.
+        """
         # List of the message split into blocks
         split_message_list = []
         for text_block in range(0, len(message), 8):
@@ -137,6 +283,267 @@ class CTR(BlowyFishy):
         return msg
 
 
+class KeystreamCache:
+    def __init__(self, blocks=KEYSTREAM_BLOCKS, max_bytes=KEYSTREAM_MAX_BYTES, max_pairs=KEYSTREAM_MAX_PAIRS):
+        """Keeps the keystream for registered key and nonce pairs. Every message encrypted with the same key and nonce
+        is XORed with the same keystream, so for a pair used over and over (like the database key and nonce) it only
+        needs generating once. Encrypting a short field is then a single XOR with part of the stored keystream.
+        :param int blocks: Blocks of keystream generated when a pair is registered
+        :param int max_bytes: Most keystream kept for a pair, anything past this is generated each time it is needed
+        :param int max_pairs: Most pairs kept, registering more forgets the pair registered first
+        """
+        self.blocks = blocks
+        self.max_bytes = max_bytes - max_bytes % BLOCK_SIZE
+        self.max_pairs = max_pairs
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def register(self, key, nonce):
+        mode_ctr, _ = validate_encryption_input(key, "", nonce)
+        pair = (mode_ctr.cipher.key, mode_ctr.nonce)
+        with self._lock:
+            if pair in self._streams:
+                return
+            while len(self._streams) >= self.max_pairs:
+                del self._streams[next(iter(self._streams))]
+            self._streams[pair] = mode_ctr.generate_keystream(min(self.blocks * BLOCK_SIZE, self.max_bytes))
+
+    def unregister(self, key, nonce):
+        mode_ctr, _ = validate_encryption_input(key, "", nonce)
+        with self._lock:
+            self._streams.pop((mode_ctr.cipher.key, mode_ctr.nonce), None)
+
+    def get(self, mode_ctr, length, counter=0):
+        """Gets keystream for a counter mode cipher, extending the stored keystream if more is needed
+        :param CTR mode_ctr: Counter mode cipher the keystream is for
+        :param int length: Number of bytes of keystream needed
+        :param int counter: Block to start from
+
+        :returns: bytes of keystream, or None if the cipher's key and nonce aren't registered
+        """
+        pair = (mode_ctr.cipher.key, mode_ctr.nonce)
+        stream = self._streams.get(pair)
+        if stream is None:
+            return None
+
+        start = counter * BLOCK_SIZE
+        end = start + length
+        if end > len(stream) and len(stream) < self.max_bytes:
+            stream = self._extend(pair, mode_ctr, end)
+        if end <= len(stream):
+            return stream[start:end]
+
+        # past the limit, so only the part that is kept comes from the cache
+        kept = stream[start:]
+        generated_from = max(start, len(stream))
+        return kept + _generate_keystream(mode_ctr, end - generated_from, generated_from // BLOCK_SIZE)
+
+    def _extend(self, pair, mode_ctr, end):
+        with self._lock:
+            stream = self._streams.get(pair)
+            if stream is None or end <= len(stream):
+                return stream or b''
+            # at least double it, so a run of growing messages doesn't extend it every time
+            new_length = min(self.max_bytes, max(end + -end % BLOCK_SIZE, 2 * len(stream)))
+            stream += mode_ctr.generate_keystream(new_length - len(stream), len(stream) // BLOCK_SIZE)
+            self._streams[pair] = stream
+            return stream
+
+    def __len__(self):
+        return len(self._streams)
+
+    @property
+    def size(self):
+        """Total bytes of keystream kept"""
+        return sum(len(stream) for stream in self._streams.values())
+
+
+keystreams = KeystreamCache()
+
+
+def register_keystream(key, nonce):
+    """ Keeps the keystream for a key and nonce that are used for many messages, see KeystreamCache
+
+    :param key: Encryption key
+    :param nonce: Nonce used with the key
+    """
+    keystreams.register(key, nonce)
+
+
+def unregister_keystream(key, nonce):
+    """ Stops keeping the keystream for a key and nonce
+
+    :param key: Encryption key
+    :param nonce: Nonce used with the key
+    """
+    keystreams.unregister(key, nonce)
+
+
+class EncryptionMemo:
+    def __init__(self, key, nonce, max_size=ENCRYPTION_MEMO_SIZE, ttl=ENCRYPTION_MEMO_TTL):
+        """Remembers recent ciphertexts for one key and nonce. Encryption with a fixed key and nonce always gives the
+        same ciphertext, so values that are looked up by their ciphertext (like emails) only need encrypting once.
+        Least recently used values are forgotten past max_size, and no value is kept for longer than ttl seconds so
+        plain text doesn't stay in memory.
+        :param key: Encryption key
+        :param nonce: Nonce used with the key
+        :param int max_size: Most values to remember
+        :param float ttl: Seconds a value is remembered for after it is first encrypted
+        """
+        self.key = key
+        self.nonce = nonce
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # plain text -> (ciphertext, expiry time), least recently used first
+        self._expiries = collections.deque()  # (expiry time, plain text), in the order they expire
+        self._lock = threading.Lock()
+
+    def encrypt(self, msg):
+        """Encrypts a message the same way as encrypt(key, nonce, msg), reusing the ciphertext if it is remembered
+        :param msg: Message to be encrypted
+
+        :returns: Encrypted message
+        """
+        if type(msg) is not str:
+            msg = str(msg)
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            entry = self._entries.get(msg)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(msg)
+                return entry[0]
+            self.misses += 1
+
+        ciphertext = encrypt(self.key, self.nonce, msg)
+
+        with self._lock:
+            expires = now + self.ttl
+            self._entries[msg] = (ciphertext, expires)
+            self._entries.move_to_end(msg)
+            self._expiries.append((expires, msg))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            if len(self._expiries) > 2 * self.max_size:
+                # values forgotten early still have expiries queued, rebuild so these don't build up
+                self._expiries = collections.deque(sorted((expires, msg) for msg, (_, expires)
+                                                          in self._entries.items()))
+        return ciphertext
+
+    def purge(self):
+        """Forgets every value that has outlived the ttl"""
+        with self._lock:
+            self._purge(time.monotonic())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._expiries.clear()
+
+    def stats(self):
+        """:returns: dict of the hit and miss counts and how many values are remembered"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries),
+                    "hit_ratio": self.hits / lookups if lookups else 0.0}
+
+    def _purge(self, now):
+        expiries = self._expiries
+        while expiries and expiries[0][0] <= now:
+            expires, msg = expiries.popleft()
+            entry = self._entries.get(msg)
+            if entry is not None and entry[1] == expires:
+                del self._entries[msg]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class KeystreamPool(workerpool.WorkerPool):
+    def __init__(self, workers=None, min_bytes=PARALLEL_MIN_BYTES, segment_bytes=PARALLEL_SEGMENT_BYTES):
+        """Generates long keystreams on a pool of worker processes. Each block of keystream only depends on the nonce
+        and its counter, so the counter range is split into segments that are generated at the same time and written
+        into place in one buffer. No worker processes are created until start() is called.
+        :param int workers: Number of worker processes, defaults to the number of CPU cores
+        :param int min_bytes: Shortest keystream to generate in parallel
+        :param int segment_bytes: Keystream generated by a worker per task, rounded down to whole blocks
+        """
+        super().__init__(workers)
+        self.min_bytes = min_bytes
+        self.segment_bytes = max(segment_bytes - segment_bytes % BLOCK_SIZE, BLOCK_SIZE)
+
+    def generate(self, mode_ctr, length, counter=0):
+        """Generates keystream in parallel
+        :param CTR mode_ctr: Counter mode with the cipher and nonce to generate for
+        :param int length: Number of bytes of keystream needed
+        :param int counter: Block to start from
+
+        :returns: bytearray of keystream, or None if the pool isn't running or length is below min_bytes
+        """
+        if length < self.min_bytes or not self.running:
+            return None
+
+        key, nonce, segment = mode_ctr.cipher.key, mode_ctr.nonce, self.segment_bytes
+        tasks = [(start, self._executor.submit(_keystream_segment, key, nonce, counter + start // BLOCK_SIZE,
+                                               min(segment, length - start)))
+                 for start in range(0, length, segment)]
+        stream = bytearray(length)
+        view = memoryview(stream)
+        for start, task in tasks:
+            part = task.result()
+            view[start:start + len(part)] = part
+        view.release()
+        return stream
+
+
+def _generate_keystream(mode_ctr, length, counter):
+    """Generates keystream on the keystream pool if it is long enough and the pool is running, serially otherwise"""
+    stream = keystream_pool.generate(mode_ctr, length, counter)
+    return stream if stream is not None else mode_ctr.generate_keystream(length, counter)
+
+
+def _keystream_segment(key, nonce, counter, length):
+    """Generates one segment of keystream in a KeystreamPool worker"""
+    return CTR(get_cipher(key), nonce).generate_keystream(length, counter)
+
+
+keystream_pool = KeystreamPool()
+
+
+def start_keystream_pool(workers=None, min_bytes=PARALLEL_MIN_BYTES):
+    """ Replaces the shared keystream pool with one using the given settings and starts it. After this, counter mode
+    generates keystreams of at least min_bytes in parallel.
+
+    :param workers: Number of worker processes, defaults to the number of CPU cores
+    :param min_bytes: Shortest keystream to generate in parallel
+    :return: the running pool
+    """
+    global keystream_pool
+    if keystream_pool.running:
+        keystream_pool.shutdown()
+    keystream_pool = KeystreamPool(workers, min_bytes).start()
+    return keystream_pool
+
+
+def stop_keystream_pool():
+    """ Shuts down the shared keystream pool, so every keystream is generated serially again """
+    keystream_pool.shutdown()
+
+
+@functools.lru_cache(maxsize=CIPHER_CACHE_SIZE)
+def get_cipher(key: str):
+    """Gets a Blowfish cipher for the key, only building the key schedule the first time a key is seen. The cache is
+    bounded and thread safe, and the ciphers hold no state between blocks so they can be shared by every thread.
+    :param str key: Encryption key
+
+    :returns: BlowyFishy cipher for the key
+    """
+    return BlowyFishy(key)
+
+
 def get_nonce():
     """Creates 32 bit nonce
     :returns: Integer nonce
@@ -172,6 +579,153 @@ def decrypt(key, nonce, msg):
     return decrypted_message
 
 
+def encrypt_many(key, nonce, messages):
+    """ Helper function for encrypting many messages with the same key and nonce, such as a column of a query's
+    results. The cipher and keystream are made once for them all rather than for each message
+
+    :param key: Encryption key
+    :param nonce: Nonce to use, generated from get_nonce()
+    :param messages: iterable of messages to be encrypted, None values are left as None
+    :return: list of encrypted messages, in the same order
+    """
+    mode_ctr, _ = validate_encryption_input(key, "", nonce)
+    return mode_ctr.ctr_encryption_many([msg if msg is None or type(msg) is str else str(msg) for msg in messages])
+
+
+def decrypt_many(key, nonce, messages):
+    """ Helper function for decrypting many messages with the same key and nonce, see encrypt_many()
+
+    :param key: Decryption key
+    :param nonce: Nonce to use, generated from get_nonce()
+    :param messages: iterable of messages to be decrypted, None values are left as None
+    :return: list of decrypted messages, in the same order
+    """
+    return [msg if msg is None else msg.strip("\0") for msg in encrypt_many(key, nonce, messages)]
+
+
+def encrypt_bytes(key, nonce, data):
+    """ Helper function for encrypting bytes
+
+    :param key: Encryption key
+    :param nonce: Nonce to use, generated from get_nonce()
+    :param data: bytes or bytearray to be encrypted
+    :return: Encrypted bytes, the same length as data
+    """
+    mode_ctr, _ = validate_encryption_input(key, "", nonce)
+    return mode_ctr.ctr_encrypt_bytes(data)
+
+
+def decrypt_bytes(key, nonce, data):
+    """ Helper function for decrypting bytes
+
+    :param key: Decryption key
+    :param nonce: Nonce to use, generated from get_nonce()
+    :param data: bytes or bytearray to be decrypted
+    :return: Decrypted bytes
+    """
+    mode_ctr, _ = validate_encryption_input(key, "", nonce)
+    return mode_ctr.ctr_decrypt_bytes(data)
+
+
+def encrypt_stream(key, nonce, source, chunk_size=STREAM_CHUNK_SIZE, offset=0):
+    """ Encrypts a binary file-like object or an iterable of bytes a chunk at a time, so only one chunk is held in
+    memory however long the input is. Nothing is padded, the ciphertext is the same length as the input.
+
+    :param key: Encryption key
+    :param nonce: Nonce to use, generated from get_nonce()
+    :param source: Binary file-like object to read from, or an iterable of bytes chunks of any size
+    :param chunk_size: Bytes read from a file-like source at a time
+    :param offset: Byte offset in the whole message that source starts at, when carrying on part way through
+    :return: generator of encrypted bytes chunks
+    """
+    mode_ctr, _ = validate_encryption_input(key, "", nonce)
+    position = offset
+    for chunk in _read_chunks(source, chunk_size):
+        yield mode_ctr.ctr_encrypt_at(chunk, position)
+        position += len(chunk)
+
+
+def decrypt_stream(key, nonce, source, chunk_size=STREAM_CHUNK_SIZE, offset=0):
+    """ Decrypts a binary file-like object or an iterable of bytes a chunk at a time, see encrypt_stream()
+
+    :param key: Decryption key
+    :param nonce: Nonce to use, generated from get_nonce()
+    :param source: Binary file-like object to read from, or an iterable of bytes chunks of any size
+    :param chunk_size: Bytes read from a file-like source at a time
+    :param offset: Byte offset in the whole ciphertext that source starts at
+    :return: generator of decrypted bytes chunks
+    """
+    return encrypt_stream(key, nonce, source, chunk_size, offset)
+
+
+def encrypt_file(key, nonce, source, destination, chunk_size=STREAM_CHUNK_SIZE):
+    """ Encrypts everything read from one binary file-like object into another
+
+    :param key: Encryption key
+    :param nonce: Nonce to use, generated from get_nonce()
+    :param source: Binary file-like object to read plain text from
+    :param destination: Binary file-like object to write ciphertext to
+    :param chunk_size: Bytes read at a time
+    :return: Number of bytes written
+    """
+    written = 0
+    for chunk in encrypt_stream(key, nonce, source, chunk_size):
+        destination.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def decrypt_file(key, nonce, source, destination, chunk_size=STREAM_CHUNK_SIZE):
+    """ Decrypts everything read from one binary file-like object into another, see encrypt_file()
+
+    :param key: Decryption key
+    :param nonce: Nonce to use, generated from get_nonce()
+    :param source: Binary file-like object to read ciphertext from
+    :param destination: Binary file-like object to write plain text to
+    :param chunk_size: Bytes read at a time
+    :return: Number of bytes written
+    """
+    return encrypt_file(key, nonce, source, destination, chunk_size)
+
+
+def decrypt_range(key, nonce, source, offset, length=None, chunk_size=STREAM_CHUNK_SIZE):
+    """ Decrypts part of a seekable ciphertext file without reading anything before it. Each block of keystream only
+    depends on its counter, so decryption can start at any byte.
+
+    :param key: Decryption key
+    :param nonce: Nonce to use, generated from get_nonce()
+    :param source: Seekable binary file-like object holding the whole ciphertext
+    :param offset: Byte offset to start decrypting from
+    :param length: Number of bytes to decrypt, or None to decrypt to the end
+    :param chunk_size: Bytes read at a time
+    :return: generator of decrypted bytes chunks
+    """
+    source.seek(offset)
+    if length is not None:
+        source = _read_limited(source, length, chunk_size)
+    return decrypt_stream(key, nonce, source, chunk_size, offset)
+
+
+def _read_chunks(source, chunk_size):
+    if not hasattr(source, 'read'):
+        yield from (chunk for chunk in source if chunk)
+        return
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _read_limited(source, length, chunk_size):
+    while length > 0:
+        chunk = source.read(min(chunk_size, length))
+        if not chunk:
+            return
+        length -= len(chunk)
+        yield chunk
+
+
 def validate_encryption_input(key, msg, nonce):
     if type(key) is not str:
         key = str(key, "utf-8")
@@ -179,6 +733,6 @@ def validate_encryption_input(key, msg, nonce):
         nonce = int(nonce)
     if type(msg) is not str:
         msg = str(msg)
-    block_cipher = BlowyFishy(key)
+    block_cipher = get_cipher(key)
     mode_ctr = CTR(block_cipher, nonce)
     return mode_ctr, msg
@@ -0,0 +1,130 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Secrets and settings loaded from the environment
+File    : config.py
+Date    : Sunday 18 October 2026
+Desc.   : Loads the .env file once and decrypts each secret in it the first time it is used, keeping the plain text
+          for the rest of the process. Secrets are read as module attributes, e.g. config.DBK. Values decrypted
+          before a pre-fork server forks are shared with its workers rather than decrypted again in each of them.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Production"  # or "Development"
+
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+import blowfish
+
+SEK_KEY = "dQw4w9WgXcQ"  # the secret encryption key is itself encrypted with this, and nonce 0
+# name each secret is read as -> environment variable holding it
+SECRETS = {
+    "SEK": "UG_4_SEK",
+    "DBN": "UG_4_DBN",
+    "DATABASE": "UG_4_DATABASE",
+    "PEPPER": "UG_4_PEP",
+    "DBK": "UG_4_DB",
+    "PW": "UG_4_PW",
+    "ENV": "UG_4_ENV",
+    "DEBUG": "UG_4_DEBUG",
+    "TESTING": "UG_4_TESTING",
+    "SECRET_KEY": "UG_4_SECRET_KEY",
+    "EMAIL": "UG_4_EMAIL",
+    "EPW": "UG_4_EPW",
+    "EMAIL_TYPE": "UG_4_EMAIL_TYPE",
+}
+
+
+class Secrets:
+    def __init__(self):
+        """ Decrypts secrets from the environment on first use and keeps them. Keeps count of how many were decrypted
+        and how long it took, see stats().
+        """
+        self._values = {}
+        self._lock = threading.RLock()
+        self._env_loaded = False
+        self.decrypted = 0
+        self.decrypt_time = 0.0
+
+    def get(self, name):
+        """ Gets the plain text of a secret, decrypting it if this is the first time it has been asked for
+
+        :param name: one of the names in SECRETS
+        :return: the decrypted secret
+        :rtype str:
+        """
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        if name not in SECRETS:
+            raise KeyError(f"Unknown secret: {name}")
+
+        with self._lock:
+            if name in self._values:
+                return self._values[name]
+            self.load_env()
+            # SEK decrypts everything else, with nonce 0 for DBN and DBN for the rest
+            if name == "SEK":
+                key, nonce = SEK_KEY, 0
+            elif name == "DBN":
+                key, nonce = self.get("SEK"), 0
+            else:
+                key, nonce = self.get("SEK"), self.get("DBN")
+
+            start_time = time.perf_counter()
+            value = blowfish.decrypt(key, nonce, os.environ.get(SECRETS[name]))
+            self.decrypt_time += time.perf_counter() - start_time
+            self.decrypted += 1
+            self._values[name] = value
+            return value
+
+    def load_env(self):
+        """ Loads the .env file into the environment, once per process """
+        with self._lock:
+            if not self._env_loaded:
+                load_dotenv(override=True)
+                self._env_loaded = True
+
+    def clear(self):
+        """ Forgets every decrypted secret, so they are decrypted again from the environment when next used """
+        with self._lock:
+            self._values.clear()
+
+    def stats(self):
+        """ :return: dict of the number of secrets decrypted and the seconds spent decrypting them """
+        return {"decrypted": self.decrypted, "seconds": self.decrypt_time}
+
+    def _after_fork(self):
+        # a thread in the parent may have held the lock as it forked, the child has its own copy of the values
+        self._lock = threading.RLock()
+
+
+secrets = Secrets()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=secrets._after_fork)
+
+
+def __getattr__(name):
+    """ Reads secrets as module attributes, e.g. config.DBK """
+    if name in SECRETS:
+        return secrets.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def load_env():
+    secrets.load_env()
+
+
+def stats():
+    """ :return: dict of the number of secrets decrypted and the seconds spent decrypting them """
+    return secrets.stats()
@@ -0,0 +1,258 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Pooled SQLite connections
+File    : connections.py
+Date    : Sunday 18 October 2026
+Desc.   : Keeps SQLite connections open between requests rather than opening and closing one for every request, so
+          the schema is only parsed once and each connection keeps a warm page cache. Each connection has the pragma
+          profile applied once when it is opened. The pool is bounded, checks connections that have sat idle before
+          handing them out, and starts afresh in a forked child.
+History : 18/10/2026 - v1.0 - Create project file.
+          18/10/2026 - v1.1 - Size of each connection's prepared statement cache
+          18/10/2026 - v1.2 - transaction() groups writes into one commit, with savepoints and retry when busy
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.2"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Production"  # or "Development"
+
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",  # readers and the writer don't block each other
+    "synchronous": "NORMAL",  # safe with WAL, a power cut can only lose the last commits rather than corrupt the db
+    "cache_size": -16000,  # KiB of page cache per connection when negative, so 16MB
+    "mmap_size": 64 * 1024 * 1024,  # bytes of the db file read through memory mapping rather than read() calls
+    "temp_store": "MEMORY",  # temporary tables and indexes for sorts are kept in memory
+}
+HEALTH_CHECK_AFTER = 30  # seconds a connection can sit idle before it is checked before use
+CHECKOUT_TIMEOUT = 10  # seconds to wait for a free connection when every one is in use
+CACHED_STATEMENTS = 128  # prepared statements kept by each connection, by SQL string
+BUSY_RETRIES = 3  # times starting or committing a transaction is retried when another connection holds the lock
+BUSY_BACKOFF = 0.05  # seconds before the first retry, doubled for each one after
+
+_pools = weakref.WeakSet()  # every pool, so forked children can reset them
+
+
+class PooledConnection(sqlite3.Connection):
+    """ Connection that remembers which db file it was opened on and how deep in transaction() it is """
+    inode = None
+    depth = 0
+
+
+class ConnectionPool:
+    def __init__(self, path, size=DEFAULT_POOL_SIZE, pragmas=None, row_factory=None, persistent=True,
+                 health_check_after=HEALTH_CHECK_AFTER, timeout=CHECKOUT_TIMEOUT, cached_statements=CACHED_STATEMENTS):
+        """ Sets up the pool. Connections are opened as they are needed, up to size.
+
+        :param path: Path to the database file
+        :param size: Most connections open at once, checkout() waits for one to be released past this
+        :param pragmas: dict of pragma name to value applied to each new connection, defaults to DEFAULT_PRAGMAS
+        :param row_factory: sqlite3 row factory set on each new connection
+        :param persistent: Keep released connections open for reuse. False closes them, as before pooling
+        :param health_check_after: Seconds idle after which a connection is checked before it is handed out
+        :param timeout: Seconds checkout() waits for a free connection before raising TimeoutError
+        :param cached_statements: Prepared statements each connection keeps for reuse. As connections outlive requests,
+                                  a statement run again on the same connection skips parsing and planning it
+        """
+        self.path = path
+        self.size = size
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.row_factory = row_factory
+        self.persistent = persistent
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._reset()
+        _pools.add(self)
+
+    def _reset(self):
+        self._available = threading.Condition()
+        self._idle = []  # (connection, time released, db file inode), most recently released last
+        self._open = 0
+        self._pid = os.getpid()
+
+    def checkout(self):
+        """ Gets a connection for this thread to use until it is given back with release(). The most recently released
+        connection is handed out first, as its cache is the warmest.
+
+        :return: an open connection
+        :rtype sqlite3.Connection:
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._available:
+                while not self._idle and self._open >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._available.wait(remaining):
+                        raise TimeoutError(f"No database connection was released within {self.timeout}s")
+                if not self._idle:
+                    self._open += 1
+                    break
+                connection, released, inode = self._idle.pop()
+
+            if self._healthy(connection, released, inode):
+                return connection
+            self._discard(connection)
+
+        try:
+            return self._connect()
+        except BaseException:
+            with self._available:
+                self._open -= 1
+                self._available.notify()
+            raise
+
+    def release(self, connection):
+        """ Gives a connection back to the pool. Anything left uncommitted is rolled back.
+
+        :param connection: a connection from checkout()
+        """
+        if self._pid != os.getpid():
+            return  # from before a fork, it belongs to the parent
+        if not self.persistent:
+            self._discard(connection)
+            return
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            connection.depth = 0
+        except sqlite3.Error:
+            self._discard(connection)
+            return
+        with self._available:
+            self._idle.append((connection, time.monotonic(), connection.inode))
+            self._available.notify()
+
+    def close(self):
+        """ Closes every idle connection. Connections checked out are closed as they are released. """
+        with self._available:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self.persistent = False
+        for connection, _, _ in idle:
+            connection.close()
+
+    def stats(self):
+        """ :return: dict of the pool size and how many connections are open and idle """
+        with self._available:
+            return {"size": self.size, "open": self._open, "idle": len(self._idle)}
+
+    def _connect(self):
+        # used by one thread at a time, but not always the same one
+        connection = sqlite3.connect(self.path, check_same_thread=False, factory=PooledConnection,
+                                     cached_statements=self.cached_statements)
+        connection.row_factory = self.row_factory
+        for name, value in self.pragmas.items():
+            connection.execute(f"PRAGMA {name}={value}").fetchall()
+        connection.inode = self._inode()
+        return connection
+
+    def _healthy(self, connection, released, inode):
+        # a connection to a db file that has since been replaced, e.g. by create_db.py, would still see the old one
+        if inode != self._inode():
+            return False
+        if time.monotonic() - released < self.health_check_after:
+            return True
+        try:
+            connection.execute("SELECT 1").fetchall()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+        with self._available:
+            self._open -= 1
+            self._available.notify()
+
+    def _inode(self):
+        try:
+            return os.stat(self.path).st_ino
+        except OSError:
+            return None
+
+
+def is_busy(error):
+    """ :return: whether an sqlite3 error is SQLITE_BUSY or SQLITE_LOCKED, so the statement can be tried again """
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is None:
+        return isinstance(error, sqlite3.OperationalError) and "locked" in str(error)
+    return code & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)  # the low byte is the primary result code
+
+
+def _retry_busy(action, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            return action()
+        except sqlite3.OperationalError as error:
+            if attempt == retries or not is_busy(error):
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+@contextlib.contextmanager
+def transaction(connection, retries=BUSY_RETRIES, backoff=BUSY_BACKOFF):
+    """ Runs the statements in the with block as one unit of work: committed together when the block ends, or rolled
+    back if it raises. The write lock is taken when the block starts (BEGIN IMMEDIATE), so a transaction that reads and
+    then writes can't be refused the lock half way through. Starting and committing are retried while the database
+    is busy. Nested inside another transaction() on the same connection, the block is a savepoint instead, and only
+    its own statements are rolled back if it raises.
+
+    :param connection: a PooledConnection
+    :param retries: times to retry starting or committing while the database is busy
+    :param backoff: seconds before the first retry, doubled for each one after
+    :return: context manager giving the connection
+    """
+    if connection.depth:
+        savepoint = f"unit_of_work_{connection.depth}"
+        connection.execute(f"SAVEPOINT {savepoint}")
+        connection.depth += 1
+        try:
+            yield connection
+        except BaseException:
+            connection.execute(f"ROLLBACK TO {savepoint}")
+            connection.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            connection.execute(f"RELEASE {savepoint}")
+        finally:
+            connection.depth -= 1
+        return
+
+    if connection.in_transaction:
+        connection.commit()  # statements run without a transaction() haven't been committed yet, keep them separate
+    _retry_busy(lambda: connection.execute("BEGIN IMMEDIATE"), retries, backoff)
+    connection.depth = 1
+    try:
+        yield connection
+        _retry_busy(connection.commit, retries, backoff)
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        connection.depth = 0
+
+
+def _after_fork():
+    # connections can't be shared with a forked child, so its pools start empty. The parent's connections are left
+    # for the parent to close
+    for pool in list(_pools):
+        pool._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -4,18 +4,16 @@ import random
 import re
 import sqlite3
 
-from dotenv import load_dotenv
-
 import auth
 import blowfish
+import config
+from db import create_post_nonce_schema, create_search_schema
 
-load_dotenv(override=True)
-SEK = blowfish.decrypt("dQw4w9WgXcQ", 0, os.environ.get("UG_4_SEK"))
-DBN = blowfish.decrypt(SEK, 0, os.environ.get("UG_4_DBN"))
-DATABASE = blowfish.decrypt(SEK, DBN, os.environ.get("UG_4_DATABASE"))
-PEPPER = blowfish.decrypt(SEK, DBN, os.environ.get("UG_4_PEP"))
-DBK = blowfish.decrypt(SEK, DBN, os.environ.get("UG_4_DB"))
-PW = blowfish.decrypt(SEK, DBN, os.environ.get('UG_4_PW'))
+DBN = config.DBN
+DATABASE = config.DATABASE
+PEPPER = config.PEPPER
+DBK = config.DBK
+PW = config.PW
 
 
 # Simple user blog site
@@ -107,6 +105,7 @@ def create():
         '''CREATE TABLE posts (creator integer REFERENCES users(userid), date INTEGER, title TEXT, content TEXT)''')
     c.execute('''CREATE INDEX user_username on users (username)''')
     c.execute('''CREATE INDEX user_posts on posts (creator,date)''')
+    c.execute('''CREATE INDEX posts_date on posts (date)''')
 
     # Twofactor table
     c.execute('''CREATE TABLE twofactor (user integer UNIQUE REFERENCES  users(userid), timestamp TEXT, code TEXT, 
@@ -136,6 +135,8 @@ def create():
         user_id += 1
         print('.', end='')
     print(' Done.')
+    create_search_schema(db)  # search indexes for the users and posts
+    create_post_nonce_schema(db)
     db.commit()
     print('\n> Database Created.')
 
@@ -143,7 +144,7 @@ def create():
 def create_content(db, user_id, name, password, twofac=0):
     salt = auth.generate_salt()
     password = password + salt + PEPPER
-    pw_hash = auth.ug4_hash(password)
+    pw_hash = auth.format_password_hash(auth.DEFAULT_ITERATIONS, salt, auth.ug4_hash(password, auth.DEFAULT_ITERATIONS))
     c = db.cursor()
     username = '%s%s' % (name.lower()[0], name.lower()[name.index(' ') + 1:])
     email = '%s.%s@fakeemailservice.abcde' % (name.lower()[0], name.lower()[name.index(' ') + 1:])
@@ -167,8 +168,9 @@ def create_content(db, user_id, name, password, twofac=0):
 
 
 def delete_db():
-    if os.path.exists(DATABASE):
-        os.remove(DATABASE)
+    for path in (DATABASE, DATABASE + "-wal", DATABASE + "-shm"):  # along with the write-ahead log and its index
+        if os.path.exists(path):
+            os.remove(path)
 
 
 if __name__ == '__main__':
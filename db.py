@@ -10,85 +10,363 @@ History : 25/03/2021 - v1.0 - Load basic project file.
           03/04/2021 - v1.2 - Create get_login(), merge in get_salt() and get_password()
           06/04/2021 - v1.3 - Added validation to all input fields
           27/04/2021 - v1.4 - Added database encryption/decryption code
+          18/10/2026 - v1.5 - Password hashing runs on the hasher process pool
+          18/10/2026 - v1.6 - Timing equalisation is left to pacing rather than sleeping here
+          18/10/2026 - v1.7 - Versioned password hashes, rehashed on login when the configured cost changes
+          18/10/2026 - v1.8 - Keep the keystream for the database key and nonce
+          18/10/2026 - v1.9 - Reuse the ciphertexts of recently looked up emails
+          18/10/2026 - v1.10 - Optional encryption of post content, with excerpts decrypted from the start only
+          18/10/2026 - v1.11 - Encrypted columns are declared once and decrypted a whole result set at a time
+          18/10/2026 - v1.12 - Encrypted columns of a row are decrypted when first read
+          18/10/2026 - v1.13 - Secrets are read from config rather than decrypted here
+          18/10/2026 - v1.14 - Hash iterations can be calibrated when first needed
+          18/10/2026 - v1.15 - Connections come from a pool and are kept open between requests
+          18/10/2026 - v1.16 - Column names are read once per query, iter_db() streams rows
+          18/10/2026 - v1.17 - transaction() groups writes into one commit, used for 2FA attempts
+          18/10/2026 - v1.18 - Login lockouts are saved and loaded in batches for ratelimit
+          18/10/2026 - v1.19 - Posts are read a page at a time, keyset paginated on date and rowid
+          18/10/2026 - v1.20 - Users and posts are searched through FTS5 indexes
+          18/10/2026 - v1.21 - Weak passwords are looked up in a list loaded once, see weakpasswords
+          18/10/2026 - v1.22 - Writes that change the home feed invalidate feed_cache
+          18/10/2026 - v1.23 - Removed get_lockout_time(), lockouts are read through load_lockouts()
+          18/10/2026 - v1.24 - create_search_schema() makes the search indexes for create_db.py too
+          18/10/2026 - v1.25 - Posts are encrypted with nonces counted in post_nonces rather than random ones
 """
 
 __author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
 __copyright__ = "Copyright 2021, CMP-UG4"
 __credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
-__version__ = "1.4"
+__version__ = "1.25"
 __email__ = "gny17hvu@uea.ac.uk"
 __status__ = "Production"  # or "Development"
 
 
+import base64
+import hmac
+import html
 import os
 import pathlib
 import re  # to validate two factor code now that it has been removed from validation
-import sqlite3
+import threading
 import time
+from collections.abc import MutableMapping
 from datetime import datetime
 
-from dotenv import load_dotenv
-from flask import g
+from flask import current_app, g
 
 import auth
 import blowfish
+import config
+import connections
+import feedcache
+import hasher
+import pacing
 import validation
-
-load_dotenv(override=True)
-SEK = blowfish.decrypt("dQw4w9WgXcQ", 0, os.environ.get("UG_4_SEK"))
-DBN = blowfish.decrypt(SEK, 0, os.environ.get("UG_4_DBN"))
-DATABASE = blowfish.decrypt(SEK, DBN, os.environ.get("UG_4_DATABASE"))
-PEPPER = blowfish.decrypt(SEK, DBN, os.environ.get("UG_4_PEP"))
-DBK = blowfish.decrypt(SEK, DBN, os.environ.get("UG_4_DB"))
+import weakpasswords
+
+DBN = config.DBN
+DATABASE = config.DATABASE
+PEPPER = config.PEPPER
+DBK = config.DBK
+blowfish.register_keystream(DBK, DBN)  # every encrypted column uses this key and nonce, so keep its keystream
+lookup_keys = blowfish.EncryptionMemo(DBK, DBN)  # encrypted emails that have been looked up recently
+calibration_lock = threading.Lock()
 DATA_FILENAME = pathlib.Path(__file__).with_name('bad_passwords.txt')
+weak_passwords = None  # the list of weak passwords, see load_weak_passwords()
+# columns stored encrypted with DBK and DBN, pass a table's entry as query_db(decrypt=...) to get them decrypted when
+# they are read, or with lazy=False to decrypt the whole result set at once
+ENCRYPTED_COLUMNS = {
+    'users': ('name', 'email'),
+    'twofactor': ('code',),
+    'reset_codes': ('code',),
+}
+# validate_text() encodes every ';' as part of an entity, so stored plain text posts can't start with this
+ENCRYPTED_POST_PREFIX = ';ctr;'
+ENCRYPTED_POST_HEADER = len(ENCRYPTED_POST_PREFIX) + 8  # prefix then the post's nonce as 8 hex digits
+# every nonce a post has been encrypted with, kept after the post is deleted so none is used again, see next_post_nonce()
+POST_NONCE_SCHEMA = 'CREATE TABLE post_nonces (nonce INTEGER PRIMARY KEY)'
+POSTS_PER_PAGE = 20
+SEARCH_RESULTS = 20  # users, and posts, listed for a search
+# latest username matches ranked for a search, so a term found in a great many usernames costs no more than this
+SEARCH_CANDIDATES = 1000
+TRIGRAM = 3  # characters in a trigram, shorter username searches can't use the user_search index
+# full text indexes for the search page, see create_search_schema(). Usernames are indexed as trigrams so any part of
+# one can be searched for, and kept in step with the users table by triggers. Posts are indexed by add_post(), as the
+# table only holds the content of encrypted posts as ciphertext; their rows are removed by a trigger
+SEARCH_SCHEMA = (
+    "CREATE VIRTUAL TABLE user_search USING fts5(username, content='users', content_rowid='userid', "
+    "tokenize='trigram')",
+    "CREATE TRIGGER user_search_insert AFTER INSERT ON users BEGIN "
+    "INSERT INTO user_search (rowid, username) VALUES (new.userid, new.username); END",
+    "CREATE TRIGGER user_search_delete AFTER DELETE ON users BEGIN "
+    "INSERT INTO user_search (user_search, rowid, username) VALUES ('delete', old.userid, old.username); END",
+    "CREATE TRIGGER user_search_update AFTER UPDATE OF username ON users BEGIN "
+    "INSERT INTO user_search (user_search, rowid, username) VALUES ('delete', old.userid, old.username); "
+    "INSERT INTO user_search (rowid, username) VALUES (new.userid, new.username); END",
+    "CREATE VIRTUAL TABLE post_search USING fts5(title, content)",
+    "CREATE TRIGGER post_search_delete AFTER DELETE ON posts BEGIN "
+    "DELETE FROM post_search WHERE rowid = old.rowid; END",
+)
+
+
+# the description of the last query's columns and their names. Every row of a query has the same description object,
+# so the names are only read out of it once per query rather than once per row
+_column_names = (None, ())
+
+
+def make_dicts(cursor, row):
+    global _column_names
+    description, names = _column_names
+    if cursor.description is not description:
+        names = tuple(column[0] for column in cursor.description)
+        _column_names = (cursor.description, names)  # replaced in one go, so threads never see a mismatched pair
+    return dict(zip(names, row))
+
+
+DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), DATABASE)
+# every statement in this file is a fixed string, so each connection keeps all of them prepared
+STATEMENT_CACHE_SIZE = 128
+pool = connections.ConnectionPool(DATABASE_PATH, row_factory=make_dicts, cached_statements=STATEMENT_CACHE_SIZE)
+
+
+def configure_pool(size=None, pragmas=None):
+    """ Replaces the connection pool with one of the given size and pragma profile. Connections already handed out
+    are closed as they are released.
+
+    :param size: Most connections open at once, None for connections.DEFAULT_POOL_SIZE
+    :param pragmas: dict of pragma name to value for each connection, None for connections.DEFAULT_PRAGMAS
+    """
+    global pool
+    old_pool = pool
+    pool = connections.ConnectionPool(DATABASE_PATH, size or connections.DEFAULT_POOL_SIZE, pragmas,
+                                      row_factory=make_dicts, cached_statements=STATEMENT_CACHE_SIZE)
+    old_pool.close()
+
+
+# pages of the home feed ready to render, invalidated by add_post(), delete_post() and update_user()
+feed_cache = feedcache.FeedCache()
 
 
+def configure_feed_cache(ttl=None, shared_dir=None):
+    """ Replaces the home feed cache with one keeping pages for ttl seconds, shared with other processes through
+    shared_dir if given, see feedcache.FeedCache
+
+    :param ttl: seconds a page is kept, None for feedcache.TTL
+    :param shared_dir: directory the cache is shared through, None to keep it to this process
+    """
+    global feed_cache
+    feed_cache = feedcache.FeedCache(ttl=feedcache.TTL if ttl is None else ttl, shared_dir=shared_dir)
+
 
 def get_db():
     db = getattr(g, '_database', None)
     if db is None:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        db_path = os.path.join(base_dir, DATABASE)
-        db = g._database = sqlite3.connect(db_path)
+        db = g._database = pool.checkout()
+        g._database_pool = pool  # given back to the pool it came from, even if the pool is replaced meanwhile
+    return db
 
-    def make_dicts(cursor, row):
-        return dict((cursor.description[idx][0], value)
-                    for idx, value in enumerate(row))
 
-    db.row_factory = make_dicts
-    return db
+def create_indexes():
+    """ Adds the indexes create_db.py makes to a database made before they were added to it """
+    conn = pool.checkout()
+    try:
+        with connections.transaction(conn):
+            conn.execute('CREATE INDEX IF NOT EXISTS posts_date ON posts (date)')  # for the pages of the home feed
+    finally:
+        pool.release(conn)
+
+
+def create_post_nonces():
+    """ Adds the post_nonces table to a database made before it was added to create_db.py """
+    conn = pool.checkout()
+    try:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name='post_nonces'").fetchone() is not None:
+            return
+        with connections.transaction(conn):
+            create_post_nonce_schema(conn)
+    finally:
+        pool.release(conn)
+
+
+def create_post_nonce_schema(conn):
+    """ Makes the post_nonces table, holding the nonces of the posts already encrypted. Used by create_db.py and
+    create_post_nonces(), commit or roll back the connection's transaction after it.
+
+    :param conn: sqlite3 connection to the database, with any row factory
+    """
+    conn.execute(POST_NONCE_SCHEMA)
+    posts = conn.cursor()
+    posts.row_factory = None  # rows as tuples, whatever the connection gives
+    nonces = posts.execute('SELECT substr(content, ?, 8) FROM posts WHERE substr(content, 1, ?) = ?',
+                           (len(ENCRYPTED_POST_PREFIX) + 1, len(ENCRYPTED_POST_PREFIX), ENCRYPTED_POST_PREFIX))
+    conn.executemany('INSERT OR IGNORE INTO post_nonces (nonce) VALUES (?)', ((int(row[0], 16),) for row in nonces))
+
+
+def create_search_index():
+    """ Adds the search indexes to a database made before they were added to create_db.py, indexing the users and posts
+    already in it.
+    """
+    conn = pool.checkout()
+    try:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name='post_search'").fetchone() is not None:
+            return
+        with connections.transaction(conn):
+            create_search_schema(conn)
+    finally:
+        pool.release(conn)
+
+
+def create_search_schema(conn):
+    """ Makes the search indexes and indexes the users and posts already in the database. Used by create_db.py and
+    create_search_index(), commit or roll back the connection's transaction after it.
+
+    :param conn: sqlite3 connection to the database, with any row factory
+    """
+    for statement in SEARCH_SCHEMA:
+        conn.execute(statement)
+    conn.execute("INSERT INTO user_search (user_search) VALUES ('rebuild')")
+    posts = conn.cursor()
+    posts.row_factory = None  # rows as tuples, whatever the connection gives
+    conn.executemany('INSERT INTO post_search (rowid, title, content) VALUES (?, ?, ?)',
+                     (post_search_row(*row) for row in posts.execute('SELECT rowid, title, content FROM posts')))
+
+
+def transaction():
+    """ Groups the writes in a with block into one commit, see connections.transaction(). insert_db(), update_db() and
+    del_from_db() leave committing to it when run inside one. Keep slow work such as hashing out of the block, as the
+    write lock is held until it ends.
+
+    :return: context manager giving this app context's connection
+    """
+    return connections.transaction(get_db())
+
+
+def release_db():
+    """ Gives this app context's connection back to the pool, if it took one """
+    db = g.pop('_database', None)
+    if db is not None:
+        g.pop('_database_pool').release(db)
 
 
 """ These functions have been designed to utilise a separate user login for each action, 
 which requires an upgrade to a database with a server. """
 
 
-def query_db(query, args=(), one=False):
+def query_db(query, args=(), one=False, decrypt=(), lazy=True):
     cur = get_db().execute(query, args)
-    rv = cur.fetchall()
+    if one:
+        row = cur.fetchone()
+        rv = [row] if row is not None else []
+    else:
+        rv = cur.fetchall()
     cur.close()
+    if decrypt and rv:
+        if lazy:
+            rv = [EncryptedRow(row, decrypt) for row in rv]
+        else:
+            decrypt_columns(rv, decrypt)
     return (rv[0] if rv else None) if one else rv
 
 
+def iter_db(query, args=(), decrypt=()):
+    """ Runs a query and yields its rows as they are read from the database, rather than reading them all into a list
+    first as query_db() does. The rows must be read before the app context's connection is released.
+
+    :param query: SQL to run
+    :param args: parameters for the query
+    :param decrypt: names of encrypted columns, decrypted when first read from each row as with query_db()
+    :return: generator of row dicts, EncryptedRow if decrypt is given
+    """
+    cur = get_db().execute(query, args)
+    try:
+        for row in cur:
+            yield EncryptedRow(row, decrypt) if decrypt else row
+    finally:
+        cur.close()
+
+
+class EncryptedRow(MutableMapping):
+    __slots__ = ('_values', '_encrypted')
+
+    def __init__(self, values, encrypted):
+        """ A query result row whose encrypted columns are only decrypted when they are first read. Code that never
+        reads them doesn't pay for decrypting them, and the plain text is kept with the row so lives no longer than it.
+
+        :param values: row dict from the row factory
+        :param encrypted: names of the columns that are encrypted
+        """
+        self._values = values
+        self._encrypted = {column for column in encrypted if values.get(column) is not None}
+
+    @property
+    def encrypted(self):
+        """ Columns that haven't been decrypted yet """
+        return frozenset(self._encrypted)
+
+    def __getitem__(self, column):
+        if column in self._encrypted:
+            self._values[column] = blowfish.decrypt(DBK, DBN, self._values[column])
+            self._encrypted.discard(column)
+        return self._values[column]
+
+    def __setitem__(self, column, value):
+        self._encrypted.discard(column)
+        self._values[column] = value
+
+    def __delitem__(self, column):
+        self._encrypted.discard(column)
+        del self._values[column]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return f"EncryptedRow(columns={list(self._values)}, encrypted={sorted(self._encrypted)})"
+
+
+def decrypt_columns(rows, columns):
+    """ Decrypts columns of query results in place. Each column is decrypted for every row at once, sharing one
+    keystream, rather than a value at a time. Columns that aren't in the results are skipped, so a table's entry in
+    ENCRYPTED_COLUMNS can be passed whatever was selected from it.
+
+    :param rows: list of row dicts from query_db()
+    :param columns: names of the encrypted columns
+    """
+    for column in columns:
+        if column not in rows[0]:
+            continue
+        values = blowfish.decrypt_many(DBK, DBN, [row[column] for row in rows])
+        for row, value in zip(rows, values):
+            row[column] = value
+
+
 def insert_db(query, args=()):
+    """ :return: rowid of the inserted row """
     conn = get_db()
     cur = conn.cursor()
     cur.execute(query, args)
-    conn.commit()
+    if not conn.depth:  # otherwise committed when the transaction() ends
+        conn.commit()
+    return cur.lastrowid
 
 
 def update_db(query, args=()):
     conn = get_db()
     cur = conn.cursor()
     cur.execute(query, args)
-    conn.commit()
+    if not conn.depth:  # otherwise committed when the transaction() ends
+        conn.commit()
 
 
 def del_from_db(query, args=()):
     conn = get_db()
     cur = conn.cursor()
     cur.execute(query, args)
-    conn.commit()
+    if not conn.depth:  # otherwise committed when the transaction() ends
+        conn.commit()
 
 
 def get_user(username):
@@ -98,36 +376,77 @@ def get_user(username):
     return result['userid'] if result else None
 
 
+def encrypt_lookup_key(value):
+    """ Encrypts a value that is searched for in an encrypted column, reusing the ciphertext if the same value was
+    looked up recently. Encryption is deterministic for the database key and nonce so this matches the stored value.
+
+    :param value: the plain text to search for
+    :return: encrypted value
+    :rtype str:
+    """
+    return lookup_keys.encrypt(value)
+
+
 def get_login(email, password):
     start_time = time.time()
     valid_email = validation.validate_email(email)
     valid_password = validation.validate_password(password)
 
     # email is encrypted in the DB so encrypt it
-    encrypted_email = blowfish.encrypt(DBK, DBN, valid_email)
-
-    # Return the user's salt from the db or None if not found
-    query = "SELECT salt FROM users WHERE email=?"
-    salt = query_db(query, (encrypted_email,), one=True)
-    if salt is None or encrypted_email is None or valid_password is None:
-        finish_time = time.time()
-        processing_time = finish_time - start_time
-        time.sleep(max((1 - processing_time), 0))  # we want this entire function to take at least one second
-        return None, None
+    encrypted_email = encrypt_lookup_key(valid_email)
 
-    salt = salt['salt']
-    hashed_password = auth.ug4_hash(valid_password + salt + PEPPER)
+    # Return the user's details from the db or None if not found
+    query = "SELECT userid, username, password, salt FROM users WHERE email=?"
+    details = query_db(query, (encrypted_email,), one=True)
+    if details is None or encrypted_email is None or valid_password is None:
+        pacing.pad(start_time)  # we want this entire function to take at least one second
+        return None, None
 
-    query = "SELECT userid, username FROM users WHERE email=? AND password=?"
-    details = query_db(query, (encrypted_email, hashed_password), one=True)
+    # the cost and salt to verify with are read from the stored hash itself
+    _, iterations, salt, stored_digest = auth.parse_password_hash(details['password'], details['salt'])
+    hashed_password = hasher.submit(valid_password + salt + PEPPER, iterations).result()
+    if not hmac.compare_digest(hashed_password, stored_digest):
+        details = None
+    elif auth.needs_rehash(details['password'], hash_iterations()):
+        # the password is known to be correct here, so bring the stored hash up to the configured cost and format
+        update_db("UPDATE users SET password=? WHERE userid=?",
+                  (hash_password(valid_password, salt), details['userid']))
 
-    finish_time = time.time()
-    processing_time = finish_time - start_time
-    time.sleep(max((1 - processing_time), 0))  # as above, extend processing time to at least one second
+    pacing.pad(start_time)  # as above, extend processing time to at least one second
 
     return (details['userid'], details['username']) if details else (None, None)
 
 
+def hash_iterations():
+    """ Number of iterations new password hashes are made with, as set by the app config. """
+    app_config = current_app.config
+    if not app_config.get("HASH_CALIBRATED", True):
+        calibrate_hash_iterations(app_config)  # left until now by fast start
+    return app_config.get("HASH_ITERATIONS", auth.DEFAULT_ITERATIONS)
+
+
+def calibrate_hash_iterations(app_config):
+    """ Sets HASH_ITERATIONS to suit HASH_TARGET_TIME on this machine, unless it has already been done.
+
+    :param app_config: the app's config
+    """
+    with calibration_lock:
+        if not app_config.get("HASH_CALIBRATED", True):
+            app_config["HASH_ITERATIONS"] = auth.calibrate_iterations(app_config["HASH_TARGET_TIME"])
+            app_config["HASH_CALIBRATED"] = True
+
+
+def hash_password(password, salt):
+    """ Hashes a validated password with the configured number of iterations.
+
+    :return: the password hash in the form it is stored in the db
+    :rtype str:
+    """
+    iterations = hash_iterations()
+    digest = hasher.submit(password + salt + PEPPER, iterations).result()
+    return auth.format_password_hash(iterations, salt, digest)
+
+
 def add_user(name, email, username, password):
     """ Validates and inserts user details into DB on successful validation.
     :return: error message or None if validation was successful
@@ -155,14 +474,12 @@ def add_user(name, email, username, password):
         return 'Account not created: This password entered is vulnerable to attacks, please use another password.'
 
     # email is encrypted in the DB so encrypt it
-    encrypted_email = blowfish.encrypt(DBK, DBN, valid_email)
+    encrypted_email = encrypt_lookup_key(valid_email)
 
     if username_exists(valid_username):
         return 'Username already exists, please choose another.'  # does not require hiding since this is public info
     if email_exists(encrypted_email):
-        finish_time = time.time()
-        processing_time = finish_time - start_time
-        time.sleep(max((1 - processing_time), 0))  # conceal if the user already exists
+        pacing.pad(start_time)  # conceal if the user already exists
         return 'Email exists'
 
     # name is encrypted in the DB so encrypt it
@@ -170,22 +487,19 @@ def add_user(name, email, username, password):
 
     # if it's a new user, build their salt and hash and add them to the db
     salt = auth.generate_salt()
-    password = valid_password + salt + PEPPER
-    pw_hash = auth.ug4_hash(password)
+    pw_hash = hash_password(valid_password, salt)
 
     query = "INSERT INTO users (username, name, password, email, usetwofactor, salt) VALUES (?,?,?,?,?,?)"
     insert_db(query, (valid_username, encrypted_name, pw_hash, encrypted_email, usetwofactor, salt))
 
-    finish_time = time.time()
-    processing_time = finish_time - start_time
-    time.sleep(max((1 - processing_time), 0))  # ensure the processing time remains at least one second
+    pacing.pad(start_time)  # ensure the processing time remains at least one second
     return None
 
 
 def username_exists(username):
     valid_username = validation.validate_username(username)
     query = "SELECT userid FROM users WHERE username=?"
-    exists = query_db(query, (valid_username,))
+    exists = query_db(query, (valid_username,), one=True)
     return False if not exists else True
 
 
@@ -210,21 +524,106 @@ def update_user(userid, username, usetwofactor):
 
     query = "UPDATE users SET username = ?, usetwofactor = ? WHERE userid = ?"
     update_db(query, (valid_username, usetwofactor, userid))
+    feed_cache.invalidate()  # the feed shows usernames
 
-    finish_time = time.time()
-    processing_time = finish_time - start_time
-    time.sleep(max((1 - processing_time), 0))  # ensure the processing time remains at least one second
+    pacing.pad(start_time)  # ensure the processing time remains at least one second
     return None
 
 
-def get_all_posts():
-    return query_db('SELECT posts.creator, posts.date, posts.title, posts.content, users.username FROM posts '
-                    'JOIN users ON posts.creator=users.userid ORDER BY date DESC LIMIT 20')
+class PostsPage(list):
+    """ A page of posts, with the cursors for the pages of older and newer posts either side of it, or None at the ends.
+    Pass them back as older= or newer= for that page.
+    """
+    older = None
+    newer = None
 
 
-def get_posts(cid):
-    query = 'SELECT date, title, content FROM posts WHERE creator=? ORDER BY date DESC'
-    posts = query_db(query, (cid,))
+def page_cursor(post):
+    """ :return: the cursor for a post, its date and rowid, which orders posts even when two share a date """
+    return f"{post['date']!r}:{post['id']}"
+
+
+def parse_page_cursor(cursor):
+    """ :return: (date, rowid) from a cursor made by page_cursor(), or None if it isn't one """
+    match = re.match(r"^(\d+(?:\.\d+)?):(\d+)$", cursor or '')
+    if match is None:
+        return None
+    return float(match.group(1)), int(match.group(2))
+
+
+def query_posts_page(select, conditions=(), args=(), older=None, newer=None, limit=POSTS_PER_PAGE):
+    """ Gets a page of posts, latest first, after (date, rowid) in the index rather than after skipping an offset, so a
+    page deep in the history costs the same as the first.
+
+    :param select: query up to its WHERE clause, selecting from posts including posts.rowid AS id and posts.date
+    :param conditions: SQL conditions the posts must meet
+    :param args: parameters for select then conditions
+    :param older: cursor of the post the page starts after, going back in time
+    :param newer: cursor of the post the page ends before, going forward in time. Takes precedence over older
+    :param limit: posts per page
+    :return: the page of posts
+    :rtype PostsPage:
+    """
+    conditions, args = list(conditions), tuple(args)
+    newer_key, older_key = parse_page_cursor(newer), parse_page_cursor(older)
+    if newer_key is not None:
+        conditions.append('(posts.date, posts.rowid) > (?, ?)')
+        args, order = args + newer_key, 'ASC'
+    elif older_key is not None:
+        conditions.append('(posts.date, posts.rowid) < (?, ?)')
+        args, order = args + older_key, 'DESC'
+    else:
+        order = 'DESC'
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    # one more than the page, to find out whether there is another page past it
+    rows = query_db(f'{select}{where} ORDER BY posts.date {order}, posts.rowid {order} LIMIT ?', args + (limit + 1,))
+
+    page = PostsPage(rows[:limit])
+    more = len(rows) > limit
+    if newer_key is not None:
+        page.reverse()
+        page.newer = page_cursor(page[0]) if more else None
+        page.older = page_cursor(page[-1]) if page else None
+    else:
+        page.older = page_cursor(page[-1]) if more else None
+        page.newer = page_cursor(page[0]) if older_key is not None and page else None
+    return page
+
+
+def get_all_posts(excerpt_length=None, older=None, newer=None):
+    """ Gets a page of the latest posts, see query_posts_page()
+
+    :param excerpt_length: if set, only this many characters of each post's content are read and decrypted
+    :param older: cursor of the post to start after, for older posts
+    :param newer: cursor of the post to end before, for newer posts
+    :return: page of posts with their creator's username, latest first
+    :rtype PostsPage:
+    """
+    if excerpt_length is None:
+        content, args = 'posts.content', ()
+    else:
+        content, args = 'substr(posts.content, 1, ?) AS content', (excerpt_chars(excerpt_length),)
+    posts = query_posts_page(f'SELECT posts.rowid AS id, posts.creator, posts.date, posts.title, {content}, '
+                             'users.username FROM posts JOIN users ON posts.creator=users.userid',
+                             args=args, older=older, newer=newer)
+    for post in posts:
+        post['content'] = decrypt_post_content(post['content'], excerpt_length)
+    return posts
+
+
+def get_posts(cid, older=None, newer=None):
+    """ Gets a page of a user's posts, see query_posts_page()
+
+    :param cid: the user's id
+    :param older: cursor of the post to start after, for older posts
+    :param newer: cursor of the post to end before, for newer posts
+    :return: page of posts, latest first
+    :rtype PostsPage:
+    """
+    posts = query_posts_page('SELECT posts.rowid AS id, date, title, content FROM posts', ['creator=?'], (cid,),
+                             older=older, newer=newer)
+    for post in posts:
+        post['content'] = decrypt_post_content(post['content'])
     return posts
 
 
@@ -232,37 +631,171 @@ def add_post(content, date, title, userid):
     query = "INSERT INTO posts (creator, date, title, content) VALUES (?, ?, ?, ?)"
     validate_title = validation.validate_text(title, max_length=30)
     validate_content = validation.parse_markup(validation.validate_text(content))
-    insert_db(query, (userid, date, validate_title, validate_content))
+    stored_content = validate_content
+    if current_app.config.get("ENCRYPT_POSTS"):
+        stored_content = encrypt_post_content(validate_content, next_post_nonce())
+    with transaction():
+        rowid = insert_db(query, (userid, date, validate_title, stored_content))
+        insert_db('INSERT INTO post_search (rowid, title, content) VALUES (?, ?, ?)',
+                  post_search_row(rowid, validate_title, stored_content))
+    feed_cache.invalidate()  # once committed, so the feed isn't loaded again without the post
 
 
 def get_post(userid, title):
     query = "SELECT * from posts where creator=? AND title=?"
     found = query_db(query, (userid, title), one=True)
+    if found is not None:
+        found['content'] = decrypt_post_content(found['content'])
     return found
 
 
+def next_post_nonce():
+    """ Takes a nonce no post has been encrypted with. Nonces are counted up from the highest taken so far, skipping DBN
+    as the encrypted columns use it, and kept in post_nonces. One taken for a post that is never stored is not used
+    again either.
+
+    :return: 32 bit nonce
+    :rtype int:
+    """
+    with transaction():
+        nonce = (query_db('SELECT MAX(nonce) AS nonce FROM post_nonces', one=True)['nonce'] or 0) + 1
+        if nonce == int(DBN):
+            nonce += 1
+        if nonce >= 1 << 32:
+            raise ValueError("Every post nonce has been used")
+        insert_db('INSERT INTO post_nonces (nonce) VALUES (?)', (nonce,))
+    return nonce
+
+
+def encrypt_post_content(content, nonce):
+    """ Encrypts a post's content for storing. The nonce is kept in front of the ciphertext, and as each post has its
+    own from next_post_nonce(), no two posts share a keystream. The ciphertext is stored as base64, so the start of it
+    can be read and decrypted on its own, see decrypt_post_content().
+
+    :param content: validated post content
+    :param nonce: nonce from next_post_nonce()
+    :return: encrypted content to store
+    :rtype str:
+    """
+    ciphertext = blowfish.encrypt_bytes(DBK, nonce, content.encode('utf-8'))
+    return f"{ENCRYPTED_POST_PREFIX}{nonce:08x}{base64.b64encode(ciphertext).decode('ascii')}"
+
+
+def decrypt_post_content(stored, length=None):
+    """ Gets the plain text of a post's stored content. Content stored before posts were encrypted is returned as is.
+
+    :param stored: content as stored in the posts table, or the start of it
+    :param length: if set, only the first length characters are decrypted and returned
+    :return: post content
+    :rtype str:
+    """
+    if not stored.startswith(ENCRYPTED_POST_PREFIX):
+        return stored if length is None else stored[:length]
+
+    nonce = int(stored[len(ENCRYPTED_POST_PREFIX):ENCRYPTED_POST_HEADER], 16)
+    encoded = stored[ENCRYPTED_POST_HEADER:]
+    if length is None:
+        return blowfish.decrypt_bytes(DBK, nonce, base64.b64decode(encoded)).decode('utf-8')
+    # counter mode can decrypt just the first blocks. A character cut off at the end is dropped
+    encoded = encoded[:excerpt_chars(length) - ENCRYPTED_POST_HEADER]
+    ciphertext = base64.b64decode(encoded[:len(encoded) - len(encoded) % 4])
+    plain_text = blowfish.decrypt_bytes(DBK, nonce, ciphertext)
+    return plain_text.decode('utf-8', errors='ignore')[:length]
+
+
+def excerpt_chars(length):
+    """ Gets how much of a stored post to read to be sure of the first length characters of its content, whether it
+    is encrypted or not. A character is at most 4 bytes of UTF-8, and base64 takes 4 characters for every 3 bytes.
+
+    :param length: number of characters of content wanted
+    :rtype int:
+    """
+    return ENCRYPTED_POST_HEADER + -(-4 * length // 3) * 4
+
+
 def delete_post(userid, title):
     query = "DELETE FROM posts WHERE creator=? AND title=?"
     del_from_db(query, (userid, title))
+    feed_cache.invalidate()
+
+
+def search_text(text):
+    """ :return: validated text as it reads, without the markup and character references validation added """
+    return html.unescape(re.sub(r'<[^>]*>', ' ', text))
+
+
+def post_search_row(rowid, title, content):
+    """ Gets what post_search indexes for a post. The content of an encrypted post is left out, the index would
+    otherwise hold it in plain text.
+
+    :param rowid: rowid of the post
+    :param title: title as stored
+    :param content: content as stored
+    :return: (rowid, title, content) to insert into post_search
+    :rtype tuple:
+    """
+    if content.startswith(ENCRYPTED_POST_PREFIX):
+        content = ''
+    return rowid, search_text(title), search_text(content)
 
 
 def get_users(search):
-    query = "SELECT username FROM users WHERE username LIKE ? LIMIT 20"
+    """ Finds users with the search term anywhere in their username. The username that is the term comes first, then
+    those starting with it, then the shortest. Terms of 3 or more characters are looked up in the user_search trigram
+    index, shorter ones, which have no trigram, are scanned for.
+
+    :param search: search term as entered
+    :return: list of users, and the validated search term
+    :rtype tuple:
+    """
     validated_search = validation.validate_text(search, max_length=30)
-    users = query_db(query, ('%' + validated_search + '%',))
-    return users, validated_search
+    term = search_text(validated_search)
+    if len(term) < TRIGRAM:
+        query = "SELECT username FROM users WHERE username LIKE ? LIMIT ?"
+        return query_db(query, ('%' + term + '%', SEARCH_RESULTS)), validated_search
+
+    # bm25 ranking would count every username with the term in it first, so they're ranked on what they are instead
+    query = ("SELECT username FROM users WHERE userid IN (SELECT rowid FROM user_search WHERE user_search MATCH ? "
+             "ORDER BY rowid DESC LIMIT ?) OR username = ? "
+             "ORDER BY username = ? COLLATE NOCASE DESC, substr(username, 1, ?) = ? COLLATE NOCASE DESC, "
+             "length(username), username LIMIT ?")
+    phrase = '"' + term.replace('"', '""') + '"'  # the whole term as one string of trigrams
+    args = (phrase, SEARCH_CANDIDATES, term, term, len(term), term, SEARCH_RESULTS)
+    return query_db(query, args), validated_search
+
+
+def search_posts(search):
+    """ Finds posts whose title or content have every word of the search term. Posts with every word in the title
+    come first, then the rest, newest first.
+
+    :param search: search term as entered
+    :return: list of posts with their creator's username, best matches first, and the validated search term
+    :rtype tuple:
+    """
+    validated_search = validation.validate_text(search, max_length=30)
+    words = re.findall(r'\w+', search_text(validated_search))
+    if not words:
+        return [], validated_search
+
+    # quoted, so no word is read as an FTS5 operator. Whole words only, a prefix of a common word would have every
+    # word starting with it read in full
+    match = ' '.join(f'"{word}"' for word in words)
+    # each side only reads as many of the latest matches as are shown. bm25 ranking would count every post with the
+    # words in it first, which for a common word is most of them
+    query = ("WITH titled AS (SELECT rowid FROM post_search WHERE post_search MATCH ? ORDER BY rowid DESC LIMIT ?), "
+             "matched AS (SELECT rowid FROM post_search WHERE post_search MATCH ? ORDER BY rowid DESC LIMIT ?) "
+             "SELECT posts.rowid AS id, posts.date, posts.title, users.username FROM posts "
+             "JOIN users ON posts.creator = users.userid "
+             "WHERE posts.rowid IN (SELECT rowid FROM titled UNION SELECT rowid FROM matched) "
+             "ORDER BY posts.rowid IN titled DESC, posts.rowid DESC LIMIT ?")
+    args = (f'{{title}} : ({match})', SEARCH_RESULTS, match, SEARCH_RESULTS, SEARCH_RESULTS)
+    return query_db(query, args), validated_search
 
 
 def get_two_factor(uid):
     query = "SELECT * FROM twofactor WHERE user = ?"
-    result = query_db(query, (uid,), one=True)
-
-    if result is None:
-        return None
-
     # code is encrypted in the DB so decrypt it
-    result['code'] = blowfish.decrypt(DBK, DBN, result['code'])
-    return result
+    return query_db(query, (uid,), one=True, decrypt=ENCRYPTED_COLUMNS['twofactor'])
 
 
 def set_two_factor(userid: int, date_time: str, code: str):
@@ -279,8 +812,9 @@ def del_two_factor(userid: int):
 
 
 def tick_down_two_factor_attempts(userid: int):
-    current_attempts = query_db("SELECT attempts FROM twofactor WHERE user=?", (userid,), one=True)['attempts']
-    update_db("UPDATE twofactor SET attempts =? WHERE user =?", ((current_attempts - 1), userid))
+    with transaction():  # so two wrong codes entered at once can't both take the same attempt
+        current_attempts = query_db("SELECT attempts FROM twofactor WHERE user=?", (userid,), one=True)['attempts']
+        update_db("UPDATE twofactor SET attempts =? WHERE user =?", ((current_attempts - 1), userid))
 
 
 def get_user_id_from_email(email: str):
@@ -289,7 +823,7 @@ def get_user_id_from_email(email: str):
         return None
 
     # email is encrypted in the DB so encrypt it
-    encrypted_email = blowfish.encrypt(DBK, DBN, validated_email)
+    encrypted_email = encrypt_lookup_key(validated_email)
 
     query = "SELECT userid FROM users WHERE email=?"
     userid = query_db(query, (encrypted_email,), one=True)
@@ -302,11 +836,8 @@ def get_user_id_from_email(email: str):
 
 def get_reset_codes(uid):
     query = "SELECT * FROM reset_codes WHERE user = ?"
-    result = query_db(query, (uid,), one=True)
-
     # database item decryption
-    result["code"] = blowfish.decrypt(DBK, DBN, result["code"])
-    return result
+    return query_db(query, (uid,), one=True, decrypt=ENCRYPTED_COLUMNS['reset_codes'])
 
 
 def insert_reset_code(email: str, timestamp: str, code: str):
@@ -354,7 +885,7 @@ def insert_and_retrieve_reset_token(email: str, timestamp: str):
     reset_time_stamp = result['timestamp']
     code = result['code']
     raw_token_string = email + str(userid) + code + reset_time_stamp
-    token = auth.ug4_hash(raw_token_string, 50)  # using Martin's hash function for a quick token
+    token = hasher.submit(raw_token_string, 50).result()  # using Martin's hash function for a quick token
     second_query = f"INSERT or REPLACE INTO reset_tokens VALUES (?,?,?)"
     insert_db(second_query, (userid, timestamp, token))
     return token
@@ -379,19 +910,28 @@ def get_reset_token(email: str):
     return token
 
 
+def load_weak_passwords(path=None):
+    """ Opens the list of weak passwords that is_weak_password() checks, replacing any opened before. Done once at
+    startup, before the app forks, so every worker shares it.
+
+    :param path: plain text or compiled list, see weakpasswords.load(). None for bad_passwords.txt
+    """
+    global weak_passwords
+    old_passwords = weak_passwords
+    weak_passwords = weakpasswords.load(path or DATA_FILENAME)
+    if old_passwords is not None:
+        old_passwords.close()
+
+
 def is_weak_password(password: str):
     password = validation.validate_password(password)
-    weak = False
-    if password:    # needed incase validation fails
-        with open(DATA_FILENAME, 'r') as file:
-            for line in file:
-                line = line.strip("\n")
-                if password == line:
-                    weak = True
-                    break
-    return weak
-  
-  
+    if not password:    # needed incase validation fails
+        return False
+    if weak_passwords is None:  # used without the app starting up
+        load_weak_passwords()
+    return password in weak_passwords
+
+
 def update_password_from_email(email: str, password: str):
     valid_email = validation.validate_email(email)
     valid_password = validation.validate_password(password)
@@ -402,9 +942,9 @@ def update_password_from_email(email: str, password: str):
         first_query = "SELECT salt FROM users WHERE userid=?"
         salt = query_db(first_query, (userid,), one=True)
         salt = salt['salt']
-        valid_password = auth.ug4_hash(valid_password + salt + PEPPER)
+        pw_hash = hash_password(valid_password, salt)
         query = "UPDATE users SET password =? WHERE userid =?"
-        update_db(query, (valid_password, userid))
+        update_db(query, (pw_hash, userid))
         success = True
 
     return success
@@ -435,23 +975,44 @@ def user_reset_code_within_time_limit(user_id: str):
 
 def find_two_factor(user_id):
     query = 'SELECT usetwofactor, email FROM users WHERE userid =?'
-    results = query_db(query, (user_id,), one=True)
-
     # email is encrypted in the DB so decrypt it
-    results['email'] = blowfish.decrypt(DBK, DBN, results['email'])
-    return results
+    return query_db(query, (user_id,), one=True, decrypt=ENCRYPTED_COLUMNS['users'])
 
 
-def get_lockout_time(ip_address):
-    query = 'SELECT lockouttime FROM loginattempts WHERE ip =?'
-    lockout_time = query_db(query, (ip_address,), one=True)
-    if lockout_time is None or lockout_time['lockouttime'] is None:
-        return None
-    return datetime.strptime(lockout_time['lockouttime'], '%Y-%m-%d %H:%M:%S.%f')
+def save_lockouts(lockouts):
+    """ Saves login lockouts from ratelimit.LoginLimiter in one transaction. Runs on its flush thread, outside of any
+    app context, so it takes its own connection from the pool.
+
+    :param lockouts: dict of ip -> (attempts, time locked out in seconds since the epoch), or None to delete its row
+    """
+    upserts = [(ip, lockout[0], datetime.fromtimestamp(lockout[1]).strftime('%Y-%m-%d %H:%M:%S.%f'))
+               for ip, lockout in lockouts.items() if lockout is not None]
+    deletes = [(ip,) for ip, lockout in lockouts.items() if lockout is None]
+    conn = pool.checkout()
+    try:
+        with connections.transaction(conn):
+            conn.executemany('INSERT INTO loginattempts (ip, attempts, lockouttime) VALUES (?, ?, ?) ON CONFLICT (ip) '
+                             'DO UPDATE SET attempts=excluded.attempts, lockouttime=excluded.lockouttime', upserts)
+            conn.executemany('DELETE FROM loginattempts WHERE ip=?', deletes)
+    finally:
+        pool.release(conn)
+
+
+def load_lockouts(since):
+    """ Gets the login lockouts saved by save_lockouts() that started after a time
+
+    :param since: seconds since the epoch
+    :return: list of (ip, time locked out in seconds since the epoch)
+    """
+    conn = pool.checkout()
+    try:
+        rows = conn.execute('SELECT ip, lockouttime FROM loginattempts WHERE lockouttime >= ?',
+                            (datetime.fromtimestamp(since).strftime('%Y-%m-%d %H:%M:%S.%f'),)).fetchall()
+    finally:
+        pool.release(conn)
+    return [(row['ip'], datetime.fromisoformat(row['lockouttime']).timestamp()) for row in rows]
 
 
 def get_email(cid):
     query = 'SELECT email FROM users WHERE userid=?'
-    encrypted_email = query_db(query, (cid,), one=True)['email']
-    email = blowfish.decrypt(DBK, DBN, encrypted_email)
-    return email
+    return query_db(query, (cid,), one=True, decrypt=ENCRYPTED_COLUMNS['users'])['email']
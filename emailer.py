@@ -8,41 +8,41 @@ Desc.   : Class to handle email functions for blog
 History : 01/04/2021 - v1.0 - Basic functions.
           06/04/2021 - v1.1 - Swapped out confidential details for EnvVars
           30/04/2021 - v1.2 - Sorted out encryption of EnvVars
+          18/10/2026 - v1.3 - Account details are decrypted once by config rather than for every Emailer
+          18/10/2026 - v1.4 - smtplib is imported when the first email is sent
+          18/10/2026 - v1.5 - A new two factor code replaces the old one in one commit
 """
 
 __author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
 __copyright__ = "Copyright 2021, CMP-UG4"
 __credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
-__version__ = "1.2"
+__version__ = "1.5"
 __email__ = "gny17hvu@uea.ac.uk"
 __status__ = "Production"  # or "Development"
 
 import datetime
-import os
-import smtplib
-from email.message import EmailMessage
-
-from dotenv import load_dotenv
 
 import blowfish
+import config
 import db
 from auth import generate_code
 
-load_dotenv(override=True)
-SEK = blowfish.decrypt("dQw4w9WgXcQ", 0, os.environ.get("UG_4_SEK"))
-DBN = blowfish.decrypt(SEK, 0, os.environ.get("UG_4_DBN"))
-
 
 class Emailer:
     def __init__(self):
-        self._account_name = blowfish.decrypt(SEK, DBN, os.environ.get("UG_4_EMAIL"))
-        self._account_password = blowfish.decrypt(SEK, DBN, os.environ.get("UG_4_EPW"))
+        # decrypted the first time an email is sent, then kept by config
+        self._account_name = config.EMAIL
+        self._account_password = config.EPW
 
     # Base function for sending emails
     def send_email(self, to_address: str, subject: str, message: str):
+        # imported here as most logins and sign ups on the default accounts never send an email
+        import smtplib
+        from email.message import EmailMessage
+
         mail_server = smtplib.SMTP('smtp.gmail.com', 587)  # This is using a TLS connection (not sure if allowed)
         mail_server.starttls()
-        self._account_name += blowfish.decrypt(SEK, DBN, os.environ.get("UG_4_EMAIL_TYPE"))
+        self._account_name += config.EMAIL_TYPE
         mail_server.login(self._account_name, self._account_password)
 
         email_message = EmailMessage()
@@ -63,12 +63,11 @@ def send_two_factor(uid, user_email):
     if user_email[-5:] == 'abcde':
         default_account = True
 
-    # delete existing codes for this user
-    db.del_two_factor(uid)
-
-    # build and save a new code
+    # delete existing codes for this user and save a new one in one commit, before the email is sent
     code = generate_code()
-    db.set_two_factor(uid, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), code)
+    with db.transaction():
+        db.del_two_factor(uid)
+        db.set_two_factor(uid, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), code)
     e = Emailer()
     message = "Your Two-Factor code for UG-4 Secure Blogging site is: " + code
 
@@ -108,5 +107,5 @@ def send_account_confirmation(user_email: str, name: str):
 
 
 def encrypt_email(email):
-    email = blowfish.encrypt(SEK, DBN, email)
+    email = blowfish.encrypt(config.SEK, config.DBN, email)
     return email
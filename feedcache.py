@@ -0,0 +1,191 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Home feed cache
+File    : feedcache.py
+Date    : Sunday 18 October 2026
+Desc.   : Keeps pages of the home feed ready to render, so the home page only queries the database when the feed has
+          changed. Writes that change the feed invalidate every page at once by moving on the cache's generation, and
+          a page loaded under an older generation is never kept. When a page is missing, one request loads it and any
+          others asking for it at the same time wait for that load rather than each querying the database.
+          Given a directory, processes share pages and invalidations through it: the generation is a file that an
+          invalidation replaces, and pages are kept there as JSON for other processes to read.
+History : 18/10/2026 - v1.0 - Create project file.
+          18/10/2026 - v1.1 - Note the cost of reading the shared generation on every get()
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.1"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Production"  # or "Development"
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES = 64  # pages kept, the least recently read is dropped past this
+TTL = 30  # seconds a page is kept, in case the feed is changed by something that doesn't invalidate it
+LOAD_TIMEOUT = 10  # seconds a request waits for another's load before checking the cache again
+GENERATION_FILE = 'generation'
+
+
+class _Entry:
+    __slots__ = ('value', 'generation', 'expires')
+
+    def __init__(self, value, generation, expires):
+        self.value = value
+        self.generation = generation
+        self.expires = expires
+
+
+class _Load:
+    __slots__ = ('done', 'value', 'failed')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.failed = False
+
+
+class FeedCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL, shared_dir=None, clock=time.time):
+        """ Sets up an empty cache
+
+        :param max_entries: most pages kept in memory
+        :param ttl: seconds a page is kept
+        :param shared_dir: directory to share pages and invalidations with other processes through, None for none
+        :param clock: function returning the time in seconds since the epoch
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_dir = shared_dir
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> _Entry, least recently read first
+        self._loads = {}  # key -> _Load of the page being loaded
+        self._lock = threading.Lock()
+        self._local_generation = 0
+        self._stats = {"hits": 0, "shared_hits": 0, "waits": 0, "loads": 0, "invalidations": 0}
+        if shared_dir is not None:
+            os.makedirs(shared_dir, exist_ok=True)
+            if not os.path.exists(os.path.join(shared_dir, GENERATION_FILE)):
+                self._replace_generation_file()
+
+    def get(self, key, load):
+        """ Gets a page, loading it if it isn't cached or has been invalidated
+
+        :param key: hashable, JSON serialisable key of the page, e.g. its cursors
+        :param load: function returning the page. With a shared_dir it must be JSON serialisable
+        :return: the page, shared with other requests so not to be changed
+        """
+        while True:
+            generation = self._generation()
+            now = self.clock()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.generation == generation and entry.expires > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry.value
+                pending = self._loads.get(key)
+                if pending is None:
+                    pending = self._loads[key] = _Load()
+                    break
+            # another request is loading the page, so share its result. If that load failed, try again
+            if pending.done.wait(LOAD_TIMEOUT) and not pending.failed:
+                with self._lock:
+                    self._stats["waits"] += 1
+                return pending.value
+
+        try:
+            value = self._read_shared(key, generation, now)
+            if value is None:
+                value = load()
+                self._write_shared(key, value, generation, now)
+                counter = "loads"
+            else:
+                counter = "shared_hits"
+            with self._lock:
+                self._stats[counter] += 1
+                self._entries[key] = _Entry(value, generation, now + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            pending.value = value
+            return value
+        except BaseException:
+            pending.failed = True
+            raise
+        finally:
+            with self._lock:
+                self._loads.pop(key, None)
+            pending.done.set()
+
+    def invalidate(self):
+        """ Drops every page, here and in any process sharing the shared_dir. Call it after the change is committed, so
+        a page loaded after the invalidation sees the change.
+        """
+        with self._lock:
+            self._local_generation += 1
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+        if self.shared_dir is not None:
+            self._replace_generation_file()
+
+    def stats(self):
+        """ :return: dict of how pages were served, with hit_ratio the fraction served without a load """
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries))
+        served = stats["hits"] + stats["shared_hits"] + stats["waits"] + stats["loads"]
+        stats["hit_ratio"] = (served - stats["loads"]) / served if served else 0.0
+        return stats
+
+    def _generation(self):
+        # with a shared_dir every get(), hits included, opens and reads the generation file, so invalidations made by
+        # other processes are seen straight away. A local directory keeps that to a system call or two
+        if self.shared_dir is None:
+            return self._local_generation
+        try:
+            with open(os.path.join(self.shared_dir, GENERATION_FILE), 'r') as file:
+                shared = file.read()
+        except OSError:
+            shared = None
+        return self._local_generation, shared
+
+    def _replace_generation_file(self):
+        # a value no process has seen before, written beside the file and moved over it so it changes in one go
+        with tempfile.NamedTemporaryFile('w', dir=self.shared_dir, delete=False) as file:
+            file.write(f"{time.time_ns()}-{os.urandom(8).hex()}")
+        os.replace(file.name, os.path.join(self.shared_dir, GENERATION_FILE))
+
+    def _shared_path(self, key):
+        name = hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.shared_dir, f"{name}.json")
+
+    def _read_shared(self, key, generation, now):
+        if self.shared_dir is None or generation[1] is None:
+            return None
+        try:
+            with open(self._shared_path(key), 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get("generation") != generation[1] or entry.get("expires", 0) <= now:
+            return None
+        return entry.get("value")
+
+    def _write_shared(self, key, value, generation, now):
+        if self.shared_dir is None or generation[1] is None:
+            return
+        entry = {"generation": generation[1], "expires": now + self.ttl, "value": value}
+        try:
+            with tempfile.NamedTemporaryFile('w', dir=self.shared_dir, delete=False, encoding='utf-8') as file:
+                json.dump(entry, file)
+            os.replace(file.name, self._shared_path(key))
+        except OSError:
+            pass  # other processes load the page themselves
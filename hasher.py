@@ -0,0 +1,100 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Password hashing service
+File    : hasher.py
+Date    : Sunday 18 October 2026
+Desc.   : Runs ug4_hash in a pool of worker processes so that hashing on one request thread doesn't hold the GIL for
+          every other thread. Logins then scale with the number of CPU cores rather than queueing behind one.
+History : 18/10/2026 - v1.0 - Process pool service with a bounded submission queue.
+          18/10/2026 - v1.1 - Optionally start the service on first use.
+          18/10/2026 - v1.2 - The process pool's life cycle comes from workerpool.WorkerPool.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.2"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Production"  # or "Development"
+
+import threading
+from concurrent.futures import Future
+
+import auth
+import workerpool
+
+
+class HashingService(workerpool.WorkerPool):
+    def __init__(self, workers=None, queue_size=None, autostart=False):
+        """ Sets up the service. No worker processes are created until start() is called.
+
+        :param workers: Number of worker processes, defaults to the number of CPU cores
+        :param queue_size: Maximum number of hashes submitted but not yet finished, defaults to 4 per worker
+        :param autostart: Start the service on the first submit() rather than hashing on the calling thread
+        """
+        super().__init__(workers)
+        self.queue_size = queue_size or self.workers * 4
+        self.autostart = autostart
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+
+    def submit(self, password, iterations=50):
+        """ Queues a password to be hashed with auth.ug4_hash(). Blocks while the submission queue is full. If the
+        service hasn't been started, it is started now if autostart is set, otherwise the hash is worked out on this
+        thread instead.
+
+        :param password: The password to be hashed
+        :param iterations: Number of extra iterations of the algorithm to run through
+        :return: Future that resolves to the UG4 hash of the password
+        :rtype Future:
+        """
+        if not self.running and self.autostart:
+            self.start()
+        if not self.running:
+            future = Future()
+            future.set_result(auth.ug4_hash(password, iterations))
+            return future
+
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(auth.ug4_hash, password, iterations)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release_slot)
+        return future
+
+    def _release_slot(self, _future):
+        self._slots.release()
+
+
+service = HashingService()
+
+
+def start(workers=None, queue_size=None, lazy=False):
+    """ Replaces the shared service with one using the given settings and starts it. Called once by the app on start.
+
+    :param workers: Number of worker processes, defaults to the number of CPU cores
+    :param queue_size: Maximum number of hashes waiting or in progress at once
+    :param lazy: Leave starting the service until the first password is hashed
+    :return: the service
+    :rtype HashingService:
+    """
+    global service
+    if service.running:
+        service.shutdown()
+    service = HashingService(workers, queue_size, autostart=lazy)
+    if not lazy:
+        service.start()
+    return service
+
+
+def submit(password, iterations=50):
+    """ Queues a password to be hashed on the shared service.
+
+    :param password: The password to be hashed
+    :param iterations: Number of extra iterations of the algorithm to run through
+    :return: Future that resolves to the UG4 hash of the password
+    :rtype Future:
+    """
+    return service.submit(password, iterations)
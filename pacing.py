@@ -0,0 +1,190 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Response timing equalisation
+File    : pacing.py
+Date    : Sunday 18 October 2026
+Desc.   : Holds sensitive responses back until a minimum time has passed, so that how long a request takes doesn't
+          reveal whether an account exists. Functions call pad() instead of sleeping, which records a release deadline
+          on the request. The deadline is then kept either by ReleaseMiddleware, which waits on the worker thread as
+          before, or by DeferredReleaseApp, an ASGI front end that holds the finished response on its event loop so
+          the worker thread is free to take the next request.
+History : 18/10/2026 - v1.0 - Deferred release of padded responses, with the floor configurable per route.
+          18/10/2026 - v1.1 - asyncio is only imported by the ASGI front end
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.1"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Production"  # or "Development"
+
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_request_context, request
+
+DEFAULT_FLOOR = 1.0  # seconds
+RELEASE_AT = 'ug4.release_at'  # environ key holding the time.time() the response may be released at
+DEFERRED = 'ug4.deferred_release'  # environ key set when the server releases responses itself
+
+
+def floor_for(endpoint):
+    """ Gets the minimum response time for a route, from app.config["RESPONSE_FLOORS"] if it is set for that endpoint
+    and app.config["RESPONSE_FLOOR"] otherwise.
+
+    :param endpoint: Name of the route's view function
+    :return: floor in seconds
+    :rtype float:
+    """
+    floors = current_app.config.get("RESPONSE_FLOORS", {})
+    return floors.get(endpoint, current_app.config.get("RESPONSE_FLOOR", DEFAULT_FLOOR))
+
+
+def pad(start_time):
+    """ Makes sure the work started at start_time isn't seen to finish before the floor for the current route. In a
+    request this only records when the response may be released. Outside of a request there is nothing to hold back,
+    so this sleeps for the remainder of the default floor instead.
+
+    :param start_time: time.time() the padded work started at
+    """
+    if not has_request_context():
+        time.sleep(max(start_time + DEFAULT_FLOOR - time.time(), 0))
+        return
+
+    release_at = start_time + floor_for(request.endpoint)
+    request.environ[RELEASE_AT] = max(request.environ.get(RELEASE_AT, 0), release_at)
+
+
+class ReleaseMiddleware:
+    def __init__(self, wsgi_app):
+        """ WSGI middleware that keeps padded responses back by waiting on the worker thread. This gives the same
+        behaviour as sleeping in the padded function, for servers that can't defer the release themselves.
+
+        :param wsgi_app: the WSGI app to wrap, usually app.wsgi_app
+        """
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        response = self.wsgi_app(environ, start_response)
+        if not environ.get(DEFERRED):
+            time.sleep(max(environ.get(RELEASE_AT, 0) - time.time(), 0))
+        return response
+
+
+class DeferredReleaseApp:
+    def __init__(self, wsgi_app, workers=8):
+        """ ASGI front end for a WSGI app. Each request is handled on a pool of worker threads. Padded responses are
+        then held on the event loop until their release time, so a small pool can serve many padded requests at once.
+        Serve with any ASGI server, e.g. `uvicorn asgi:app`.
+
+        :param wsgi_app: the WSGI app to serve
+        :param workers: Number of threads to run the WSGI app on
+        """
+        self.wsgi_app = wsgi_app
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def __call__(self, scope, receive, send):
+        import asyncio  # only the ASGI front end needs it, so the WSGI server doesn't pay to import it
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        environ = build_environ(scope, body)
+        environ[DEFERRED] = True
+        loop = asyncio.get_running_loop()
+        status, headers, content = await loop.run_in_executor(self._executor, run_wsgi, self.wsgi_app, environ)
+
+        # the worker thread is already free at this point, only a timer on the event loop is kept for the hold
+        delay = environ.get(RELEASE_AT, 0) - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        await send({'type': 'http.response.start',
+                    'status': int(status.split(' ', 1)[0]),
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]})
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def build_environ(scope, body):
+    """ Builds a WSGI environ from an ASGI http scope and its request body.
+
+    :param scope: ASGI connection scope
+    :param bytes body: the full request body
+    :return: WSGI environ
+    :rtype dict:
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = 'HTTP_' + name
+            environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+
+def run_wsgi(wsgi_app, environ):
+    """ Runs a WSGI app to completion.
+
+    :return: status line, list of header tuples and the full response body
+    :rtype tuple[str, list, bytes]:
+    """
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = status
+        response['headers'] = headers
+
+    iterable = wsgi_app(environ, start_response)
+    try:
+        content = b''.join(iterable)
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+    return response['status'], response['headers'], content
@@ -0,0 +1,258 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Login rate limiting
+File    : ratelimit.py
+Date    : Sunday 18 October 2026
+Desc.   : Counts failed logins per IP address in memory rather than in the loginattempts table. An IP that fails 5
+          times within 15 minutes is locked out for 15 minutes. Checking and counting an attempt never touches the
+          database; lockouts are saved in batches by a background thread so they survive a restart, and loaded again
+          when the app starts. Memory is bounded by dropping the IPs that have gone longest without an attempt, never
+          one that is locked out. Locked out IPs are kept apart until their lockout ends.
+History : 18/10/2026 - v1.0 - Create project file.
+          18/10/2026 - v1.1 - Locked out IPs are never dropped to make room
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.1"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Production"  # or "Development"
+
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+MAX_ATTEMPTS = 5  # failed logins within the window that lock an IP out
+WINDOW = 15 * 60  # seconds a failed login counts for, and how long a lockout lasts
+MAX_TRACKED = 100000  # IPs not locked out kept, the one that has gone longest without an attempt is dropped past this
+PRUNE_AT = 1024  # locked out IPs kept before those whose lockout has ended are swept out
+FLUSH_INTERVAL = 5  # seconds between saving new lockouts
+
+logger = logging.getLogger(__name__)
+_limiters = weakref.WeakSet()  # every limiter, so forked children can reset them
+
+
+class _Entry:
+    __slots__ = ('failures', 'locked_until', 'stored')
+
+    def __init__(self, max_attempts):
+        self.failures = deque(maxlen=max_attempts)  # times of the failed logins still in the window, oldest first
+        self.locked_until = 0.0
+        self.stored = False  # whether a lockout for this IP has been saved, so its row is deleted on a good login
+
+
+class LoginLimiter:
+    def __init__(self, max_attempts=MAX_ATTEMPTS, window=WINDOW, max_tracked=MAX_TRACKED, clock=time.time):
+        """ Sets up an empty limiter. Call load() with saved lockouts and start() to save new ones as they happen.
+
+        :param max_attempts: failed logins within the window that lock an IP out
+        :param window: seconds a failed login counts for, and how long a lockout lasts
+        :param max_tracked: most IPs that aren't locked out kept in memory. Locked out IPs are kept until their
+                            lockout ends, however many there are
+        :param clock: function returning the time in seconds since the epoch
+        """
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_tracked = max_tracked
+        self.clock = clock
+        self._entries = OrderedDict()  # ip -> _Entry of IPs that aren't locked out, least recently seen first
+        self._locked = {}  # ip -> _Entry of IPs locked out, never dropped for room so a lockout can't be pushed out
+        self._prune_at = PRUNE_AT
+        self._pending = {}  # ip -> (attempts, time locked out) to save, or None to delete its row
+        self._lock = threading.Lock()
+        self._save = None
+        self._interval = FLUSH_INTERVAL
+        self._stop = threading.Event()
+        self._flusher = None
+        self._flusher_pid = None
+        self._registered = False
+        _limiters.add(self)
+
+    def locked_out(self, ip):
+        """ :return: whether the IP is locked out """
+        now = self.clock()
+        with self._lock:
+            entry = self._locked.get(ip)
+            if entry is not None:
+                if entry.locked_until > now:
+                    return True
+                self._unlock(ip, entry)
+                return False
+            if ip in self._entries:
+                self._entries.move_to_end(ip)
+            return False
+
+    def failed(self, ip):
+        """ Counts a failed login from the IP, locking it out if this is one too many
+
+        :param ip: address the login came from
+        :return: attempts the IP has left, 0 if it is now locked out
+        :rtype int:
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._locked.get(ip)
+            if entry is not None:
+                if entry.locked_until > now:
+                    return 0
+                self._unlock(ip, entry)  # the lockout is over, so count afresh
+            else:
+                entry = self._entries.get(ip)
+                if entry is None:
+                    entry = _Entry(self.max_attempts)
+                self._track(ip, entry)
+
+            failures = entry.failures
+            while failures and failures[0] <= now - self.window:
+                failures.popleft()
+            failures.append(now)
+            if len(failures) < self.max_attempts:
+                return self.max_attempts - len(failures)
+
+            entry.locked_until = now + self.window
+            failures.clear()
+            entry.stored = True
+            self._lock_out(ip, entry, now)
+            self._pending[ip] = (self.max_attempts, now)
+            self._check_flusher()
+            return 0
+
+    def succeeded(self, ip):
+        """ Forgets the failed logins from the IP after a good login """
+        with self._lock:
+            entry = self._entries.pop(ip, None) or self._locked.pop(ip, None)
+            if entry is not None and entry.stored:
+                self._pending[ip] = None
+                self._check_flusher()
+
+    def load(self, lockouts):
+        """ Restores saved lockouts. Those that have already ended are skipped.
+
+        :param lockouts: iterable of (ip, time locked out in seconds since the epoch)
+        :return: number of IPs still locked out
+        :rtype int:
+        """
+        now = self.clock()
+        loaded = 0
+        with self._lock:
+            for ip, locked_at in lockouts:
+                if locked_at + self.window <= now:
+                    continue
+                entry = self._entries.pop(ip, None) or self._locked.get(ip) or _Entry(self.max_attempts)
+                entry.locked_until = locked_at + self.window
+                entry.stored = True
+                self._lock_out(ip, entry, now)
+                loaded += 1
+        return loaded
+
+    def flush(self, save=None):
+        """ Saves the lockouts made, and deletes those cleared, since the last flush
+
+        :param save: function given a dict of ip -> (attempts, time locked out) or None, defaults to the one given to
+                     start()
+        :return: number of IPs saved or deleted
+        :rtype int:
+        """
+        save = save or self._save
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending or save is None:
+            return 0
+        try:
+            save(pending)
+        except Exception:
+            with self._lock:
+                for ip, lockout in pending.items():
+                    self._pending.setdefault(ip, lockout)  # kept for the next flush unless something newer replaced it
+            raise
+        return len(pending)
+
+    def start(self, save, interval=FLUSH_INTERVAL):
+        """ Saves lockouts every interval seconds from a background thread, and when the process exits
+
+        :param save: function given a dict of ip -> (attempts, time locked out) or None to delete its row
+        :param interval: seconds between saves
+        """
+        self._save = save
+        self._interval = interval
+        self._start_thread()
+        if not self._registered:
+            self._registered = True
+            atexit.register(self.stop)
+
+    def stop(self):
+        """ Stops the background thread and saves anything left to save """
+        self._stop.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        self._flusher = None
+        self.flush()
+        self._save = None  # saved for the last time, and let go of so it doesn't outlive the modules it uses at exit
+
+    def stats(self):
+        """ :return: dict of how many IPs are tracked, locked out and waiting to be saved """
+        now = self.clock()
+        with self._lock:
+            locked = sum(1 for entry in self._locked.values() if entry.locked_until > now)
+            return {"tracked": len(self._entries) + len(self._locked), "locked": locked, "pending": len(self._pending)}
+
+    def _track(self, ip, entry):
+        # the IP has just been seen, dropping the one seen longest ago if there are too many
+        self._entries[ip] = entry
+        self._entries.move_to_end(ip)
+        while len(self._entries) > self.max_tracked:
+            self._entries.popitem(last=False)
+
+    def _unlock(self, ip, entry):
+        del self._locked[ip]
+        entry.locked_until = 0.0
+        entry.failures.clear()
+        self._track(ip, entry)
+
+    def _lock_out(self, ip, entry, now):
+        self._entries.pop(ip, None)
+        self._locked[ip] = entry
+        if len(self._locked) >= self._prune_at:
+            # IPs whose lockout has ended. Their saved rows have ended too, so load() would skip them
+            for ended in [locked_ip for locked_ip, locked in self._locked.items() if locked.locked_until <= now]:
+                del self._locked[ended]
+            self._prune_at = max(PRUNE_AT, 2 * len(self._locked))  # so sweeps stay rare however many are locked
+
+    def _start_thread(self):
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name="login-limiter-flush", daemon=True)
+        self._flusher_pid = os.getpid()
+        self._flusher.start()
+
+    def _check_flusher(self):
+        # a forked child doesn't have the parent's flush thread, it starts its own once it has something to save
+        if self._save is not None and self._flusher_pid != os.getpid():
+            self._start_thread()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Saving login lockouts failed, retrying in %ss", self._interval)
+
+    def _after_fork(self):
+        # the parent saves what it had pending. Children that never count a login, e.g. hashing workers, never start a
+        # flush thread
+        self._lock = threading.Lock()
+        self._pending = {}
+
+
+def _after_fork():
+    for limiter in list(_limiters):
+        limiter._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
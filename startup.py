@@ -0,0 +1,115 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Startup profiling
+File    : startup.py
+Date    : Sunday 18 October 2026
+Desc.   : Times each step of starting the app and reports where the time to the first request goes: a summary of
+          `python -X importtime` for importing blog, the time taken by each init step, and the time from launching
+          Python to the first response, with and without UG_4_FAST_START.
+          Run from the project root with `python -m startup [runs]`.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Production"  # or "Development"
+
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+FIRST_REQUEST_TARGET = 0.4  # seconds from launching Python to the first response with UG_4_FAST_START=1
+steps = []  # (name, seconds) for each init step in the order they finished
+
+
+@contextlib.contextmanager
+def step(name):
+    """ Times an init step and records it in steps
+
+    :param name: what the step does
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        steps.append((name, time.perf_counter() - start_time))
+
+
+def import_times(module="blog", top=15):
+    """ Imports a module in a new interpreter with -X importtime and sums the time by top level package
+
+    :param module: the module to import
+    :param top: number of packages to return
+    :return: (package, seconds) for the slowest packages, slowest first
+    :rtype list[tuple[str, float]]:
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    totals = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        if not self_time.strip().isdigit():
+            continue  # the header line
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(self_time) / 1e6
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def time_to_first_request(fast_start):
+    """ Starts Python, imports the app and serves one request to the index page, in a new process
+
+    :param fast_start: whether UG_4_FAST_START is set
+    :return: dict of the seconds until the first response, the seconds spent in each init step and how many
+             secrets were decrypted
+    """
+    env = dict(os.environ, UG_4_FAST_START="1" if fast_start else "0", UG_4_LAUNCHED_AT=repr(time.time()))
+    result = subprocess.run([sys.executable, "-m", "startup", "--child"], capture_output=True, text=True, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def _child():
+    import blog
+    import config
+    import startup  # run as __main__, so blog records its steps in the imported module rather than this one
+
+    response = blog.app.test_client().get('/')
+    first_request = time.time() - float(os.environ["UG_4_LAUNCHED_AT"])
+    print(json.dumps({"status": response.status_code, "first_request": first_request, "steps": startup.steps,
+                      "secrets": config.stats()}))
+
+
+def main(runs):
+    print("Import time by package for `import blog`:")
+    for package, seconds in import_times():
+        print(f"  {package:<24} {seconds * 1000:>8.1f} ms")
+
+    for fast_start in (False, True):
+        reports = [time_to_first_request(fast_start) for _ in range(runs)]
+        print(f"\nUG_4_FAST_START={int(fast_start)}:")
+        for name, seconds in reports[-1]["steps"]:
+            print(f"  {name:<40} {seconds * 1000:>8.1f} ms")
+        secrets = reports[-1]["secrets"]
+        print(f"  {'decrypting ' + str(secrets['decrypted']) + ' secrets':<40} {secrets['seconds'] * 1000:>8.1f} ms")
+        first_request = statistics.median(report["first_request"] for report in reports)
+        print(f"  {'time to first request (median)':<40} {first_request * 1000:>8.1f} ms")
+        if fast_start:
+            met = "met" if first_request <= FIRST_REQUEST_TARGET else "missed"
+            print(f"  target of {FIRST_REQUEST_TARGET * 1000:.0f} ms {met}")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ["--child"]:
+        _child()
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -1,4 +1,6 @@
 import datetime
+import os
+import random
 import unittest
 
 import auth
@@ -29,6 +31,45 @@ class MyTestCase(unittest.TestCase):
                          "b2c680b52ee42d744e1c869bf2cb55602033634917c963e9afa58f7aee37c98e",
                          auth.ug4_hash("0123456789ThisIsAVeryLongPasswordDesignedToExtendBeyondABlock#!£$%^&*(){}"))
 
+    def test_ug4_hash_iterations(self):
+        # each iteration feeds the hex digest of the previous one back in
+        self.assertEqual(auth.ug4_hash(auth.ug4_hash("a", 0), 0), auth.ug4_hash("a", 1))
+        self.assertEqual(auth.ug4_hash(auth.ug4_hash("a", 24), 25), auth.ug4_hash("a"))
+
+    def test_ug4_hash_many(self):
+        passwords = ["a",
+                     "ThisIsAVeryLongPasswordWithNumbersAndSymbols123%$@~!é",
+                     "0123456789ThisIsAVeryLongPasswordDesignedToExtendBeyondABlock#!£$%^&*(){}"]
+        self.assertEqual([auth.ug4_hash(password) for password in passwords], auth.ug4_hash_many(passwords))
+
+    def test_ug4_hash_many_random(self):
+        chars = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!£$%^&*()_-é€"
+        passwords = ["".join(random.choice(chars) for _ in range(random.randrange(200))) for _ in range(30)]
+        self.assertEqual([auth.ug4_hash(password, 2) for password in passwords], auth.ug4_hash_many(passwords, 2))
+        self.assertEqual([], auth.ug4_hash_many([]))
+
+    def test_password_hash_format(self):
+        stored = auth.format_password_hash(12, "somesalt", "abcdef")
+        self.assertEqual("$ug4$12$somesalt$abcdef", stored)
+        self.assertEqual(("ug4", 12, "somesalt", "abcdef"), auth.parse_password_hash(stored, "ignored"))
+
+        # bare digests from before the format was versioned use the default cost and the separately stored salt
+        self.assertEqual(("ug4", 50, "columnsalt", "abcdef"), auth.parse_password_hash("abcdef", "columnsalt"))
+        self.assertRaises(ValueError, auth.parse_password_hash, "$md5$1$salt$abcdef")
+
+    def test_needs_rehash(self):
+        self.assertTrue(auth.needs_rehash("abcdef", 50))
+        self.assertFalse(auth.needs_rehash("$ug4$50$salt$abcdef", 50))
+        self.assertTrue(auth.needs_rehash("$ug4$50$salt$abcdef", 60))
+        self.assertTrue(auth.needs_rehash("$ug4$50$salt$abcdef", 40))
+
+    def test_calibrate_iterations(self):
+        iterations = auth.calibrate_iterations(0.05)
+        self.assertGreaterEqual(iterations, auth.MIN_ITERATIONS)
+        self.assertLessEqual(iterations, auth.MAX_ITERATIONS)
+        self.assertEqual(auth.MAX_ITERATIONS, auth.calibrate_iterations(10 ** 6))
+        self.assertEqual(auth.MIN_ITERATIONS, auth.calibrate_iterations(0))
+
     def test_generate_salt(self):
         self.assertIsNotNone(auth.generate_salt())
 
@@ -53,6 +94,24 @@ class MyTestCase(unittest.TestCase):
         auth.configure_app(app)
         self.assertEqual(datetime.timedelta(days=1), app.permanent_session_lifetime)
 
+    def test_configure_feed_cache_ttl(self):
+        app = blog.app
+        ttl = os.environ.pop("UG_4_FEED_CACHE_TTL", None)
+        try:
+            auth.configure_app(app)
+            self.assertIsNone(app.config["FEED_CACHE_TTL"])  # feedcache.TTL
+            os.environ["UG_4_FEED_CACHE_TTL"] = "0"
+            auth.configure_app(app)
+            self.assertEqual(0.0, app.config["FEED_CACHE_TTL"])  # not cached
+            os.environ["UG_4_FEED_CACHE_TTL"] = "2.5"
+            auth.configure_app(app)
+            self.assertEqual(2.5, app.config["FEED_CACHE_TTL"])
+        finally:
+            os.environ.pop("UG_4_FEED_CACHE_TTL", None)
+            if ttl is not None:
+                os.environ["UG_4_FEED_CACHE_TTL"] = ttl
+            auth.configure_app(app)
+
 
 if __name__ == '__main__':
     unittest.main()
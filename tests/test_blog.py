@@ -1,10 +1,12 @@
+import re
 import time
 import unittest
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
+import blog
 import db
-from blog import app
+from blog import app, login_limiter
 
 
 # Integration testing for all components, includes common attacks
@@ -123,6 +125,33 @@ class MyTestCase(unittest.TestCase):
         # check posts were retrieved from the database
         self.assertIn(b'<h2>Item', response.data)
 
+    def test_index_pages(self):
+        client = app.test_client(self)
+        first = client.get('/').data
+        self.assertNotIn(b'Newer posts', first)
+        older = re.search(rb'href="\?older=([^"]+)"', first).group(1).decode()
+
+        second = client.get(f'/?older={older}').data
+        self.assertIn(b'Newer posts', second)
+        self.assertNotEqual(re.findall(rb'<h2>.*</h2>', first), re.findall(rb'<h2>.*</h2>', second))
+
+    def test_index_cached(self):
+        client = app.test_client(self)
+        client.get('/')
+        loads = db.feed_cache.stats()["loads"]
+        client.get('/')
+        self.assertEqual(loads, db.feed_cache.stats()["loads"])  # served without the database
+
+        # a new post invalidates the cached feed
+        with app.app_context():
+            db.add_post("content", datetime.now().timestamp() + 200000, "cached feed", 0)
+        try:
+            self.assertIn(b'<h2>cached feed</h2>', client.get('/').data)
+        finally:
+            with app.app_context():
+                db.delete_post(0, "cached feed")
+        self.assertNotIn(b'<h2>cached feed</h2>', client.get('/').data)
+
     def test_users_posts(self):
         with app.test_client() as client:
             with patch("blog.session", dict()) as session:
@@ -180,9 +209,8 @@ class MyTestCase(unittest.TestCase):
             ip = '127.0.0.1'
             local = {'REMOTE_ADDR': ip}
 
-            # ensure loginattempts is empty
-            with app.app_context():
-                db.del_from_db("DELETE FROM loginattempts WHERE ip=?", (ip,))
+            # ensure there are no failed attempts counted for this IP
+            login_limiter.succeeded(ip)
 
             # test that an incorrect username does not work - should take around one second
             start_time = time.time()
@@ -219,14 +247,12 @@ class MyTestCase(unittest.TestCase):
             response = client.post('/login/', data=data, follow_redirects=True, environ_base=local)
             self.assertIn(b'You are still locked out.', response.data)
 
-            # change stored time to simulate >15 minutes passing
-            with app.app_context():
-                twenty_minutes_ago = datetime.now() - timedelta(minutes=20)
-                db.update_db("UPDATE loginattempts SET lockouttime=? WHERE ip=?", (twenty_minutes_ago, ip))
-
-            #  attempts should now reset
-            response = client.post('/login/', data=data, follow_redirects=True, environ_base=local)
-            self.assertIn(b'Incorrect Login Details, 4 attempts remaining', response.data)
+            # move the clock on to simulate >15 minutes passing
+            twenty_minutes_on = time.time() + timedelta(minutes=20).total_seconds()
+            with patch.object(login_limiter, 'clock', lambda: twenty_minutes_on):
+                #  attempts should now reset
+                response = client.post('/login/', data=data, follow_redirects=True, environ_base=local)
+                self.assertIn(b'Incorrect Login Details, 4 attempts remaining', response.data)
 
             # test email sqli
             data.update({'email': '\' or 1=1;--'})
@@ -238,9 +264,8 @@ class MyTestCase(unittest.TestCase):
             response = client.post('/login/', data=data, follow_redirects=True)
             self.assertIn(b'Incorrect Login Details', response.data)
 
-            # clear loginattempts
-            with app.app_context():
-                db.del_from_db("DELETE FROM loginattempts WHERE ip=?", (ip,))
+            # clear the failed attempts
+            login_limiter.succeeded(ip)
 
     def test_new_post(self):
         with app.test_client() as client:
@@ -415,6 +440,12 @@ class MyTestCase(unittest.TestCase):
             self.assertIn(b'<p><a href="/aking">aking</a></p>', response.data)
             self.assertIn(b'<p><a href="/tkimler">tkimler</a></p>', response.data)
 
+            # posts are searched by the words in their title and content
+            query = {'s': 'random item'}
+            response = client.get('/search/', query_string=query, follow_redirects=True)
+            self.assertIn(b'<h2>Posts</h2>', response.data)
+            self.assertRegex(response.data, rb'<p><a href="/\w+">Item \d</a> by \w+</p>')
+
             # a search containing an SQLi will be disarmed
             query = {'s': "' union all select password from users --"}
             response = client.get('/search/', query_string=query, follow_redirects=True)
@@ -499,6 +530,25 @@ class MyTestCase(unittest.TestCase):
                 response = client.post('/confirmation/', data=data, follow_redirects=True)
                 self.assertIn(b'Too many failed attempts', response.data)
 
+    def test_two_factor_renders_after_commit(self):
+        render_template = blog.render_template
+        depths = []
+
+        def render_outside_transaction(*args, **kwargs):
+            depths.append(db.get_db().depth)  # the write lock is held while depth is above 0
+            return render_template(*args, **kwargs)
+
+        with app.test_client() as client:
+            with patch("blog.session", dict()), patch("blog.render_template", render_outside_transaction):
+                data = {'email': 'a.king@fakeemailservice.abcde',
+                        'password': 'apassword_1'}
+                client.post('/login/', data=data, follow_redirects=True)
+                response = client.post('/confirmation/', data={'code': 'aaaaaa'}, follow_redirects=True)
+                self.assertIn(b'Incorrect code. Attempts remaining 2', response.data)
+        self.assertEqual([0], depths[-1:])
+        with app.app_context():
+            db.del_two_factor(0)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,4 +1,6 @@
+import io
 import os
+import threading
 import time
 import unittest
 
@@ -82,6 +84,197 @@ class MyTestCase(unittest.TestCase):
 
         self.assertEqual(message, decrypted_msg)
 
+    def test_instances_keep_own_schedule(self):
+        message = "i love pushing to master"
+        nonce = 4162467955
+        block_cipher = b.BlowyFishy("thisisasecretkey")
+        encrypted_message = b.CTR(block_cipher, nonce).ctr_encryption(message)
+
+        # building a cipher for another key must not change one that already exists
+        b.BlowyFishy("thisisanotherkey")
+        self.assertEqual(encrypted_message, b.CTR(block_cipher, nonce).ctr_encryption(message))
+        self.assertEqual(encrypted_message, b.encrypt("thisisasecretkey", nonce, message))
+
+    def test_threads_with_different_keys(self):
+        keys = ["thisisasecretkey", "thisisanotherkey", "andathirdkey"]
+        expected = {key: b.encrypt(key, 123, "i love pushing to master") for key in keys}
+        results = []
+
+        def encrypt_many(key):
+            results.extend(b.encrypt(key, 123, "i love pushing to master") == expected[key] for _ in range(50))
+
+        threads = [threading.Thread(target=encrypt_many, args=(key,)) for key in keys]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(results))
+
+    def test_bytes(self):
+        key = "thisisasecretkey"
+        nonce = 4162467955
+        data = bytes(range(256)) * 3 + b"odd length"
+
+        encrypted = b.encrypt_bytes(key, nonce, data)
+        self.assertEqual(len(data), len(encrypted))
+        self.assertNotEqual(data, encrypted)
+        self.assertEqual(data, b.decrypt_bytes(key, nonce, encrypted))
+        self.assertEqual(data, b.decrypt_bytes(key, nonce, bytearray(encrypted)))
+        self.assertEqual(b"", b.encrypt_bytes(key, nonce, b""))
+
+        # starting at a later block gives the matching part of the full ciphertext
+        mode_ctr = b.CTR(b.BlowyFishy(key), nonce)
+        self.assertEqual(encrypted[80:160], mode_ctr.ctr_encrypt_bytes(data[80:160], counter=10))
+
+    def test_bytes_match_str(self):
+        key = "thisisasecretkey"
+        nonce = 4162467955
+        message = "i love pushing to master \xe9\xff\x00!"
+        padded = message.encode('latin-1') + bytes(-len(message) % 8)
+        self.assertEqual(b.encrypt(key, nonce, message).encode('latin-1'), b.encrypt_bytes(key, nonce, padded))
+
+    def test_known_ciphertext(self):
+        # ciphertext from before counter mode worked on whole blocks, which must keep decrypting
+        self.assertEqual("=\xe1\xab\xc0`\xd9\xff\x15-\xcfI\xb6G\x1c\x8b:",
+                         b.encrypt("thisisasecretkey", 4162467955, "known plaintext!"))
+        self.assertEqual("known plaintext!", b.decrypt("thisisasecretkey", 4162467955,
+                                                       "=\xe1\xab\xc0`\xd9\xff\x15-\xcfI\xb6G\x1c\x8b:"))
+
+    def test_keystream_cache(self):
+        key = "thisisasecretkey"
+        nonce = 4162467955
+        messages = ["short", "a" * 300, "b" * 1000, "i love pushing to master"]
+        expected = [b.encrypt(key, nonce, message) for message in messages]
+        data = bytes(range(256)) * 8
+
+        cache = b.KeystreamCache(blocks=4, max_bytes=512, max_pairs=2)
+        mode_ctr = b.CTR(b.BlowyFishy(key), nonce)
+        self.assertIsNone(cache.get(mode_ctr, 8))
+
+        cache.register(key, nonce)
+        self.assertEqual(32, cache.size)
+        self.assertEqual(mode_ctr.generate_keystream(16), cache.get(mode_ctr, 16))
+
+        # grows as longer messages need it, up to the limit, past which the rest is generated
+        self.assertEqual(mode_ctr.generate_keystream(100, 3), cache.get(mode_ctr, 100, 3))
+        self.assertEqual(mode_ctr.generate_keystream(2048), cache.get(mode_ctr, 2048))
+        self.assertEqual(mode_ctr.generate_keystream(64, 100), cache.get(mode_ctr, 64, 100))
+        self.assertEqual(512, cache.size)
+
+        # registering past max_pairs forgets the oldest
+        cache.register("thisisanotherkey", 1)
+        cache.register("andathirdkey", 2)
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get(mode_ctr, 8))
+
+        # the shared cache gives the same ciphertext as generating the keystream each time
+        b.register_keystream(bytes(key, "utf-8"), str(nonce))
+        try:
+            self.assertEqual(expected, [b.encrypt(key, nonce, message) for message in messages])
+            self.assertEqual(messages, [b.decrypt(key, nonce, message) for message in expected])
+            self.assertEqual(data, b.decrypt_bytes(key, nonce, b.encrypt_bytes(key, nonce, data)))
+        finally:
+            b.unregister_keystream(key, nonce)
+        self.assertIsNone(b.keystreams.get(mode_ctr, 8))
+
+    def test_get_cipher(self):
+        self.assertIs(b.get_cipher("thisisasecretkey"), b.get_cipher("thisisasecretkey"))
+        self.assertIsNot(b.get_cipher("thisisasecretkey"), b.get_cipher("thisisanotherkey"))
+        self.assertRaises(Exception, b.get_cipher, "abc")
+        self.assertLessEqual(b.get_cipher.cache_info().currsize, b.CIPHER_CACHE_SIZE)
+
+    def test_keystream_pool(self):
+        key = "thisisasecretkey"
+        nonce = 4162467955
+        mode_ctr = b.CTR(b.BlowyFishy(key), nonce)
+        data = bytes(range(256)) * 4 + b"odd length"
+
+        pool = b.KeystreamPool(workers=2, min_bytes=100, segment_bytes=60)
+        self.assertIsNone(pool.generate(mode_ctr, 1000))
+        pool.start()
+        try:
+            self.assertEqual(56, pool.segment_bytes)
+            self.assertIsNone(pool.generate(mode_ctr, 99))
+            self.assertEqual(mode_ctr.generate_keystream(1003, 7), pool.generate(mode_ctr, 1003, 7))
+        finally:
+            pool.shutdown()
+        self.assertFalse(pool.running)
+
+        # the shared pool gives the same ciphertext as generating serially
+        expected = b.encrypt_bytes(key, nonce, data)
+        b.start_keystream_pool(workers=2, min_bytes=64)
+        try:
+            self.assertEqual(expected, b.encrypt_bytes(key, nonce, data))
+            self.assertEqual(data, b.decrypt_bytes(key, nonce, expected))
+        finally:
+            b.stop_keystream_pool()
+
+    def test_streams(self):
+        key = "thisisasecretkey"
+        nonce = 4162467955
+        data = os.urandom(1000)
+        expected = b.encrypt_bytes(key, nonce, data)
+
+        # chunks that don't line up with blocks carry on from where the last one stopped
+        self.assertEqual(expected, b''.join(b.encrypt_stream(key, nonce, io.BytesIO(data), chunk_size=13)))
+        chunks = [data[:3], b"", data[3:500], data[500:]]
+        self.assertEqual(expected, b''.join(b.encrypt_stream(key, nonce, iter(chunks))))
+        self.assertEqual(data, b''.join(b.decrypt_stream(key, nonce, [expected])))
+        self.assertEqual(data[333:], b''.join(b.decrypt_stream(key, nonce, [expected[333:]], offset=333)))
+
+        encrypted, decrypted = io.BytesIO(), io.BytesIO()
+        self.assertEqual(1000, b.encrypt_file(key, nonce, io.BytesIO(data), encrypted, chunk_size=64))
+        encrypted.seek(0)
+        self.assertEqual(1000, b.decrypt_file(key, nonce, encrypted, decrypted))
+        self.assertEqual(data, decrypted.getvalue())
+
+        # random access from any byte, without reading what is before it
+        self.assertEqual(data[77:277], b''.join(b.decrypt_range(key, nonce, encrypted, 77, 200, chunk_size=32)))
+        self.assertEqual(data[990:], b''.join(b.decrypt_range(key, nonce, encrypted, 990)))
+        self.assertEqual(b"", b''.join(b.decrypt_range(key, nonce, encrypted, 1000, 10)))
+
+    def test_encrypt_decrypt_many(self):
+        key = "thisisasecretkey"
+        nonce = 4162467955
+        messages = ["a@a.com", "", None, "i love pushing to master", "\u20ac not latin-1", 12345, "b" * 300]
+        expected = [None if message is None else b.encrypt(key, nonce, message) for message in messages]
+
+        encrypted = b.encrypt_many(key, nonce, messages)
+        self.assertEqual(expected, encrypted)
+        self.assertEqual([None if message is None else b.decrypt(key, nonce, message) for message in encrypted],
+                         b.decrypt_many(key, nonce, encrypted))
+        self.assertEqual("i love pushing to master", b.decrypt_many(key, nonce, encrypted)[3])
+        self.assertEqual([], b.encrypt_many(key, nonce, []))
+
+        # nonces past 32 bits go through the original implementation one at a time
+        self.assertEqual([b.encrypt(key, 1 << 40, "abc")], b.encrypt_many(key, 1 << 40, ["abc"]))
+
+    def test_encryption_memo(self):
+        key = "thisisasecretkey"
+        nonce = 4162467955
+        memo = b.EncryptionMemo(key, nonce, max_size=2, ttl=0.2)
+
+        self.assertEqual(b.encrypt(key, nonce, "a@a.com"), memo.encrypt("a@a.com"))
+        self.assertEqual(b.encrypt(key, nonce, "a@a.com"), memo.encrypt("a@a.com"))
+        self.assertEqual((1, 1), (memo.hits, memo.misses))
+
+        # least recently used is forgotten past max_size
+        memo.encrypt("b@b.com")
+        memo.encrypt("a@a.com")
+        memo.encrypt("c@c.com")
+        self.assertEqual(2, len(memo))
+        memo.encrypt("a@a.com")
+        self.assertEqual((3, 3), (memo.hits, memo.misses))
+
+        # nothing is kept past the ttl, even if it keeps being used
+        time.sleep(0.1)
+        memo.encrypt("a@a.com")
+        time.sleep(0.15)
+        memo.purge()
+        self.assertEqual(0, len(memo))
+        memo.encrypt("a@a.com")
+        self.assertEqual({"hits": 4, "misses": 4, "size": 1, "hit_ratio": 0.5}, memo.stats())
+
 
 if __name__ == '__main__':
     unittest.main()
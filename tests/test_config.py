@@ -0,0 +1,52 @@
+import os
+import unittest
+
+from dotenv import load_dotenv
+
+import blowfish
+import config
+
+
+class MyTestCase(unittest.TestCase):
+    def test_secrets_match_env(self):
+        load_dotenv(override=True)
+        sek = blowfish.decrypt("dQw4w9WgXcQ", 0, os.environ.get("UG_4_SEK"))
+        dbn = blowfish.decrypt(sek, 0, os.environ.get("UG_4_DBN"))
+        self.assertEqual(sek, config.SEK)
+        self.assertEqual(dbn, config.DBN)
+        self.assertEqual(blowfish.decrypt(sek, dbn, os.environ.get("UG_4_DB")), config.DBK)
+        self.assertEqual("db.sqlite", config.DATABASE)
+
+    def test_decrypted_once(self):
+        secrets = config.Secrets()
+        self.assertEqual({"decrypted": 0, "seconds": 0.0}, secrets.stats())
+        dbk = secrets.get("DBK")
+        self.assertEqual(3, secrets.decrypted)  # SEK and DBN are needed to decrypt it
+        self.assertEqual(dbk, secrets.get("DBK"))
+        secrets.get("DBN")
+        self.assertEqual(3, secrets.decrypted)
+        self.assertGreater(secrets.stats()["seconds"], 0)
+
+        secrets.clear()
+        self.assertEqual(dbk, secrets.get("DBK"))
+        self.assertEqual(6, secrets.decrypted)
+
+    def test_unknown_secret(self):
+        self.assertRaises(KeyError, config.secrets.get, "NOT_A_SECRET")
+        self.assertRaises(AttributeError, getattr, config, "NOT_A_SECRET")
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs os.fork")
+    def test_fork_keeps_decrypted(self):
+        dbk = config.DBK
+        decrypted = config.secrets.decrypted
+        pid = os.fork()
+        if pid == 0:
+            # the child has the parent's plain text, and a lock that isn't held by a thread it doesn't have
+            ok = config.DBK == dbk and config.secrets.decrypted == decrypted and config.secrets._lock.acquire(False)
+            os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(0, os.waitstatus_to_exitcode(status))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+import connections
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "test.sqlite")
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE items (name TEXT)")
+        self.pool = connections.ConnectionPool(self.path, size=2, timeout=0.2)
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.directory)
+
+    def test_reuse(self):
+        first = self.pool.checkout()
+        self.pool.release(first)
+        self.assertIs(first, self.pool.checkout())
+        self.assertEqual({"size": 2, "open": 1, "idle": 0}, self.pool.stats())
+
+    def test_not_persistent(self):
+        pool = connections.ConnectionPool(self.path, persistent=False)
+        first = pool.checkout()
+        pool.release(first)
+        self.assertRaises(sqlite3.ProgrammingError, first.execute, "SELECT 1")  # closed, as before pooling
+        self.assertIsNot(first, pool.checkout())
+
+    def test_bounded(self):
+        first = self.pool.checkout()
+        second = self.pool.checkout()
+        self.assertIsNot(first, second)
+        self.assertRaises(TimeoutError, self.pool.checkout)
+
+        # a connection released by another thread is handed to the thread waiting for one
+        threading.Timer(0.05, self.pool.release, (second,)).start()
+        self.assertIs(second, self.pool.checkout())
+        self.assertEqual(2, self.pool.stats()["open"])
+
+    def test_pragmas(self):
+        conn = self.pool.checkout()
+        self.assertEqual("wal", conn.execute("PRAGMA journal_mode").fetchone()[0])
+        self.assertEqual(1, conn.execute("PRAGMA synchronous").fetchone()[0])  # NORMAL
+        self.assertEqual(-16000, conn.execute("PRAGMA cache_size").fetchone()[0])
+        self.assertEqual(2, conn.execute("PRAGMA temp_store").fetchone()[0])  # MEMORY
+
+        pool = connections.ConnectionPool(self.path, pragmas={"cache_size": -500})
+        self.assertEqual(-500, pool.checkout().execute("PRAGMA cache_size").fetchone()[0])
+
+    def test_row_factory(self):
+        pool = connections.ConnectionPool(self.path, row_factory=sqlite3.Row)
+        self.assertEqual(1, pool.checkout().execute("SELECT 1 AS one").fetchone()["one"])
+
+    def test_rollback_on_release(self):
+        conn = self.pool.checkout()
+        conn.execute("INSERT INTO items VALUES ('uncommitted')")
+        self.assertTrue(conn.in_transaction)
+        self.pool.release(conn)
+
+        conn = self.pool.checkout()
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual([], conn.execute("SELECT * FROM items").fetchall())
+
+    def test_health_check(self):
+        pool = connections.ConnectionPool(self.path, health_check_after=0)
+        conn = pool.checkout()
+        pool.release(conn)
+        self.assertIs(conn, pool.checkout())  # passes SELECT 1
+
+        conn.close()  # e.g. closed from elsewhere while idle
+        pool.release(conn)
+        replacement = pool.checkout()
+        self.assertIsNot(conn, replacement)
+        self.assertEqual(1, pool.stats()["open"])
+
+    def test_replaced_file(self):
+        conn = self.pool.checkout()
+        self.pool.release(conn)
+        os.rename(self.path, self.path + ".old")
+        with sqlite3.connect(self.path) as new:
+            new.execute("CREATE TABLE others (name TEXT)")
+
+        conn = self.pool.checkout()
+        self.assertEqual([("others",)], conn.execute("SELECT name FROM sqlite_master").fetchall())
+
+    def test_close(self):
+        conn = self.pool.checkout()
+        idle = self.pool.checkout()
+        self.pool.release(idle)
+        self.pool.close()
+        self.assertRaises(sqlite3.ProgrammingError, idle.execute, "SELECT 1")
+        self.pool.release(conn)  # in use when the pool closed, closed as it comes back
+        self.assertRaises(sqlite3.ProgrammingError, conn.execute, "SELECT 1")
+        self.assertEqual({"size": 2, "open": 0, "idle": 0}, self.pool.stats())
+
+    def count(self, conn):
+        return conn.execute("SELECT count(*) FROM items").fetchone()[0]
+
+    def test_transaction(self):
+        conn = self.pool.checkout()
+        with connections.transaction(conn):
+            conn.execute("INSERT INTO items VALUES ('a')")
+            conn.execute("INSERT INTO items VALUES ('b')")
+            self.assertEqual(1, conn.depth)
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(0, conn.depth)
+        self.assertEqual(2, self.count(self.pool.checkout()))  # committed, so another connection sees both
+
+        with self.assertRaises(ValueError):
+            with connections.transaction(conn):
+                conn.execute("INSERT INTO items VALUES ('c')")
+                raise ValueError
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(2, self.count(conn))
+
+    def test_savepoint(self):
+        conn = self.pool.checkout()
+        with connections.transaction(conn):
+            conn.execute("INSERT INTO items VALUES ('a')")
+            with self.assertRaises(ValueError):
+                with connections.transaction(conn):
+                    conn.execute("INSERT INTO items VALUES ('b')")
+                    self.assertEqual(2, conn.depth)
+                    raise ValueError
+            self.assertEqual(1, self.count(conn))  # only the savepoint was rolled back
+            with connections.transaction(conn):
+                conn.execute("INSERT INTO items VALUES ('c')")
+        self.assertEqual([('a',), ('c',)], conn.execute("SELECT name FROM items ORDER BY name").fetchall())
+
+    def test_transaction_retries_when_busy(self):
+        conn = sqlite3.connect(self.path, timeout=0, factory=connections.PooledConnection)  # no busy handler
+        holder = sqlite3.connect(self.path, check_same_thread=False)
+        holder.execute("BEGIN IMMEDIATE")
+
+        # the lock is released during the retries
+        threading.Timer(0.05, holder.rollback).start()
+        with connections.transaction(conn, retries=5, backoff=0.02):
+            conn.execute("INSERT INTO items VALUES ('a')")
+        self.assertEqual(1, self.count(conn))
+
+        holder.execute("BEGIN IMMEDIATE")
+        with self.assertRaises(sqlite3.OperationalError) as raised:
+            with connections.transaction(conn, retries=2, backoff=0.01):
+                pass
+        self.assertTrue(connections.is_busy(raised.exception))
+        self.assertFalse(connections.is_busy(sqlite3.OperationalError("no such table: items")))
+        holder.rollback()
+
+    def test_release_mid_transaction(self):
+        conn = self.pool.checkout()
+        transaction = connections.transaction(conn)
+        transaction.__enter__()
+        conn.execute("INSERT INTO items VALUES ('a')")
+        self.pool.release(conn)  # e.g. a request that raised inside the block
+        conn = self.pool.checkout()
+        self.assertEqual(0, conn.depth)
+        self.assertEqual(0, self.count(conn))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs os.fork")
+    def test_fork_starts_empty(self):
+        parent = self.pool.checkout()
+        self.pool.release(parent)
+        pid = os.fork()
+        if pid == 0:
+            conn = self.pool.checkout()
+            ok = conn is not parent and self.pool.stats()["open"] == 1
+            os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(0, os.waitstatus_to_exitcode(status))
+        self.assertIs(parent, self.pool.checkout())  # the parent's connection is still its own
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,14 @@
 import os
+import sqlite3
 import time
 import unittest
 
 from dotenv import load_dotenv
 
+import auth
 import blowfish
 import db
+import validation
 from datetime import datetime, timedelta
 from blog import app
 
@@ -69,6 +72,49 @@ class MyTestCase(unittest.TestCase):
             self.assertIsNone(account[0])
             self.assertLess(0.95, time_diff)
 
+    def test_get_login_rehash(self):
+        with app.app_context():
+            query = "SELECT password FROM users WHERE userid=1"
+            email = "b.quayle@fakeemailservice.abcde"
+            try:
+                # a successful login rehashes the password to the configured cost
+                app.config["HASH_ITERATIONS"] = 5
+                self.assertEqual((1, 'bquayle'), db.get_login(email, "apassword_1"))
+                self.assertTrue(db.query_db(query, one=True)['password'].startswith("$ug4$5$"))
+
+                # and it keeps working, and can be taken back up again
+                app.config["HASH_ITERATIONS"] = 50
+                self.assertEqual((1, 'bquayle'), db.get_login(email, "apassword_1"))
+                self.assertTrue(db.query_db(query, one=True)['password'].startswith("$ug4$50$"))
+
+                # a failed login leaves the stored hash alone
+                app.config["HASH_ITERATIONS"] = 5
+                self.assertEqual((None, None), db.get_login(email, "ThisIsNotThePassword"))
+                self.assertTrue(db.query_db(query, one=True)['password'].startswith("$ug4$50$"))
+            finally:
+                app.config["HASH_ITERATIONS"] = 50
+
+    def test_get_login_legacy_hash(self):
+        with app.app_context():
+            # hashes stored before the format was versioned still log in
+            details = db.query_db("SELECT password, salt FROM users WHERE userid=1", one=True)
+            _, _, salt, digest = auth.parse_password_hash(details['password'], details['salt'])
+            db.update_db("UPDATE users SET password=? WHERE userid=1", (digest,))
+            self.assertEqual((1, 'bquayle'), db.get_login("b.quayle@fakeemailservice.abcde", "apassword_1"))
+            self.assertTrue(db.query_db("SELECT password FROM users WHERE userid=1", one=True)['password']
+                            .startswith("$ug4$50$"))
+
+    def test_hash_iterations_calibrated_when_needed(self):
+        with app.app_context():
+            app.config.update(HASH_TARGET_TIME=0.01, HASH_CALIBRATED=False)
+            try:
+                iterations = db.hash_iterations()
+                self.assertTrue(app.config["HASH_CALIBRATED"])
+                self.assertEqual(iterations, app.config["HASH_ITERATIONS"])
+                self.assertGreaterEqual(iterations, auth.MIN_ITERATIONS)
+            finally:
+                app.config.update(HASH_TARGET_TIME=None, HASH_CALIBRATED=True, HASH_ITERATIONS=auth.DEFAULT_ITERATIONS)
+
     def test_get_all_posts(self):
         with app.app_context():
             # check something is retrieved
@@ -119,12 +165,221 @@ class MyTestCase(unittest.TestCase):
 
             db.delete_post(0, "title")
 
+    def test_encrypted_posts(self):
+        content = "caf\u00e9 " * 60
+        app.config["ENCRYPT_POSTS"] = True
+        try:
+            with app.app_context():
+                date = datetime.now().timestamp() + 1000
+                db.add_post(content, date, "encrypted", 0)
+                stored = db.query_db("SELECT content FROM posts WHERE creator=0 AND title='encrypted'", one=True)
+                self.assertTrue(stored['content'].startswith(db.ENCRYPTED_POST_PREFIX))
+                self.assertNotIn("caf", stored['content'])
+
+                self.assertEqual(content, db.get_post(0, "encrypted")['content'])
+                self.assertIn(content, [post['content'] for post in db.get_posts(0)])
+                self.assertEqual(content[:200], db.get_all_posts(excerpt_length=200)[0]['content'])
+                self.assertEqual(content[:3], db.decrypt_post_content(stored['content'], 3))
+
+                # posts stored before encryption was turned on are read as they are
+                self.assertEqual("plain text", db.decrypt_post_content("plain text"))
+                self.assertEqual("plain", db.decrypt_post_content("plain text", 5))
+                db.delete_post(0, "encrypted")
+        finally:
+            app.config["ENCRYPT_POSTS"] = False
+
+    def test_post_nonces(self):
+        with app.app_context():
+            first, second = db.next_post_nonce(), db.next_post_nonce()
+            self.assertEqual(first + 1, second)
+            self.assertEqual(db.encrypt_post_content("same", first), db.encrypt_post_content("same", first))
+            self.assertNotEqual(db.encrypt_post_content("same", first)[db.ENCRYPTED_POST_HEADER:],
+                                db.encrypt_post_content("same", second)[db.ENCRYPTED_POST_HEADER:])
+
+            class Rollback(Exception):
+                pass
+
+            # DBN is the nonce of the encrypted columns, so no post gets it. Rolled back so the count goes on as before
+            with self.assertRaises(Rollback):
+                with db.transaction():
+                    db.insert_db('INSERT INTO post_nonces (nonce) VALUES (?)', (int(DBN) - 1,))
+                    self.assertEqual(int(DBN) + 1, db.next_post_nonce())
+                    raise Rollback
+            self.assertEqual(second + 1, db.next_post_nonce())
+
+        # the nonces of posts encrypted before there was a post_nonces table aren't used again
+        conn = sqlite3.connect(':memory:')
+        try:
+            conn.execute('CREATE TABLE posts (creator integer, date INTEGER, title TEXT, content TEXT)')
+            conn.executemany('INSERT INTO posts VALUES (0, 0, ?, ?)', [
+                ("encrypted", db.ENCRYPTED_POST_PREFIX + "0000002ac2VjcmV0"),
+                ("plain", "0000002b"),
+            ])
+            db.create_post_nonce_schema(conn)
+            self.assertEqual([(42,)], conn.execute('SELECT nonce FROM post_nonces').fetchall())
+        finally:
+            conn.close()
+
+    def test_decrypt_columns(self):
+        with app.app_context():
+            rows = db.query_db("SELECT userid, name, email FROM users")
+            expected = [dict(row, name=blowfish.decrypt(db.DBK, db.DBN, row['name']),
+                             email=blowfish.decrypt(db.DBK, db.DBN, row['email'])) for row in rows]
+            self.assertEqual(expected, db.query_db("SELECT userid, name, email FROM users",
+                                                   decrypt=db.ENCRYPTED_COLUMNS['users']))
+            self.assertEqual("a.king@fakeemailservice.abcde", db.get_email(0))
+            self.assertEqual(expected[0], db.query_db("SELECT userid, name, email FROM users WHERE userid=0", one=True,
+                                                      decrypt=db.ENCRYPTED_COLUMNS['users']))
+            self.assertEqual(expected, db.query_db("SELECT userid, name, email FROM users",
+                                                   decrypt=db.ENCRYPTED_COLUMNS['users'], lazy=False))
+
+    def test_encrypted_row(self):
+        with app.app_context():
+            row = db.query_db("SELECT usetwofactor, name, email FROM users WHERE userid=0", one=True,
+                              decrypt=db.ENCRYPTED_COLUMNS['users'])
+            self.assertIsInstance(row, db.EncryptedRow)
+            self.assertEqual(1, row['usetwofactor'])
+            self.assertEqual({'name', 'email'}, row.encrypted)
+
+            # only the column that is read gets decrypted, and only once
+            self.assertEqual("a.king@fakeemailservice.abcde", row['email'])
+            self.assertEqual("a.king@fakeemailservice.abcde", row.get('email'))
+            self.assertEqual({'name'}, row.encrypted)
+            row['name'] = "someone else"
+            self.assertEqual(set(), row.encrypted)
+            self.assertEqual(["usetwofactor", "name", "email"], list(row))
+
+    def test_make_dicts(self):
+        with app.app_context():
+            # column names are reused within a query and read again for the next one
+            self.assertEqual([{'a': 1, 'b': 2}, {'a': 3, 'b': 4}],
+                             db.query_db("SELECT 1 AS a, 2 AS b UNION ALL SELECT 3, 4"))
+            self.assertEqual({'username': 'aking'}, db.query_db("SELECT username FROM users WHERE userid=0", one=True))
+
+    def test_posts_pages(self):
+        with app.app_context():
+            date = datetime.now().timestamp() + 100000
+            titles = [f"page {i}" for i in range(25)]
+            for i, title in enumerate(titles):
+                db.add_post("content", date + i // 2, title, 0)  # pairs of posts share a date
+            try:
+                newest = list(reversed(titles))
+                first = db.get_posts(0)
+                self.assertEqual(newest[:db.POSTS_PER_PAGE], [post['title'] for post in first])
+                self.assertIsNone(first.newer)
+
+                second = db.get_posts(0, older=first.older)
+                self.assertEqual(newest[db.POSTS_PER_PAGE:], [post['title'] for post in second][:5])
+                self.assertEqual(first, db.get_posts(0, newer=second.newer))
+
+                feed = db.get_all_posts(older=first.older)
+                self.assertEqual("page 4", feed[0]['title'])  # the feed pages the same way
+                self.assertEqual(db.get_all_posts(), db.get_all_posts(older="1; DROP TABLE posts"))
+                self.assertIsNone(db.parse_page_cursor("nan:1"))
+            finally:
+                for title in titles:
+                    db.delete_post(0, title)
+
+    def test_iter_db(self):
+        with app.app_context():
+            query = "SELECT userid, email FROM users ORDER BY userid"
+            rows = db.iter_db(query)
+            self.assertEqual(0, next(rows)['userid'])  # read one at a time rather than fetched as a list
+            rows.close()
+
+            self.assertEqual(db.query_db(query, decrypt=db.ENCRYPTED_COLUMNS['users'], lazy=False),
+                             [dict(row) for row in db.iter_db(query, decrypt=db.ENCRYPTED_COLUMNS['users'])])
+
+    def test_transaction(self):
+        ip = "203.0.113.20"
+        with app.app_context():
+            with db.transaction():
+                db.insert_db("INSERT INTO loginattempts (ip) VALUES (?)", (ip,))
+                db.update_db("UPDATE loginattempts SET attempts=? WHERE ip=?", (3, ip))
+                self.assertTrue(db.get_db().in_transaction)  # not committed by each statement
+            self.assertFalse(db.get_db().in_transaction)
+            attempts = db.query_db("SELECT attempts FROM loginattempts WHERE ip=?", (ip,), one=True)['attempts']
+            self.assertEqual(3, attempts)
+
+            with self.assertRaises(KeyError):
+                with db.transaction():
+                    db.del_from_db("DELETE FROM loginattempts WHERE ip=?", (ip,))
+                    raise KeyError
+            self.assertIsNotNone(db.query_db("SELECT attempts FROM loginattempts WHERE ip=?", (ip,), one=True))
+            db.del_from_db("DELETE FROM loginattempts WHERE ip=?", (ip,))
+
     def test_get_users(self):
         with app.app_context():
             users, search = db.get_users("")
             self.assertIsNotNone(users)
             self.assertIsNotNone(search)
 
+    def test_search_users(self):
+        with app.app_context():
+            usernames = [user['username'] for user in db.get_users("KING")[0]]  # any case, any part of the name
+            self.assertEqual("aking", usernames[0])
+            self.assertNotIn("tkimler", usernames)
+            self.assertIn("tkimler", [user['username'] for user in db.get_users("ki")[0]])  # too short for trigrams
+
+            db.update_user(0, "kingston", 1)  # the index follows renames
+            try:
+                usernames = [user['username'] for user in db.get_users("ngst")[0]]
+                self.assertEqual(["kingston"], usernames)
+            finally:
+                db.update_user(0, "aking", 1)
+            self.assertEqual([], db.get_users("ngst")[0])
+
+    def test_search_posts(self):
+        with app.app_context():
+            date = datetime.now().timestamp()
+            db.add_post("a post about [b]unicorns[/b] and ponies", date, "searchable", 0)
+            db.add_post("it isn't about unicorns", date, "unicorns", 0)
+            try:
+                posts, search = db.search_posts("unicorns")
+                self.assertEqual(["unicorns", "searchable"], [post['title'] for post in posts])  # title counts more
+                self.assertEqual("aking", posts[0]['username'])
+                # words of the stored content as it reads
+                self.assertEqual(["unicorns"], [post['title'] for post in db.search_posts("isn't UNICORNS")[0]])
+                self.assertEqual([], db.search_posts("unic")[0])
+                self.assertEqual([], db.search_posts("\"unicorns\" OR b")[0])  # operators are searched as words
+                self.assertEqual([], db.search_posts("<>")[0])
+            finally:
+                db.delete_post(0, "searchable")
+                db.delete_post(0, "unicorns")
+            self.assertEqual([], db.search_posts("unicorns")[0])
+
+        app.config["ENCRYPT_POSTS"] = True
+        try:
+            with app.app_context():
+                db.add_post("secret unicorns", date, "encrypted", 0)
+                try:
+                    # only the title of an encrypted post is indexed
+                    self.assertEqual([], db.search_posts("secret")[0])
+                    self.assertEqual(1, len(db.search_posts("encrypted")[0]))
+                finally:
+                    db.delete_post(0, "encrypted")
+        finally:
+            app.config["ENCRYPT_POSTS"] = False
+
+    def test_create_search_schema(self):
+        # as create_db.py uses it, on a connection without the pool's row factory
+        conn = sqlite3.connect(':memory:')
+        try:
+            conn.execute('CREATE TABLE users (userid integer PRIMARY KEY, username VARCHAR(32))')
+            conn.execute('CREATE TABLE posts (creator integer, date INTEGER, title TEXT, content TEXT)')
+            conn.execute("INSERT INTO users VALUES (0, 'aking')")
+            conn.executemany('INSERT INTO posts VALUES (0, 0, ?, ?)', [
+                ("plain", validation.parse_markup(validation.validate_text("[b]unicorns[/b] aren't real"))),
+                ("encrypted", db.ENCRYPTED_POST_PREFIX + "00000001c2VjcmV0"),
+            ])
+            db.create_search_schema(conn)
+            conn.commit()
+            self.assertEqual([(1, "plain", " unicorns  aren't real"), (2, "encrypted", "")],
+                             conn.execute('SELECT rowid, title, content FROM post_search').fetchall())
+            self.assertEqual([(0,)], conn.execute("SELECT rowid FROM user_search WHERE username MATCH 'kin'").fetchall())
+        finally:
+            conn.close()
+
     def test_set_get_delete_twofactor(self):
         with app.app_context():
             date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -0,0 +1,112 @@
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import feedcache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def __call__(self):
+        return self.now
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.cache = feedcache.FeedCache(max_entries=2, ttl=30, clock=self.clock)
+        self.loads = 0
+
+    def load(self, value="page"):
+        def load():
+            self.loads += 1
+            return f"{value} {self.loads}"
+        return load
+
+    def test_hit_and_invalidate(self):
+        self.assertEqual("page 1", self.cache.get("first", self.load()))
+        self.assertEqual("page 1", self.cache.get("first", self.load()))
+        self.cache.invalidate()
+        self.assertEqual("page 2", self.cache.get("first", self.load()))
+        stats = self.cache.stats()
+        self.assertEqual((1, 2, 1), (stats["hits"], stats["loads"], stats["invalidations"]))
+        self.assertAlmostEqual(1 / 3, stats["hit_ratio"])
+
+    def test_ttl(self):
+        self.cache.get("first", self.load())
+        self.clock.now += 29
+        self.assertEqual("page 1", self.cache.get("first", self.load()))
+        self.clock.now += 1
+        self.assertEqual("page 2", self.cache.get("first", self.load()))
+
+    def test_bounded(self):
+        for key in ("a", "b", "a", "c"):
+            self.cache.get(key, self.load(key))
+        self.assertEqual(["a", "c"], list(self.cache._entries))  # b was read least recently
+        self.assertEqual(2, self.cache.stats()["entries"])
+
+    def test_load_during_invalidation(self):
+        # a page loaded from before a write that invalidated the cache is returned but not kept
+        def load():
+            self.cache.invalidate()
+            return "stale"
+
+        self.assertEqual("stale", self.cache.get("first", load))
+        self.assertEqual("page 1", self.cache.get("first", self.load()))
+
+    def test_stampede(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_load():
+            started.set()
+            release.wait(5)
+            return self.load()()
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(self.cache.get("first", slow_load)))
+        leader.start()
+        started.wait(5)
+        waiters = [threading.Thread(target=lambda: results.append(self.cache.get("first", slow_load)))
+                   for _ in range(8)]
+        for thread in waiters:
+            thread.start()
+        time.sleep(0.1)  # for the waiters to find the load under way
+        release.set()
+        for thread in [leader] + waiters:
+            thread.join()
+        self.assertEqual(["page 1"] * 9, results)
+        self.assertEqual(1, self.loads)
+        self.assertEqual((1, 8), (self.cache.stats()["loads"], self.cache.stats()["waits"]))
+
+    def test_failed_load(self):
+        def fail():
+            raise OSError
+
+        self.assertRaises(OSError, self.cache.get, "first", fail)
+        self.assertEqual({}, self.cache._loads)
+        self.assertEqual("page 1", self.cache.get("first", self.load()))
+
+    def test_shared_dir(self):
+        directory = tempfile.mkdtemp()
+        try:
+            one = feedcache.FeedCache(shared_dir=directory, clock=self.clock)
+            other = feedcache.FeedCache(shared_dir=directory, clock=self.clock)
+            page = {"posts": [{"title": "a"}], "older": [1.5, 2]}
+            self.assertEqual(page, one.get(("first",), lambda: page))
+            self.assertEqual(page, other.get(("first",), self.load()))  # read from the directory, not loaded
+            self.assertEqual(1, other.stats()["shared_hits"])
+
+            other.invalidate()  # seen by the other process too
+            self.assertEqual("page 1", one.get(("first",), self.load()))
+            self.assertEqual("page 1", other.get(("first",), self.load()))
+            self.assertEqual(1, self.loads)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
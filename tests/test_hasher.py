@@ -0,0 +1,40 @@
+import unittest
+
+import auth
+import hasher
+
+
+class MyTestCase(unittest.TestCase):
+    def test_submit_not_started(self):
+        service = hasher.HashingService(workers=1)
+        self.assertFalse(service.running)
+        self.assertEqual(auth.ug4_hash("a", 2), service.submit("a", 2).result())
+
+    def test_submit_process_pool(self):
+        service = hasher.HashingService(workers=2, queue_size=1).start()
+        try:
+            self.assertTrue(service.running)
+            # more submissions than the queue holds should wait their turn rather than fail
+            futures = [service.submit(str(i), 2) for i in range(4)]
+            self.assertEqual([auth.ug4_hash(str(i), 2) for i in range(4)], [f.result() for f in futures])
+        finally:
+            service.shutdown()
+        self.assertFalse(service.running)
+
+    def test_autostart(self):
+        service = hasher.HashingService(workers=1, autostart=True)
+        self.assertFalse(service.running)
+        try:
+            self.assertEqual(auth.ug4_hash("a", 2), service.submit("a", 2).result())
+            self.assertTrue(service.running)
+        finally:
+            service.shutdown()
+
+    def test_defaults(self):
+        service = hasher.HashingService()
+        self.assertGreaterEqual(service.workers, 1)
+        self.assertEqual(service.workers * 4, service.queue_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
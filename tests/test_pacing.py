@@ -0,0 +1,76 @@
+import asyncio
+import time
+import unittest
+
+from flask import request
+
+import pacing
+from blog import app
+
+
+async def asgi_get(asgi_app, path, client=('127.0.0.1', 5000)):
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': [], 'client': client}
+    await asgi_app(scope, receive, send)
+    return sent[0]['status'], sent[1]['body']
+
+
+class MyTestCase(unittest.TestCase):
+    def test_pad_outside_request(self):
+        start_time = time.time()
+        pacing.pad(start_time)
+        self.assertLess(0.95, time.time() - start_time)
+
+    def test_pad_in_request(self):
+        with app.test_request_context('/login/'):
+            start_time = time.time()
+            pacing.pad(start_time)
+            # only the release time is recorded, nothing waits yet
+            self.assertGreater(0.5, time.time() - start_time)
+            self.assertAlmostEqual(start_time + 1, request.environ[pacing.RELEASE_AT])
+
+    def test_floor_per_route(self):
+        app.config["RESPONSE_FLOORS"] = {'login': 0.25}
+        try:
+            with app.test_request_context('/login/'):
+                self.assertEqual(0.25, pacing.floor_for('login'))
+                self.assertEqual(1.0, pacing.floor_for('create_account'))
+        finally:
+            app.config["RESPONSE_FLOORS"] = {}
+
+    def test_deferred_release(self):
+        def padded_app(environ, start_response):
+            environ[pacing.RELEASE_AT] = time.time() + 0.5
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return [b'done']
+
+        # a single worker thread releases many padded responses in about one floor, not one floor each
+        asgi_app = pacing.DeferredReleaseApp(pacing.ReleaseMiddleware(padded_app), workers=1)
+
+        async def many():
+            return await asyncio.gather(*(asgi_get(asgi_app, '/') for _ in range(20)))
+
+        start_time = time.time()
+        responses = asyncio.run(many())
+        time_diff = time.time() - start_time
+
+        self.assertEqual([(200, b'done')] * 20, responses)
+        self.assertLess(0.45, time_diff)
+        self.assertGreater(2, time_diff)
+
+    def test_deferred_release_blog(self):
+        asgi_app = pacing.DeferredReleaseApp(app)
+        status, body = asyncio.run(asgi_get(asgi_app, '/'))
+        self.assertEqual(200, status)
+        self.assertIn(b'<h2>Item', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import os
+import time
+import unittest
+
+import db
+import ratelimit
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def __call__(self):
+        return self.now
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.limiter = ratelimit.LoginLimiter(clock=self.clock)
+
+    def test_lockout(self):
+        ip = "10.0.0.1"
+        self.assertFalse(self.limiter.locked_out(ip))
+        self.assertEqual([4, 3, 2, 1], [self.limiter.failed(ip) for _ in range(4)])
+        self.assertFalse(self.limiter.locked_out(ip))
+        self.assertEqual(0, self.limiter.failed(ip))
+        self.assertTrue(self.limiter.locked_out(ip))
+        self.assertFalse(self.limiter.locked_out("10.0.0.2"))  # other IPs are unaffected
+
+        # locked out for 15 minutes, then counted afresh
+        self.clock.now += 15 * 60 - 1
+        self.assertTrue(self.limiter.locked_out(ip))
+        self.clock.now += 1
+        self.assertFalse(self.limiter.locked_out(ip))
+        self.assertEqual(4, self.limiter.failed(ip))
+
+    def test_sliding_window(self):
+        ip = "10.0.0.1"
+        for _ in range(3):
+            self.limiter.failed(ip)
+            self.clock.now += 5 * 60
+        # the first attempt was 15 minutes ago, so it no longer counts
+        self.assertEqual(2, self.limiter.failed(ip))
+        self.assertEqual(1, self.limiter.failed(ip))
+        self.assertEqual(0, self.limiter.failed(ip))
+
+    def test_succeeded(self):
+        ip = "10.0.0.1"
+        for _ in range(3):
+            self.limiter.failed(ip)
+        self.limiter.succeeded(ip)
+        self.assertEqual(4, self.limiter.failed(ip))
+        self.assertEqual({}, self.limiter._pending)  # never locked out, so nothing to delete
+
+    def test_bounded(self):
+        limiter = ratelimit.LoginLimiter(max_tracked=3, clock=self.clock)
+        for ip in ("a", "b", "c"):
+            limiter.failed(ip)
+        limiter.locked_out("a")  # seen more recently than b
+        limiter.failed("d")
+        self.assertEqual(["c", "a", "d"], list(limiter._entries))
+        self.assertEqual(4, limiter.failed("b"))  # dropped, so its count started again
+        self.assertEqual(3, limiter.stats()["tracked"])
+
+    def test_bounded_keeps_lockouts(self):
+        limiter = ratelimit.LoginLimiter(max_tracked=3, clock=self.clock)
+        for _ in range(5):
+            limiter.failed("victim")
+        for i in range(10000):  # a full table of other IPs doesn't push the lockout out
+            limiter.failed(f"10.0.{i >> 8}.{i & 255}")
+        self.assertTrue(limiter.locked_out("victim"))
+        self.assertEqual(0, limiter.failed("victim"))
+        self.assertEqual({"tracked": 4, "locked": 1, "pending": 1}, limiter.stats())
+
+        # once over, the lockout is swept out with the others that have ended
+        self.clock.now += 15 * 60
+        for i in range(ratelimit.PRUNE_AT):
+            for _ in range(5):
+                limiter.failed(f"10.1.{i >> 8}.{i & 255}")
+        self.assertNotIn("victim", limiter._locked)
+        self.assertFalse(limiter.locked_out("victim"))
+
+    def test_flush(self):
+        ip = "10.0.0.1"
+        for _ in range(5):
+            self.limiter.failed(ip)
+        saved = []
+        self.assertEqual(1, self.limiter.flush(saved.append))
+        self.assertEqual([{ip: (5, self.clock.now)}], saved)
+        self.assertEqual(0, self.limiter.flush(saved.append))
+
+        # a failed save is kept for the next flush
+        def fail(lockouts):
+            raise OSError
+
+        self.clock.now += 15 * 60
+        self.limiter.succeeded(ip)
+        self.assertRaises(OSError, self.limiter.flush, fail)
+        self.assertEqual(1, self.limiter.flush(saved.append))
+        self.assertEqual({ip: None}, saved[-1])
+
+    def test_load(self):
+        now = self.clock.now
+        loaded = self.limiter.load([("10.0.0.1", now - 60), ("10.0.0.2", now - 15 * 60)])
+        self.assertEqual(1, loaded)
+        self.assertTrue(self.limiter.locked_out("10.0.0.1"))
+        self.assertFalse(self.limiter.locked_out("10.0.0.2"))
+        self.assertEqual({"tracked": 1, "locked": 1, "pending": 0}, self.limiter.stats())
+
+    def test_save_and_load_lockouts(self):
+        ip = "203.0.113.21"
+        locked_at = time.time() - 60
+        db.save_lockouts({ip: (5, locked_at)})
+        try:
+            lockouts = dict(db.load_lockouts(time.time() - ratelimit.WINDOW))
+            self.assertAlmostEqual(locked_at, lockouts[ip], places=3)
+            self.assertNotIn(ip, dict(db.load_lockouts(time.time())))
+        finally:
+            db.save_lockouts({ip: None})
+        self.assertNotIn(ip, dict(db.load_lockouts(0)))
+
+    def test_start_stop(self):
+        saved = []
+        for _ in range(5):
+            self.limiter.failed("10.0.0.1")
+        self.limiter.start(saved.append, interval=0.01)
+        for _ in range(100):
+            if saved:
+                break
+            time.sleep(0.01)
+        self.assertEqual(1, len(saved))
+
+        for _ in range(5):
+            self.limiter.failed("10.0.0.2")
+        self.limiter.stop()  # saves what is left
+        self.assertEqual({"10.0.0.2"}, set(saved[-1]))
+
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs os.fork")
+    def test_fork(self):
+        for _ in range(5):
+            self.limiter.failed("10.0.0.1")
+        pid = os.fork()
+        if pid == 0:
+            # the child keeps the counts but leaves saving the parent's lockouts to the parent
+            ok = self.limiter.locked_out("10.0.0.1") and self.limiter.stats()["pending"] == 0
+            os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(0, os.waitstatus_to_exitcode(status))
+        self.assertEqual(1, self.limiter.stats()["pending"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import startup
+
+
+class MyTestCase(unittest.TestCase):
+    def test_step(self):
+        count = len(startup.steps)
+        with startup.step("a step"):
+            pass
+        self.assertEqual(count + 1, len(startup.steps))
+        name, seconds = startup.steps[-1]
+        self.assertEqual("a step", name)
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_import_times(self):
+        packages = dict(startup.import_times("json", top=50))
+        self.assertIn("json", packages)
+        self.assertTrue(all(seconds >= 0 for seconds in packages.values()))
+
+    def test_deferred_imports(self):
+        # importing the app shouldn't pull in modules it only needs for batch hashing, email or the ASGI server
+        code = "import sys, blog; print([m for m in ('numpy', 'asyncio', 'smtplib') if m in sys.modules])"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual("[]", result.stdout.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
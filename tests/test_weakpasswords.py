@@ -0,0 +1,93 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+import db
+import weakpasswords
+from blog import app
+
+
+class MyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, "passwords.txt")
+        self.target = os.path.join(self.directory, "passwords.bin")
+        with open(self.source, 'w', encoding='utf-8') as file:
+            file.write("password\r\n123456\n\nqwerty123\npassword\nmötleycrüe\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check(self, passwords):
+        for password in ("password", "123456", "qwerty123", "mötleycrüe"):
+            self.assertIn(password, passwords)
+        for password in ("Password", "12345", "", "qwerty1234"):
+            self.assertNotIn(password, passwords)
+        self.assertEqual(4, len(passwords))
+
+    def test_plain_text(self):
+        passwords = weakpasswords.load(self.source)
+        self.assertIsInstance(passwords, weakpasswords.PasswordSet)
+        self.check(passwords)
+
+    def test_build(self):
+        self.assertEqual(4, weakpasswords.build(self.source, self.target))
+        passwords = weakpasswords.load(self.target)
+        self.assertIsInstance(passwords, weakpasswords.HashPrefixFile)
+        try:
+            self.check(passwords)
+        finally:
+            passwords.close()
+        self.assertEqual(["passwords.bin", "passwords.txt"], sorted(os.listdir(self.directory)))  # no runs left over
+
+    def test_build_in_chunks(self):
+        chunk_entries = weakpasswords.CHUNK_ENTRIES
+        weakpasswords.CHUNK_ENTRIES = 2  # sorted in several runs and merged
+        try:
+            self.assertEqual(4, weakpasswords.build(self.source, self.target))
+        finally:
+            weakpasswords.CHUNK_ENTRIES = chunk_entries
+        passwords = weakpasswords.load(self.target)
+        try:
+            self.check(passwords)
+        finally:
+            passwords.close()
+
+    def test_build_sha1(self):
+        with open(self.source, encoding='utf-8') as file:
+            lines = [line.rstrip('\r\n') for line in file]
+        with open(self.source, 'w') as file:
+            for count, line in enumerate(lines):
+                if line:
+                    file.write(f"{hashlib.sha1(line.encode('utf-8')).hexdigest().upper()}:{count}\n")
+        self.assertEqual(4, weakpasswords.build(self.source, self.target, sha1=True))
+        passwords = weakpasswords.load(self.target)
+        try:
+            self.check(passwords)
+        finally:
+            passwords.close()
+
+    def test_cli(self):
+        self.assertEqual(0, weakpasswords.main(["build", self.source, self.target]))
+        self.assertEqual(1, weakpasswords.main(["check", self.target, "hunter2", "123456"]))
+        self.assertEqual(0, weakpasswords.main(["check", self.source, "hunter2"]))
+
+    def test_is_weak_password(self):
+        with app.app_context():
+            self.assertTrue(db.is_weak_password("qwerty123"))
+            self.assertFalse(db.is_weak_password("correct horse battery"))
+            self.assertFalse(db.is_weak_password("short"))  # fails validation
+
+            weakpasswords.build(self.source, self.target)
+            db.load_weak_passwords(self.target)
+            try:
+                self.assertTrue(db.is_weak_password("mötleycrüe"))
+                self.assertFalse(db.is_weak_password("qwerty1234"))
+            finally:
+                db.load_weak_passwords()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+
+import workerpool
+
+
+class MyTestCase(unittest.TestCase):
+    def test_start_and_shutdown(self):
+        pool = workerpool.WorkerPool(workers=1)
+        self.assertFalse(pool.running)
+        self.assertIs(pool, pool.start())
+        try:
+            executor = pool._executor
+            self.assertTrue(pool.running)
+            pool.start()
+            self.assertIs(executor, pool._executor)  # already running, so the same pool
+            self.assertEqual(4, executor.submit(pow, 2, 2).result())
+        finally:
+            pool.shutdown()
+        self.assertFalse(pool.running)
+        pool.shutdown()  # nothing to shut down
+
+    def test_forked_child(self):
+        pool = workerpool.WorkerPool(workers=1).start()
+        try:
+            parent_executor = pool._executor
+            pool._pid -= 1  # as a forked child sees it, the pool belongs to another process
+            self.assertFalse(pool.running)
+            pool.start()
+            self.assertTrue(pool.running)
+            self.assertIsNot(parent_executor, pool._executor)
+        finally:
+            pool.shutdown()
+            parent_executor.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
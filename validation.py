@@ -18,10 +18,6 @@ __status__ = "Production"  # or "Development"
 
 import re
 
-from dotenv import load_dotenv
-
-load_dotenv(override=True)
-
 min_password_length = 8  # OWASP auth guide
 max_password_length = 64  # ^
 min_username_length = 1  # As restricted by create_db.py
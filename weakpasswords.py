@@ -0,0 +1,242 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Weak password lists
+File    : weakpasswords.py
+Date    : Sunday 18 October 2026
+Desc.   : Looks up passwords in a list of weak ones without reading the list for every lookup. A short plain text list,
+          one password per line like bad_passwords.txt, is read into a set. A long one, such as a breach list with
+          hundreds of millions of entries, is compiled by the builder into a file of sorted SHA-1 hash prefixes, which
+          is memory mapped, so its pages are shared by every process that opens it, and binary searched.
+          Compile a list with `python -m weakpasswords build passwords.txt passwords.bin`, or add --sha1 for a list
+          of SHA-1 hashes in hex such as the Have I Been Pwned download, one HASH or HASH:count per line.
+History : 18/10/2026 - v1.0 - Create project file.
+          18/10/2026 - v1.1 - Chunks are sorted with numpy in their own buffer rather than as Python ints
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.1"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Production"  # or "Development"
+
+import argparse
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+MAGIC = b'UG4WEAK1'  # start of a compiled list
+PREFIX_BYTES = 8  # bytes of each SHA-1 hash kept, a false match takes about 2^64 / entries guesses
+BUCKET_BITS = 16  # leading bits of the prefix that pick a bucket, so a lookup only searches its bucket
+BUCKETS = 1 << BUCKET_BITS
+HEADER = struct.Struct(f'<8sQ{BUCKETS + 1}Q')  # magic, entries, then where each bucket starts and the last one ends
+# prefixes sorted in memory at a time while building. A chunk takes 40MB, and up to as much again while it is sorted
+# and its duplicates dropped
+CHUNK_ENTRIES = 5000000
+
+
+def hash_prefix(password):
+    """ :return: the start of the SHA-1 hash of a password, as stored in a compiled list """
+    return hashlib.sha1(password.encode('utf-8')).digest()[:PREFIX_BYTES]
+
+
+class PasswordSet:
+    def __init__(self, path):
+        """ A plain text list of passwords, one per line, read into memory
+
+        :param path: path of the list
+        """
+        with open(path, 'r', encoding='utf-8', errors='surrogateescape') as file:
+            self._passwords = frozenset(line.rstrip('\r\n') for line in file) - {''}
+
+    def __contains__(self, password):
+        return password in self._passwords
+
+    def __len__(self):
+        return len(self._passwords)
+
+    def close(self):
+        pass
+
+
+class HashPrefixFile:
+    def __init__(self, path):
+        """ A list compiled by build(), memory mapped. Only the pages a lookup touches are read, and they are shared
+        with every other process that maps the file.
+
+        :param path: path of the compiled list
+        """
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self._map)
+        if header[0] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a compiled password list")
+        self._entries = header[1]
+        self._buckets = header[2:]
+
+    def __contains__(self, password):
+        prefix = hash_prefix(password)
+        bucket = int.from_bytes(prefix, 'big') >> (PREFIX_BYTES * 8 - BUCKET_BITS)
+        low, high = self._buckets[bucket], self._buckets[bucket + 1]
+        entries = self._map
+        while low < high:
+            middle = (low + high) // 2
+            position = HEADER.size + middle * PREFIX_BYTES
+            entry = entries[position:position + PREFIX_BYTES]
+            if entry < prefix:  # big endian, so bytes order the same as the numbers they hold
+                low = middle + 1
+            elif entry > prefix:
+                high = middle
+            else:
+                return True
+        return False
+
+    def __len__(self):
+        return self._entries
+
+    def close(self):
+        self._map.close()
+
+
+def load(path):
+    """ Opens a list of weak passwords, compiled or plain text
+
+    :param path: path of the list
+    :return: the list, which supports `password in passwords`
+    :rtype PasswordSet or HashPrefixFile:
+    """
+    with open(path, 'rb') as file:
+        compiled = file.read(len(MAGIC)) == MAGIC
+    return HashPrefixFile(path) if compiled else PasswordSet(path)
+
+
+def read_prefixes(path, sha1=False):
+    """ :return: generator of the hash prefix, as an int, of every entry in a plain text list """
+    with open(path, 'r', encoding='utf-8', errors='surrogateescape') as file:
+        for line in file:
+            line = line.rstrip('\r\n')
+            if not line:
+                continue
+            if sha1:
+                yield int(line.split(':', 1)[0][:PREFIX_BYTES * 2], 16)
+            else:
+                yield int.from_bytes(hash_prefix(line), 'big')
+
+
+def _sorted_runs(prefixes, directory):
+    # sorts the prefixes a chunk at a time into files, so a list far bigger than memory can be built
+    runs = []
+    chunk = array('Q')
+    for prefix in prefixes:
+        chunk.append(prefix)
+        if len(chunk) == CHUNK_ENTRIES:
+            runs.append(_write_run(chunk, directory))
+            chunk = array('Q')
+    if chunk or not runs:
+        runs.append(_write_run(chunk, directory))
+    return runs
+
+
+def _write_run(chunk, directory):
+    # sorted in place in the chunk's own buffer, so no entry becomes a Python int
+    import numpy as np  # only needed to build a list
+
+    run = np.frombuffer(chunk, dtype=np.uint64)
+    run.sort()
+    if len(run) > 1:
+        run = run[np.concatenate(([True], run[1:] != run[:-1]))]  # without duplicates
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+        run.tofile(file)
+    return file.name
+
+
+def _read_run(path):
+    with open(path, 'rb') as file:
+        while True:
+            block = array('Q')
+            block.frombytes(file.read(65536 * 8))
+            if not block:
+                return
+            yield from block
+
+
+def build(source, target, sha1=False):
+    """ Compiles a plain text list into a file of sorted hash prefixes that load() memory maps. The file is written
+    alongside the target and moved over it once complete, so a running app never sees half a list.
+
+    :param source: path of the plain text list
+    :param target: path to write the compiled list to
+    :param sha1: whether the list holds SHA-1 hashes in hex rather than passwords
+    :return: number of entries, without duplicates
+    :rtype int:
+    """
+    directory = os.path.dirname(os.path.abspath(target))
+    runs = _sorted_runs(read_prefixes(source, sha1), directory)
+    output = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+    try:
+        starts = [0] * (BUCKETS + 1)
+        entries = 0
+        with output as file:
+            file.write(bytes(HEADER.size))  # filled in once the buckets are counted
+            previous = None
+            block = bytearray()
+            for prefix in heapq.merge(*(_read_run(run) for run in runs)):
+                if prefix == previous:  # the same entry in more than one chunk
+                    continue
+                previous = prefix
+                starts[(prefix >> (PREFIX_BYTES * 8 - BUCKET_BITS)) + 1] += 1
+                block += prefix.to_bytes(PREFIX_BYTES, 'big')
+                entries += 1
+                if len(block) >= 1 << 20:
+                    file.write(block)
+                    block.clear()
+            file.write(block)
+            for bucket in range(BUCKETS):
+                starts[bucket + 1] += starts[bucket]
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, entries, *starts))
+        os.replace(output.name, target)
+    finally:
+        for run in runs:
+            os.remove(run)
+        if os.path.exists(output.name):
+            os.remove(output.name)
+    return entries
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="compile a plain text list")
+    build_parser.add_argument("source", help="plain text list, one password per line")
+    build_parser.add_argument("target", help="file to write the compiled list to")
+    build_parser.add_argument("--sha1", action="store_true", help="the list holds SHA-1 hashes in hex, HASH[:count]")
+
+    check_parser = commands.add_parser("check", help="look passwords up in a list")
+    check_parser.add_argument("list", help="compiled or plain text list")
+    check_parser.add_argument("passwords", nargs="+")
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        entries = build(args.source, args.target, args.sha1)
+        print(f"{entries} entries written to {args.target}")
+        return 0
+
+    passwords = load(args.list)
+    found = [password in passwords for password in args.passwords]
+    for password, weak in zip(args.passwords, found):
+        print(f"{password}: {'weak' if weak else 'not listed'}")
+    passwords.close()
+    return 1 if any(found) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
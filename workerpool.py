@@ -0,0 +1,57 @@
+# !/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Worker process pools
+File    : workerpool.py
+Date    : Sunday 18 October 2026
+Desc.   : The life cycle shared by the services that hand work to a pool of worker processes, hasher.HashingService
+          and blowfish.KeystreamPool. The process pool is only created, and the executor only imported, when the
+          service is started, and a pool is only counted as running in the process that started it, as a forked child
+          can't use its parent's.
+History : 18/10/2026 - v1.0 - Create project file.
+"""
+
+__author__ = "Martin Siddons, Chris Sutton, Sam Humphreys, Steven Diep"
+__copyright__ = "Copyright 2021, CMP-UG4"
+__credits__ = ["Martin Siddons", "Chris Sutton", "Sam Humphreys", "Steven Diep"]
+__version__ = "1.0"
+__email__ = "gny17hvu@uea.ac.uk"
+__status__ = "Production"  # or "Development"
+
+import os
+import threading
+
+
+class WorkerPool:
+    def __init__(self, workers=None):
+        """ Sets up the pool. No worker processes are created until start() is called.
+
+        :param workers: Number of worker processes, defaults to the number of CPU cores
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    @property
+    def running(self):
+        return self._executor is not None and self._pid == os.getpid()
+
+    def start(self):
+        """ Creates the process pool. Safe to call more than once, and again in a forked child where the parent's pool
+        can't be used.
+        """
+        from concurrent.futures import ProcessPoolExecutor  # not needed until a pool is started
+
+        with self._lock:
+            if not self.running:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+        return self
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self.running:
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+            self._pid = None